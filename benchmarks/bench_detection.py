@@ -0,0 +1,366 @@
+"""
+Microbenchmarks of the LogoDetectionStrategies analyses on synthetic inputs.
+
+Generates logos (PNG with and without alpha, JPEG, SVG rasterized the way the
+crawler does it; several sizes, with and without text) and DOMs of varying
+depth and width, then measures each strategy: median time per call, calls/sec
+and the peak Python heap allocated by one call (tracemalloc; native buffers of
+OpenCV and tesseract are not seen).
+
+Results can be stored as a baseline and later runs compared against it:
+    python benchmarks/bench_detection.py --quick
+    python benchmarks/bench_detection.py --save-baseline
+    python benchmarks/bench_detection.py --compare --tolerance 0.25 --fail-on-regression
+    python benchmarks/bench_detection.py --strategies element_path element_path_indexed --filter depth60
+
+Timings only compare across runs on the same machine and dependencies; the
+baseline records both and the comparison warns when they differ.
+"""
+
+import argparse
+import io
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup, Tag
+from PIL import Image, ImageDraw, ImageFont, PngImagePlugin
+
+from openlogo.detection import DetectionIndex, LogoCandidate, LogoDetectionStrategies
+
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "detection.json"
+
+IMAGE_SIZES = ((32, 32), (160, 48), (512, 512), (1200, 400))
+QUICK_IMAGE_SIZES = ((32, 32), (160, 48))
+# (depth, width): ``width`` siblings per level, one of which holds the next level
+DOM_SHAPES = ((5, 2), (5, 50), (20, 8), (60, 8))
+QUICK_DOM_SHAPES = ((5, 2), (20, 8))
+
+# Differences smaller than this are noise for the memory comparison
+MEMORY_SLACK_KB = 64
+
+
+@dataclass
+class ImageCase:
+    name: str
+    url: str
+    data: bytes
+
+
+@dataclass
+class DomCase:
+    name: str
+    images: List[Tag] = field(default_factory=list)
+
+
+def load_font(size: int) -> ImageFont.ImageFont:
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        # Pillow < 10.1 only has the fixed-size bitmap font
+        return ImageFont.load_default()
+
+
+def synthetic_logo(size: Tuple[int, int], transparent: bool, text: bool) -> Image.Image:
+    """A mark and optionally a word, on a transparent or white background."""
+    width, height = size
+    image = Image.new("RGBA", size, (0, 0, 0, 0) if transparent else (255, 255, 255, 255))
+    draw = ImageDraw.Draw(image)
+    mark = min(width, height)
+    pad = max(1, mark // 10)
+    draw.rounded_rectangle([pad, pad, mark - pad, mark - pad], radius=max(1, mark // 5), fill=(220, 60, 40, 255))
+    draw.ellipse([mark // 3, mark // 3, mark - mark // 3, mark - mark // 3], fill=(255, 255, 255, 255))
+    if text:
+        font_size = max(8, height // 3)
+        x = mark + pad if width > mark * 2 else pad
+        draw.text((x, height // 2 - font_size // 2), "Acme Corp", font=load_font(font_size), fill=(30, 30, 30, 255))
+    return image
+
+
+def synthetic_svg(size: Tuple[int, int], text: bool) -> bytes:
+    width, height = size
+    mark = min(width, height)
+    words = (f'<text x="{mark + 4}" y="{height * 2 // 3}" font-size="{max(8, height // 3)}" '
+             f'fill="#1e1e1e">Acme Corp</text>') if text else ''
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+            f'viewBox="0 0 {width} {height}"><rect x="2" y="2" width="{mark - 4}" height="{mark - 4}" '
+            f'rx="{mark // 5}" fill="#dc3c28"/><circle cx="{mark // 2}" cy="{mark // 2}" r="{mark // 6}" '
+            f'fill="#fff"/>{words}</svg>').encode()
+
+
+def encode(image: Image.Image, fmt: str) -> bytes:
+    buffer = io.BytesIO()
+    if fmt == "jpeg":
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        background.save(buffer, format="JPEG", quality=85)
+    else:
+        # Text chunks like those design tools write, for the metadata analysis
+        info = PngImagePlugin.PngInfo()
+        info.add_text("Software", "Adobe Illustrator")
+        info.add_text("Copyright", "Acme Corp")
+        image.save(buffer, format="PNG", pnginfo=info)
+    return buffer.getvalue()
+
+
+def image_cases(sizes: Tuple[Tuple[int, int], ...]) -> Tuple[List[ImageCase], List[str]]:
+    """The synthetic logos, and notes on the cases that could not be built here."""
+    cases: List[ImageCase] = []
+    notes: List[str] = []
+    try:
+        import cairosvg
+    except (ImportError, OSError) as e:
+        cairosvg = None
+        notes.append(f"svg cases skipped: cairosvg unavailable ({type(e).__name__})")
+    for width, height in sizes:
+        for text in (False, True):
+            label = f"{width}x{height}{'-text' if text else ''}"
+            for transparent in (False, True):
+                png = encode(synthetic_logo((width, height), transparent, text), "png")
+                cases.append(ImageCase(f"png-{label}{'-alpha' if transparent else ''}",
+                                       f"https://acme.example/static/logo-{label}.png", png))
+            jpeg = encode(synthetic_logo((width, height), False, text), "jpeg")
+            cases.append(ImageCase(f"jpeg-{label}", f"https://acme.example/static/logo-{label}.jpg", jpeg))
+            if cairosvg is not None:
+                # The analyses see SVGs rasterized, as prepare_image hands them over
+                png = cairosvg.svg2png(bytestring=synthetic_svg((width, height), text))
+                cases.append(ImageCase(f"svg-{label}", f"https://acme.example/static/logo-{label}.svg", png))
+    return cases, notes
+
+
+def synthetic_dom(depth: int, width: int) -> BeautifulSoup:
+    """Nested sections ``depth`` deep; each level has ``width - 1`` image cards beside the next section."""
+    cards = "".join(f'<div class="card"><span>item {i}</span><img src="/img/{{level}}-{i}.png"></div>'
+                    if i % 2 else f'<a href="/p{i}"><img src="/img/{{level}}-{i}.png"></a>'
+                    for i in range(width - 1))
+    html = "".join(cards.replace("{level}", str(level)) + "<section>" for level in range(depth))
+    html += '<img src="/logo.png" alt="logo">' + "</section>" * depth
+    return BeautifulSoup(f"<html><body><header>{html}</header></body></html>", "html.parser")
+
+
+def dom_cases(shapes: Tuple[Tuple[int, int], ...]) -> List[DomCase]:
+    return [DomCase(f"depth{depth}-width{width}", synthetic_dom(depth, width).find_all("img"))
+            for depth, width in shapes]
+
+
+def _visual(strategies: LogoDetectionStrategies, case: ImageCase):
+    candidate = LogoCandidate(url=case.url, score=0.0, features={}, metadata={})
+    return strategies._visual_characteristics_scores(case.data, candidate)
+
+
+def _element_paths(strategies: LogoDetectionStrategies, case: DomCase):
+    return [strategies._get_element_path(image) for image in case.images]
+
+
+def _element_paths_indexed(strategies: LogoDetectionStrategies, case: DomCase):
+    # A fresh index per call, as each crawl builds its own
+    index = DetectionIndex()
+    return [strategies._get_element_path(image, index) for image in case.images]
+
+
+# The synchronous analyses run_analyses offloads, called directly
+IMAGE_STRATEGIES: Dict[str, Callable[[LogoDetectionStrategies, ImageCase], Any]] = {
+    "technical": lambda strategies, case: strategies._image_technical_scores(case.url, case.data),
+    "visual": _visual,
+    "metadata": lambda strategies, case: strategies._metadata_scores(case.data),
+}
+DOM_STRATEGIES: Dict[str, Callable[[LogoDetectionStrategies, DomCase], Any]] = {
+    "element_path": _element_paths,
+    "element_path_indexed": _element_paths_indexed,
+}
+STRATEGIES = tuple(IMAGE_STRATEGIES) + tuple(DOM_STRATEGIES)
+
+
+def measure(func: Callable[[], Any], min_time: float, min_rounds: int) -> Dict[str, float]:
+    """Time ``func`` for at least ``min_time`` seconds and ``min_rounds`` calls, then one traced call."""
+    func()  # warm up imports and caches
+    durations: List[float] = []
+    total = 0.0
+    while total < min_time or len(durations) < min_rounds:
+        started = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - started)
+        total += durations[-1]
+
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "rounds": len(durations),
+        "median_us": round(statistics.median(durations) * 1e6, 1),
+        "mean_us": round(statistics.fmean(durations) * 1e6, 1),
+        "calls_per_sec": round(len(durations) / total, 1),
+        "peak_kb": round((peak - before) / 1024, 1),
+    }
+
+
+def environment() -> Dict[str, Any]:
+    """What the timings depend on besides the code."""
+    import numpy
+    import PIL
+
+    env: Dict[str, Any] = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "pillow": PIL.__version__,
+        "numpy": numpy.__version__,
+        "opencv": None,
+        "tesseract": None,
+        "cairosvg": False,
+    }
+    try:
+        import cv2
+        env["opencv"] = cv2.__version__
+    except ImportError:
+        pass
+    try:
+        import pytesseract
+        env["tesseract"] = str(pytesseract.get_tesseract_version())
+    except Exception:
+        pass
+    try:
+        import cairosvg  # noqa: F401
+        env["cairosvg"] = True
+    except (ImportError, OSError):
+        pass
+    return env
+
+
+def run_benchmarks(args: argparse.Namespace) -> Dict[str, Any]:
+    strategies = LogoDetectionStrategies()
+    images, notes = image_cases(QUICK_IMAGE_SIZES if args.quick else IMAGE_SIZES)
+    doms = dom_cases(QUICK_DOM_SHAPES if args.quick else DOM_SHAPES)
+    env = environment()
+    if env["tesseract"] is None and "visual" in args.strategies:
+        notes.append("visual runs without OCR: the tesseract binary is not installed")
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for name in args.strategies:
+        if name in IMAGE_STRATEGIES:
+            work = [(case, len(case.data), IMAGE_STRATEGIES[name]) for case in images]
+        else:
+            work = [(case, len(case.images), DOM_STRATEGIES[name]) for case in doms]
+        for case, size, strategy in work:
+            key = f"{name}/{case.name}"
+            if args.filter and not any(pattern in key for pattern in args.filter):
+                continue
+            result = measure(lambda: strategy(strategies, case), args.min_time, args.min_rounds)
+            # Input bytes for the image strategies, elements for the DOM ones
+            result["input_size"] = size
+            results[key] = result
+            if args.verbose:
+                print(f"{key}: {result['median_us']} us", file=sys.stderr)
+    strategies.close()
+    return {"environment": env, "settings": {"quick": args.quick, "min_time": args.min_time,
+                                             "min_rounds": args.min_rounds}, "notes": notes, "results": results}
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> Dict[str, Any]:
+    """Per benchmark of this run: baseline and current median/peak memory and a status.
+
+    Benchmarks of the baseline that were not run (e.g. with ``--quick``) are
+    left out. A benchmark regresses when its median is more than ``tolerance`` (a fraction)
+    slower than the baseline, or its peak memory grew by more than ``tolerance``
+    and ``MEMORY_SLACK_KB``.
+    """
+    rows = []
+    for key, current in report["results"].items():
+        previous = baseline["results"].get(key)
+        row: Dict[str, Any] = {"benchmark": key, "status": "ok"}
+        if previous is None:
+            row["status"] = "new"
+            rows.append(row)
+            continue
+        change = current["median_us"] / previous["median_us"] - 1 if previous["median_us"] else 0.0
+        memory_growth = current["peak_kb"] - previous["peak_kb"]
+        row.update(baseline_us=previous["median_us"], current_us=current["median_us"], change=round(change, 3),
+                   baseline_kb=previous["peak_kb"], current_kb=current["peak_kb"])
+        if change > tolerance:
+            row["status"] = "slower"
+        elif memory_growth > MEMORY_SLACK_KB and memory_growth > tolerance * previous["peak_kb"]:
+            row["status"] = "more memory"
+        elif change < -tolerance:
+            row["status"] = "faster"
+        rows.append(row)
+
+    differences = {name: {"baseline": baseline["environment"].get(name), "current": value}
+                   for name, value in report["environment"].items()
+                   if baseline["environment"].get(name) != value}
+    return {"tolerance": tolerance, "environment_differences": differences, "rows": rows,
+            "regressions": [row["benchmark"] for row in rows if row["status"] in ("slower", "more memory")]}
+
+
+def print_report(report: Dict[str, Any]):
+    header = f"{'benchmark':<44} {'median us':>12} {'calls/s':>10} {'peak KB':>9} {'input':>9}"
+    print(header)
+    print("-" * len(header))
+    for key, r in report["results"].items():
+        print(f"{key:<44} {r['median_us']:>12} {r['calls_per_sec']:>10} {r['peak_kb']:>9} {r['input_size']:>9}")
+    for note in report["notes"]:
+        print(f"note: {note}")
+
+
+def print_comparison(comparison: Dict[str, Any]):
+    print(f"\nComparison with the baseline (tolerance {comparison['tolerance']:.0%})")
+    for name, values in comparison["environment_differences"].items():
+        print(f"warning: {name} differs: baseline {values['baseline']}, now {values['current']}")
+    header = f"{'benchmark':<44} {'base us':>12} {'now us':>12} {'change':>8} {'base KB':>9} {'now KB':>9}  status"
+    print(header)
+    print("-" * len(header))
+    for row in comparison["rows"]:
+        if "change" not in row:
+            print(f"{row['benchmark']:<44} {'':>12} {'':>12} {'':>8} {'':>9} {'':>9}  {row['status']}")
+            continue
+        print(f"{row['benchmark']:<44} {row['baseline_us']:>12} {row['current_us']:>12} {row['change']:>+8.0%} "
+              f"{row['baseline_kb']:>9} {row['current_kb']:>9}  {row['status']}")
+    print(f"{len(comparison['regressions'])} regression(s)")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Microbenchmarks of the logo detection strategies.")
+    parser.add_argument("--strategies", nargs="+", choices=STRATEGIES, default=list(STRATEGIES))
+    parser.add_argument("--filter", nargs="+", default=None, help="Only benchmarks whose name contains one of these")
+    parser.add_argument("--quick", action="store_true", help="Fewer image sizes and DOM shapes")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds each benchmark runs at least")
+    parser.add_argument("--min-rounds", type=int, default=5, help="Calls each benchmark makes at least")
+    parser.add_argument("--json", default=None, help="Also write the report (and comparison) to this file")
+    parser.add_argument("--save-baseline", nargs="?", const=str(DEFAULT_BASELINE), default=None, metavar="PATH",
+                        help=f"Store the results as the baseline (default {DEFAULT_BASELINE.name})")
+    parser.add_argument("--compare", nargs="?", const=str(DEFAULT_BASELINE), default=None, metavar="PATH",
+                        help="Compare with a stored baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown as a fraction")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 on a regression")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Print each result as it is measured")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args)
+    print_report(report)
+    comparison = None
+    if args.compare:
+        comparison = compare(report, json.loads(Path(args.compare).read_text()), args.tolerance)
+        print_comparison(comparison)
+        report["comparison"] = comparison
+    if args.save_baseline:
+        path = Path(args.save_baseline)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({key: report[key] for key in ("environment", "settings", "notes", "results")},
+                                   indent=2) + "\n")
+        print(f"Baseline written to {path}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+    return 1 if args.fail_on_regression and comparison and comparison["regressions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
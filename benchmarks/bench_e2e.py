@@ -0,0 +1,215 @@
+"""
+Offline end-to-end benchmark of the crawler against local stand-in services.
+
+Serves stand-ins for the websites, Clearbit, the Google favicon service and the
+OpenAI chat completions API (``openlogo.standins``), points a LogoCrawler at
+them and drives ``crawl_website``, ``crawl_for_logos`` and ``process_csv_batch``.
+Reports domains/sec, p50/p95/p99 latency per domain, upstream requests per
+domain and peak RSS.
+
+Run with:
+    python benchmarks/bench_e2e.py --domains 200 --concurrency 16
+    python benchmarks/bench_e2e.py --scenario crawl_website --images 8 --svgs 2 --slow-fraction 0.05 --json out.json
+    python benchmarks/bench_e2e.py --domains 20 --trace spans.jsonl
+
+Use --upstream URL to drive a stand-in server started separately with
+``python -m openlogo.standins`` (e.g. on another machine or core).
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import aiohttp
+from aiohttp import web
+
+from openlogo import LLMEndpoint, LogoCrawler
+from openlogo.standins import StandinConfig, create_standin_app
+from openlogo.tracing import JSONLogExporter, Tracer, set_tracer
+
+SCENARIOS = ("crawl_website", "crawl_for_logos", "process_csv_batch")
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of ``values`` (0 when empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))]
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+async def upstream_requests(session: aiohttp.ClientSession, upstream: str) -> Dict[str, int]:
+    async with session.get(f"{upstream}/stats") as response:
+        return await response.json()
+
+
+def make_crawler(upstream: str, crawler_kwargs: Dict[str, Any]) -> LogoCrawler:
+    return LogoCrawler(llm_endpoints=[LLMEndpoint.openai("standin", base_url=f"{upstream}/v1")],
+                       clearbit_url=f"{upstream}/clearbit", google_favicon_url=f"{upstream}/favicons",
+                       **crawler_kwargs)
+
+
+async def run_bounded(items: List[str], concurrency: int, work: Callable[[str], Awaitable[Any]]):
+    slots = asyncio.Semaphore(concurrency)
+
+    async def bounded(item: str):
+        async with slots:
+            await work(item)
+
+    await asyncio.gather(*(bounded(item) for item in items))
+
+
+async def run_scenario(scenario: str, upstream: str, domains: List[str], concurrency: int,
+                       crawler_kwargs: Dict[str, Any], crawl_options: Dict[str, Any], max_pages: int,
+                       workdir: Path) -> Dict[str, Any]:
+    crawler = make_crawler(upstream, crawler_kwargs)
+    urls = [f"{upstream}/sites/{domain}/" for domain in domains]
+    latencies: List[float] = []
+
+    # Time every website through crawl_website, whichever entry point calls it
+    crawl_website = crawler.crawl_website
+
+    async def timed_crawl(url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await crawl_website(url, **{**crawl_options, **kwargs})
+        finally:
+            latencies.append(time.perf_counter() - started)
+
+    crawler.crawl_website = timed_crawl
+
+    async def crawl_pages(url: str):
+        started = time.perf_counter()
+        await crawler.crawl_for_logos(url, max_pages=max_pages)
+        latencies.append(time.perf_counter() - started)
+
+    async with aiohttp.ClientSession() as session:
+        before = await upstream_requests(session, upstream)
+        started = time.perf_counter()
+        # The crawler narrates every website; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            if scenario == "crawl_website":
+                await run_bounded(urls, concurrency, crawler.crawl_website)
+            elif scenario == "crawl_for_logos":
+                await run_bounded(urls, concurrency, crawl_pages)
+            else:
+                csv_path = workdir / "sites.csv"
+                csv_path.write_text("Website\n" + "".join(f"{url}\n" for url in urls))
+                await crawler.process_csv_batch(str(csv_path), str(workdir / "results"), confirm_header=False,
+                                                resume=False, return_results=False, concurrency=concurrency)
+            await crawler.close()
+        elapsed = time.perf_counter() - started
+        after = await upstream_requests(session, upstream)
+
+    by_route = {route: after.get(route, 0) - before.get(route, 0) for route in sorted(after)}
+    return {
+        "scenario": scenario,
+        "domains": len(domains),
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "domains_per_sec": round(len(domains) / elapsed, 2) if elapsed else 0.0,
+        "latency_p50": round(percentile(latencies, 0.50), 4),
+        "latency_p95": round(percentile(latencies, 0.95), 4),
+        "latency_p99": round(percentile(latencies, 0.99), 4),
+        "requests_per_domain": round(sum(by_route.values()) / len(domains), 2),
+        "requests_by_route": {route: count for route, count in by_route.items() if count},
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+@contextlib.asynccontextmanager
+async def local_upstream(config: StandinConfig):
+    """Serve the stand-ins on a free local port for the duration of the block."""
+    runner = web.AppRunner(create_standin_app(config), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        await runner.cleanup()
+
+
+async def run_benchmarks(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    config = StandinConfig(latency=args.latency, llm_latency=args.llm_latency, images_per_page=args.images,
+                           image_size=(args.image_width, args.image_height), svg_images=args.svgs,
+                           pages_per_site=args.pages, redirect=args.redirect, slow_fraction=args.slow_fraction,
+                           slow_latency=args.slow_latency)
+    crawler_kwargs = {"analysis_concurrency": args.analysis_concurrency}
+    crawl_options = {"deadline": args.deadline} if args.deadline else {}
+    domains = [f"site{i:05d}.example" for i in range(args.domains)]
+    scenarios = SCENARIOS if args.scenario == "all" else (args.scenario,)
+
+    reports = []
+    with tempfile.TemporaryDirectory() as tmp:
+        async with contextlib.AsyncExitStack() as stack:
+            upstream = args.upstream or await stack.enter_async_context(local_upstream(config))
+            for scenario in scenarios:
+                reports.append(await run_scenario(scenario, upstream.rstrip("/"), domains, args.concurrency,
+                                                  crawler_kwargs, crawl_options, args.pages, Path(tmp)))
+    return reports
+
+
+def print_report(reports: List[Dict[str, Any]]):
+    header = f"{'scenario':<18} {'domains':>7} {'dom/s':>8} {'p50 s':>8} {'p95 s':>8} {'p99 s':>8} {'req/dom':>8} {'rss MB':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in reports:
+        print(f"{r['scenario']:<18} {r['domains']:>7} {r['domains_per_sec']:>8} {r['latency_p50']:>8} "
+              f"{r['latency_p95']:>8} {r['latency_p99']:>8} {r['requests_per_domain']:>8} {r['peak_rss_mb']:>8}")
+    for r in reports:
+        print(f"{r['scenario']}: {r['requests_by_route']}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Offline end-to-end crawler benchmark against local stand-ins.")
+    parser.add_argument("--scenario", choices=SCENARIOS + ("all",), default="all")
+    parser.add_argument("--domains", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8, help="Websites crawled at once")
+    parser.add_argument("--analysis-concurrency", type=int, default=4, help="Images analyzed at once per website")
+    parser.add_argument("--deadline", type=float, default=None, help="crawl_website deadline in seconds")
+    parser.add_argument("--images", type=int, default=3, help="PNG content images per page")
+    parser.add_argument("--image-width", type=int, default=300)
+    parser.add_argument("--image-height", type=int, default=200)
+    parser.add_argument("--svgs", type=int, default=0, help="SVG content images per page")
+    parser.add_argument("--pages", type=int, default=3, help="Pages per website (crawl_for_logos max_pages)")
+    parser.add_argument("--redirect", action="store_true", help="Homepages are meta refresh stubs")
+    parser.add_argument("--slow-fraction", type=float, default=0.0, help="Share of slow websites")
+    parser.add_argument("--slow-latency", type=float, default=2.0, help="Extra seconds per request of a slow website")
+    parser.add_argument("--latency", type=float, default=0.01, help="Seconds added to every upstream response")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Seconds added to every chat completion")
+    parser.add_argument("--upstream", default=None, help="URL of an already running stand-in server")
+    parser.add_argument("--json", default=None, help="Also write the reports to this file")
+    parser.add_argument("--trace", default=None, help="Write the tracing spans of every crawl to this JSONL file")
+    args = parser.parse_args(argv)
+
+    tracer = Tracer([JSONLogExporter(args.trace)]) if args.trace else None
+    set_tracer(tracer)
+    try:
+        reports = asyncio.run(run_benchmarks(args))
+    finally:
+        set_tracer(None)
+        if tracer is not None:
+            tracer.close()
+    print_report(reports)
+    if args.json:
+        Path(args.json).write_text(json.dumps(reports, indent=2))
+
+
+if __name__ == "__main__":
+    main()
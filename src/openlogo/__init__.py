@@ -1,3 +1,4 @@
-from .crawler import LogoCrawler, try_clearbit_logo, try_google_favicon
+from .crawler import LogoCrawler, try_clearbit_logo, try_google_favicon, try_declared_icons
+from .llm import LLMEndpoint
 
-__all__ = ["LogoCrawler", "try_clearbit_logo", "try_google_favicon"]
+__all__ = ["LogoCrawler", "LLMEndpoint", "try_clearbit_logo", "try_google_favicon", "try_declared_icons"]
@@ -0,0 +1,202 @@
+import json
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Set, Union
+
+from .events import emit
+
+if TYPE_CHECKING:
+    from .crawler import LogoResult
+
+logger = logging.getLogger(__name__)
+
+# Per-file limits of the OpenAI batch API (50,000 requests, 200 MB), with headroom
+MAX_REQUESTS_PER_FILE = 50_000
+MAX_BYTES_PER_FILE = 190 * 1024 * 1024
+
+MANIFEST_FILE = 'manifest.jsonl'
+
+
+@dataclass
+class SpooledRequest:
+    """A deferred vision request and the candidate it belongs to."""
+    custom_id: str
+    site_url: str
+    page_url: str
+    image_url: str
+    cache_key: str  # Hash of the downloaded image, as used by ImageCache
+    image_hash: str  # Hash reported on the LogoResult
+    is_header: bool = False
+    detection_scores: Dict[str, Dict[str, float]] = field(default_factory=dict)
+
+
+@dataclass
+class SpooledSite:
+    """A website of a spooled run: results settled up front plus its pending requests."""
+    site_url: str
+    results: List[Dict[str, Any]] = field(default_factory=list)
+    requests: List[SpooledRequest] = field(default_factory=list)
+
+
+@dataclass
+class SpoolManifest:
+    metadata: Dict[str, Any]
+    sites: List[SpooledSite]
+
+
+class BatchSpool:
+    """Writes deferred vision requests as OpenAI batch input files.
+
+    Requests go to ``requests_NNNN.jsonl`` files within the batch API's per-file
+    limits. ``manifest.jsonl`` records which website and candidate each request
+    belongs to, plus the results settled without the LLM, so the run can be
+    finished once the batch output files are back. An image seen on several
+    websites is only requested once.
+    """
+
+    def __init__(self, directory: Union[str, Path], model: str, endpoint_path: str = '/v1/chat/completions',
+                 max_tokens: int = 300, metadata: Optional[Dict[str, Any]] = None,
+                 max_requests_per_file: int = MAX_REQUESTS_PER_FILE, max_bytes_per_file: int = MAX_BYTES_PER_FILE):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if (self.directory / MANIFEST_FILE).exists():
+            raise ValueError(f"{self.directory} already holds a spooled batch")
+        self.model = model
+        self.endpoint_path = endpoint_path
+        self.max_tokens = max_tokens
+        self.max_requests_per_file = max_requests_per_file
+        self.max_bytes_per_file = max_bytes_per_file
+        self.request_files: List[Path] = []
+        self.request_count = 0
+        self._requests_file = None
+        self._file_requests = 0
+        self._file_bytes = 0
+        self._by_cache_key: Dict[str, str] = {}
+        self._manifest = open(self.directory / MANIFEST_FILE, 'w')
+        self._write_manifest({'type': 'batch', **(metadata or {})})
+
+    def site(self, site_url: str) -> "SiteSpool":
+        return SiteSpool(self, site_url)
+
+    def add_request(self, request: SpooledRequest, messages: List[Dict]):
+        """Spool ``messages`` for ``request``, reusing the request of an identical image.
+
+        ``request.custom_id`` is filled in.
+        """
+        custom_id = self._by_cache_key.get(request.cache_key)
+        if custom_id is None:
+            custom_id = f"logo-{self.request_count:08d}"
+            self._write_request(custom_id, messages)
+            self._by_cache_key[request.cache_key] = custom_id
+            self.request_count += 1
+        request.custom_id = custom_id
+        self._write_manifest({'type': 'request', **request.__dict__})
+
+    def add_site(self, site_url: str, results: Iterable["LogoResult"]):
+        self._write_manifest({'type': 'site', 'site_url': site_url,
+                              'results': [result.model_dump(mode='json') for result in results]})
+
+    def _write_request(self, custom_id: str, messages: List[Dict]):
+        line = json.dumps({
+            'custom_id': custom_id,
+            'method': 'POST',
+            'url': self.endpoint_path,
+            'body': {'model': self.model, 'messages': messages, 'max_tokens': self.max_tokens},
+        }) + '\n'
+        size = len(line.encode())
+        if (self._requests_file is None or self._file_requests >= self.max_requests_per_file
+                or self._file_bytes + size > self.max_bytes_per_file):
+            self._rotate()
+        self._requests_file.write(line)
+        self._file_requests += 1
+        self._file_bytes += size
+
+    def _rotate(self):
+        if self._requests_file is not None:
+            self._requests_file.close()
+        path = self.directory / f"requests_{len(self.request_files) + 1:04d}.jsonl"
+        self.request_files.append(path)
+        self._requests_file = open(path, 'w')
+        self._file_requests = 0
+        self._file_bytes = 0
+
+    def _write_manifest(self, record: Dict[str, Any]):
+        self._manifest.write(json.dumps(record) + '\n')
+
+    def close(self):
+        if self._requests_file is not None:
+            self._requests_file.close()
+            self._requests_file = None
+        self._manifest.close()
+
+    def __enter__(self) -> "BatchSpool":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+@dataclass
+class SiteSpool:
+    """One website's share of a BatchSpool, passed down through ``crawl_website``."""
+    spool: BatchSpool
+    site_url: str
+    header_images: Set[str] = field(default_factory=set)
+    request_count: int = 0
+
+    def add_request(self, page_url: str, image_url: str, cache_key: str, image_hash: str, messages: List[Dict],
+                    detection_scores: Optional[Dict[str, Dict[str, float]]] = None) -> str:
+        request = SpooledRequest(custom_id='', site_url=self.site_url, page_url=page_url, image_url=image_url,
+                                 cache_key=cache_key, image_hash=image_hash,
+                                 is_header=image_url in self.header_images,
+                                 detection_scores=detection_scores or {})
+        self.spool.add_request(request, messages)
+        self.request_count += 1
+        return request.custom_id
+
+    def finish(self, results: Iterable["LogoResult"]):
+        """Record the results settled without the LLM (all of them if nothing was spooled)."""
+        self.spool.add_site(self.site_url, results)
+
+
+def load_spool(directory: Union[str, Path]) -> SpoolManifest:
+    """Read the manifest of a spooled batch, websites in the order they were crawled."""
+    metadata: Dict[str, Any] = {}
+    sites: Dict[str, SpooledSite] = {}
+    with open(Path(directory) / MANIFEST_FILE) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            kind = record.pop('type')
+            if kind == 'batch':
+                metadata = record
+            elif kind == 'request':
+                site = sites.setdefault(record['site_url'], SpooledSite(record['site_url']))
+                site.requests.append(SpooledRequest(**record))
+            elif kind == 'site':
+                site = sites.setdefault(record['site_url'], SpooledSite(record['site_url']))
+                site.results = record['results']
+    return SpoolManifest(metadata, list(sites.values()))
+
+
+def read_batch_responses(paths: Iterable[Union[str, Path]]) -> Dict[str, Dict[str, Any]]:
+    """Chat completion bodies by custom_id from batch output (and error) files.
+
+    Failed requests are reported and left out.
+    """
+    responses: Dict[str, Dict[str, Any]] = {}
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get('response') or {}
+                if record.get('error') or response.get('status_code') != 200:
+                    emit(logger, logging.WARNING, 'batch_request_failed', "Batch request {custom_id} failed: {error}",
+                         custom_id=record.get('custom_id'), error=record.get('error') or response.get('status_code'))
+                    continue
+                responses[record['custom_id']] = response.get('body') or {}
+    return responses
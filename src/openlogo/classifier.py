@@ -0,0 +1,198 @@
+import argparse
+import json
+import pickle
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple, Union
+
+from .features import FEATURE_NAMES, FeatureMatrix
+
+if TYPE_CHECKING:
+    from sklearn.ensemble import RandomForestClassifier
+
+MODEL_FORMAT_VERSION = 1
+TRAINING_FILE = 'training.jsonl'
+
+
+class TrainingLog:
+    """Appends the candidates the LLM judged to a JSONL file, one labeled sample per line.
+
+    Each line holds the candidate's detection scores, whether the LLM answered
+    that it is a logo and its confidence; non-logo answers are recorded too. The
+    crawler never records candidates settled by the local classifier, so a
+    retrained model does not learn from its own predictions.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'a')
+        self._lock = threading.Lock()
+
+    def record(self, image_url: str, page_url: str, detection_scores: Dict[str, Dict[str, float]],
+               logo: bool, confidence: float):
+        line = json.dumps({
+            'image_url': image_url,
+            'page_url': page_url,
+            'logo': logo,
+            'confidence': confidence,
+            'detection_scores': detection_scores,
+            'labeled_at': datetime.now().isoformat(),
+        }, default=float)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def load_labeled_results(results_dir: Union[str, Path], label_threshold: float = 0.8) -> Tuple[List[Dict], List[int]]:
+    """Collect (detection_scores, label) pairs from the crawler's training logs.
+
+    Reads every ``training.jsonl`` under ``results_dir`` (or ``results_dir`` itself
+    when it is a file), as written by ``TrainingLog``. A sample is labeled as a
+    logo when the LLM answered it is one with a confidence of at least
+    ``label_threshold``. Samples without detection scores are skipped.
+    """
+    root = Path(results_dir)
+    paths = [root] if root.is_file() else sorted(root.rglob(TRAINING_FILE))
+    samples: List[Dict] = []
+    labels: List[int] = []
+    for path in paths:
+        try:
+            with open(path) as f:
+                lines = f.readlines()
+        except OSError:
+            continue
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut off mid-write
+                continue
+            if not isinstance(record, dict) or not record.get('detection_scores'):
+                continue
+            samples.append(record['detection_scores'])
+            labels.append(int(bool(record.get('logo')) and float(record.get('confidence', 0.0)) >= label_threshold))
+    return samples, labels
+
+
+class LogoClassifier:
+    """Local logo/not-logo model over the fixed detection feature schema.
+
+    Trained on candidates previously labeled by the LLM, it lets the crawler accept or
+    reject confident candidates without a vision call. Probabilities at or above
+    ``accept_threshold`` count as logos, at or below ``reject_threshold`` as
+    non-logos; everything in between still goes to the LLM.
+    """
+
+    def __init__(self, model: Optional["RandomForestClassifier"] = None,
+                 accept_threshold: float = 0.9, reject_threshold: float = 0.1):
+        if not 0.0 <= reject_threshold < accept_threshold <= 1.0:
+            raise ValueError("Thresholds must satisfy 0 <= reject_threshold < accept_threshold <= 1")
+        self.model = model
+        self.accept_threshold = accept_threshold
+        self.reject_threshold = reject_threshold
+
+    @property
+    def is_trained(self) -> bool:
+        return self.model is not None
+
+    def fit(self, samples: Sequence[Dict[str, Dict[str, float]]], labels: Sequence[int],
+            n_estimators: int = 200, random_state: Optional[int] = 0) -> "LogoClassifier":
+        """Train on detection_scores dicts and 0/1 labels."""
+        if len(samples) != len(labels):
+            raise ValueError("samples and labels must have the same length")
+        if len(set(labels)) < 2:
+            raise ValueError("Training data must contain both logo and non-logo examples")
+
+        # scikit-learn is only needed to train or load a model
+        from sklearn.ensemble import RandomForestClassifier
+        model = RandomForestClassifier(n_estimators=n_estimators, random_state=random_state,
+                                       class_weight='balanced')
+        model.fit(FeatureMatrix.from_detection_scores(samples).values, list(labels))
+        self.model = model
+        return self
+
+    def predict_proba(self, samples: Union[FeatureMatrix, Sequence[Dict[str, Dict[str, float]]]]) -> List[float]:
+        """Return the logo probability of each candidate in one batch.
+
+        Accepts a page's FeatureMatrix or a list of detection_scores dicts.
+        """
+        if not self.is_trained:
+            raise ValueError("LogoClassifier has not been trained")
+        if not isinstance(samples, FeatureMatrix):
+            samples = FeatureMatrix.from_detection_scores(samples)
+        if not len(samples):
+            return []
+        positive = list(self.model.classes_).index(1)
+        probabilities = self.model.predict_proba(samples.values)
+        return [float(row[positive]) for row in probabilities]
+
+    def decide(self, probability: float) -> Optional[bool]:
+        """True for a confident logo, False for a confident non-logo, None when unsure."""
+        if probability >= self.accept_threshold:
+            return True
+        if probability <= self.reject_threshold:
+            return False
+        return None
+
+    def save(self, path: Union[str, Path]):
+        if not self.is_trained:
+            raise ValueError("LogoClassifier has not been trained")
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'wb') as f:
+            pickle.dump({
+                'version': MODEL_FORMAT_VERSION,
+                'feature_names': FEATURE_NAMES,
+                'accept_threshold': self.accept_threshold,
+                'reject_threshold': self.reject_threshold,
+                'model': self.model,
+            }, f)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "LogoClassifier":
+        """Load a model written by ``save``. Only load files you produced yourself."""
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+        if state.get('version') != MODEL_FORMAT_VERSION or tuple(state.get('feature_names', ())) != FEATURE_NAMES:
+            raise ValueError(f"Model at {path} was trained on a different feature schema; retrain it")
+        return cls(model=state['model'], accept_threshold=state['accept_threshold'],
+                   reject_threshold=state['reject_threshold'])
+
+    @classmethod
+    def train_from_results(cls, results_dir: Union[str, Path], label_threshold: float = 0.8,
+                           **kwargs) -> "LogoClassifier":
+        """Train a new classifier from the training logs under ``results_dir``."""
+        samples, labels = load_labeled_results(results_dir, label_threshold)
+        if not samples:
+            raise ValueError(f"No labeled samples found in {results_dir}")
+        return cls(**kwargs).fit(samples, labels)
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    """Retrain the local classifier: python -m openlogo.classifier RESULTS_DIR -o MODEL."""
+    parser = argparse.ArgumentParser(description="Train the local logo classifier from the crawler's training logs.")
+    parser.add_argument('results_dir', help=f"Output directory of crawls (searched for {TRAINING_FILE}) or one such file")
+    parser.add_argument('-o', '--output', default='logo_classifier.pkl', help="Where to write the model")
+    parser.add_argument('--label-threshold', type=float, default=0.8,
+                        help="LLM confidence at or above which a logo answer counts as a logo")
+    parser.add_argument('--accept-threshold', type=float, default=0.9)
+    parser.add_argument('--reject-threshold', type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    samples, labels = load_labeled_results(args.results_dir, args.label_threshold)
+    if not samples:
+        parser.error(f"No labeled samples found in {args.results_dir}")
+    classifier = LogoClassifier(accept_threshold=args.accept_threshold,
+                                reject_threshold=args.reject_threshold)
+    classifier.fit(samples, labels)
+    classifier.save(args.output)
+    print(f"Trained on {len(samples)} samples ({sum(labels)} logos), saved model to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
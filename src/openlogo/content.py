@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Mapping, Optional, Union
+
+import aiohttp
+
+
+@dataclass
+class StoredContent:
+    """Raw bytes of a URL and the validators it was served with."""
+    url: str
+    data: bytes
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_type: Optional[str] = None
+
+    @property
+    def has_validators(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+
+class ContentStore:
+    """Raw image bytes keyed by URL, shared by the analysis and save/upload stages.
+
+    Entries fetched by this process are held in memory (least recently used
+    evicted past ``max_memory_bytes``) and reused without a request. With a
+    ``directory`` they are also written to disk; an entry found only on disk comes
+    from an earlier run and is revalidated with ``If-None-Match`` /
+    ``If-Modified-Since`` before use, so unchanged images are not downloaded again.
+    """
+
+    def __init__(self, directory: Optional[Union[str, Path]] = None, max_memory_bytes: int = 256 * 1024 * 1024):
+        self.directory = Path(directory) if directory else None
+        if self.directory:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_memory_bytes = max_memory_bytes
+        self._memory: "OrderedDict[str, StoredContent]" = OrderedDict()
+        self._memory_bytes = 0
+        self.hits = 0
+        self.revalidated = 0
+        self.downloads = 0
+
+    def _paths(self, url: str):
+        key = hashlib.sha256(url.encode()).hexdigest()
+        shard = self.directory / key[:2]
+        return shard / f"{key}.bin", shard / f"{key}.json"
+
+    def _remember(self, entry: StoredContent):
+        previous = self._memory.pop(entry.url, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous.data)
+        if len(entry.data) > self.max_memory_bytes:
+            return
+        self._memory[entry.url] = entry
+        self._memory_bytes += len(entry.data)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted.data)
+
+    def get(self, url: str) -> Optional[StoredContent]:
+        """Entry fetched by this process, without touching the disk or network."""
+        entry = self._memory.get(url)
+        if entry is not None:
+            self._memory.move_to_end(url)
+        return entry
+
+    def _load(self, url: str) -> Optional[StoredContent]:
+        if not self.directory:
+            return None
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            data = body_path.read_bytes()
+        except (OSError, ValueError):
+            return None
+        if meta.get('url') != url:
+            return None
+        return StoredContent(url=url, data=data, etag=meta.get('etag'),
+                             last_modified=meta.get('last_modified'), content_type=meta.get('content_type'))
+
+    def put(self, url: str, data: bytes, headers: Optional[Mapping[str, str]] = None) -> StoredContent:
+        """Store ``data`` with the validators from the response ``headers`` (case-insensitive mapping)."""
+        headers = headers or {}
+        entry = StoredContent(url=url, data=data, etag=headers.get('ETag'),
+                              last_modified=headers.get('Last-Modified'), content_type=headers.get('Content-Type'))
+        self._remember(entry)
+        if self.directory:
+            body_path, meta_path = self._paths(url)
+            body_path.parent.mkdir(exist_ok=True)
+            # Write the body before the metadata so a reader never sees metadata for a partial body
+            for path, content in ((body_path, data), (meta_path, json.dumps({
+                    'url': url, 'etag': entry.etag, 'last_modified': entry.last_modified,
+                    'content_type': entry.content_type}).encode())):
+                # Per-process temporary name: other workers may share the directory
+                tmp_path = path.with_suffix(f"{path.suffix}.{os.getpid()}.tmp")
+                tmp_path.write_bytes(content)
+                os.replace(tmp_path, path)
+        return entry
+
+    async def fetch(self, session: aiohttp.ClientSession, url: str,
+                    headers: Optional[Dict[str, str]] = None, timeout: Optional[aiohttp.ClientTimeout] = None) -> Optional[bytes]:
+        """Bytes of ``url`` from the store, revalidating disk entries, or a fresh download.
+
+        Returns None on a non-200 response. Network errors propagate as with
+        ``session.get``.
+        """
+        entry = self.get(url)
+        if entry is not None:
+            self.hits += 1
+            return entry.data
+
+        stored = self._load(url)
+        request_headers = dict(headers or {})
+        if stored is not None and stored.has_validators:
+            if stored.etag:
+                request_headers['If-None-Match'] = stored.etag
+            if stored.last_modified:
+                request_headers['If-Modified-Since'] = stored.last_modified
+
+        kwargs = {'timeout': timeout} if timeout is not None else {}
+        async with session.get(url, headers=request_headers, **kwargs) as response:
+            if response.status == 304 and stored is not None:
+                self.revalidated += 1
+                self._remember(stored)
+                return stored.data
+            if response.status != 200:
+                return None
+            data = await response.read()
+            self.downloads += 1
+            self.put(url, data, response.headers)
+            return data
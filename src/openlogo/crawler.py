@@ -1,56 +1,91 @@
 import asyncio
 import os
+import socket
+import sys
+import time
 import csv
-from typing import List, Dict, Optional, Set, Tuple
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, List, Dict, Optional, Set, Tuple, Union
 from urllib.parse import urljoin, urlparse
 import hashlib
+import importlib.util
 from datetime import datetime, timedelta
 import urllib.request
 import json
+import logging
 import ssl
 import base64
-import cairosvg
 import io
 from pathlib import Path
+from contextlib import nullcontext
+from dataclasses import dataclass
+from functools import lru_cache
 
 import aiohttp
 from bs4 import BeautifulSoup, Tag
 from PIL import Image
 from pydantic import BaseModel
 import re
-from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
+# cairosvg, rich and the optional rembg and supabase are imported on first use,
+# so importing openlogo stays fast for callers that only need part of it
+if TYPE_CHECKING:
+    from supabase import Client
 
-# Optional: rembg for background removal
-try:
-    from rembg import remove
-    REMBG_AVAILABLE = True
-except ImportError:
-    REMBG_AVAILABLE = False
-    remove = None  # type: ignore
+from .detection import LogoDetectionStrategies, LogoCandidate, DetectionIndex
+from .classifier import TRAINING_FILE, LogoClassifier, TrainingLog
+from .features import FeatureMatrix
+from .ranking import EarlyStopPolicy, LocalRanker
+from .deadline import Deadline
+from .content import ContentStore
+from .storage import BlobStore, StorageBackend, SupabaseBackend, UploadQueue, blob_hash, blob_path
+from .batch import BatchSpool, SiteSpool, load_spool, read_batch_responses
+from .output import CHECKPOINT_FILE, RESULTS_FILE, ResultWriter, bind_source
+from .workqueue import Lease, QueueProgress, WorkQueue
+from .llm import AdaptiveConcurrency, EndpointPool, LLMClient, LLMEndpoint, LLMError
+from .metrics import MetricsRegistry, diff_snapshots
+from .events import emit
+from .icons import extract_declared_icons, parse_manifest_icons, rank_declared_icons
+from .tracing import span
+from .profiling import PROFILES_DIR, DomainProfiler
 
-# Optional: supabase for cloud storage
-try:
-    from supabase import create_client, Client
-    SUPABASE_AVAILABLE = True
-except ImportError:
-    SUPABASE_AVAILABLE = False
-    Client = None  # type: ignore
+logger = logging.getLogger(__name__)
 
-from .detection import LogoDetectionStrategies, LogoCandidate
+
+@lru_cache(maxsize=None)
+def load_rembg() -> Optional[Callable[[bytes], bytes]]:
+    """Optional: rembg's ``remove`` for background removal, or None if rembg is not installed."""
+    try:
+        from rembg import remove
+    except ImportError:
+        return None
+    return remove
+
+
+def __getattr__(name: str) -> bool:
+    # REMBG_AVAILABLE and SUPABASE_AVAILABLE predate the lazy imports; answered
+    # without importing the package
+    if name in ('REMBG_AVAILABLE', 'SUPABASE_AVAILABLE'):
+        return importlib.util.find_spec('rembg' if name == 'REMBG_AVAILABLE' else 'supabase') is not None
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+CLEARBIT_BASE_URL = "https://logo.clearbit.com"
+GOOGLE_FAVICON_URL = "https://www.google.com/s2/favicons"
 
 
-async def try_clearbit_logo(domain: str, website_url: str) -> Optional["LogoResult"]:
+async def try_clearbit_logo(domain: str, website_url: str, base_url: str = CLEARBIT_BASE_URL) -> Optional["LogoResult"]:
     """Try to get logo from Clearbit API (free, fast, high quality).
     
     Clearbit provides curated company logos for most established companies.
     Returns None if Clearbit doesn't have the logo (404) or on any error.
+    ``base_url`` points elsewhere for a local stand-in (see ``openlogo.standins``).
     """
-    clearbit_url = f"https://logo.clearbit.com/{domain}"
+    clearbit_url = f"{base_url.rstrip('/')}/{domain}"
     try:
         async with aiohttp.ClientSession() as session:
             async with session.head(clearbit_url, timeout=aiohttp.ClientTimeout(total=5)) as resp:
                 if resp.status == 200:
-                    print(f"✅ Clearbit logo found for {domain}: {clearbit_url}")
+                    emit(logger, logging.INFO, 'clearbit_hit', "Clearbit logo found for {domain}: {url}", domain=domain, url=clearbit_url)
                     return LogoResult(
                         url=clearbit_url,
                         confidence=0.95,
@@ -60,13 +95,16 @@ async def try_clearbit_logo(domain: str, website_url: str) -> Optional["LogoResu
                         timestamp=datetime.now(),
                         is_header=True,
                         rank_score=2.0,
+                        tier='clearbit',
                     )
     except Exception as e:
-        print(f"ℹ️  Clearbit unavailable for {domain}: {e}")
+        emit(logger, logging.INFO, 'clearbit_error', "Clearbit unavailable for {domain}: {error}", domain=domain, error=e)
     return None
 
 
-async def try_google_favicon(domain: str, website_url: str, size: int = 128) -> Optional["LogoResult"]:
+async def try_google_favicon(domain: str, website_url: str, size: int = 128,
+                             content_store: Optional[ContentStore] = None,
+                             base_url: str = GOOGLE_FAVICON_URL) -> Optional["LogoResult"]:
     """Try to get logo from Google's favicon service (fallback for Clearbit).
     
     Google's favicon service provides favicons for most websites.
@@ -77,35 +115,121 @@ async def try_google_favicon(domain: str, website_url: str, size: int = 128) ->
         domain: The domain to get favicon for (e.g., "example.com")
         website_url: The full website URL for metadata
         size: Icon size (16, 32, 64, 128, 256)
+        content_store: Optional store that keeps the downloaded icon for saving later
+        base_url: Favicon service URL, replaced by a local stand-in in tests
     """
-    favicon_url = f"https://www.google.com/s2/favicons?domain={domain}&sz={size}"
+    favicon_url = f"{base_url}?domain={domain}&sz={size}"
+    content_store = content_store or ContentStore()
     try:
         async with aiohttp.ClientSession() as session:
-            async with session.get(favicon_url, timeout=aiohttp.ClientTimeout(total=5)) as resp:
-                if resp.status == 200:
-                    # Check if we got actual content (not a generic globe icon)
-                    content = await resp.read()
-                    content_length = len(content)
-                    
-                    # Google returns a ~726 byte generic globe icon for unknown domains
-                    # Skip if content is too small (likely generic icon)
-                    if content_length < 1000:
-                        print(f"ℹ️  Google favicon too small for {domain} ({content_length} bytes), likely generic icon")
-                        return None
-                    
-                    print(f"✅ Google favicon found for {domain}: {favicon_url} ({content_length} bytes)")
-                    return LogoResult(
-                        url=favicon_url,
-                        confidence=0.75,  # Lower confidence than Clearbit
-                        description="Favicon from Google Favicon Service",
-                        page_url=website_url,
-                        image_hash=hashlib.md5(content).hexdigest(),
-                        timestamp=datetime.now(),
-                        is_header=True,
-                        rank_score=1.5,  # Lower rank than Clearbit
-                    )
+            content = await content_store.fetch(session, favicon_url, timeout=aiohttp.ClientTimeout(total=5))
+            if content is not None:
+                # Check if we got actual content (not a generic globe icon)
+                content_length = len(content)
+                
+                # Google returns a ~726 byte generic globe icon for unknown domains
+                # Skip if content is too small (likely generic icon)
+                if content_length < 1000:
+                    emit(logger, logging.DEBUG, 'favicon_generic', "Google favicon too small for {domain} ({bytes} bytes), likely generic icon",
+                         domain=domain, bytes=content_length)
+                    return None
+                
+                emit(logger, logging.INFO, 'favicon_hit', "Google favicon found for {domain}: {url} ({bytes} bytes)",
+                     domain=domain, url=favicon_url, bytes=content_length)
+                return LogoResult(
+                    url=favicon_url,
+                    confidence=0.75,  # Lower confidence than Clearbit
+                    description="Favicon from Google Favicon Service",
+                    page_url=website_url,
+                    image_hash=hashlib.md5(content).hexdigest(),
+                    timestamp=datetime.now(),
+                    is_header=True,
+                    rank_score=1.5,  # Lower rank than Clearbit
+                    tier='google_favicon',
+                )
     except Exception as e:
-        print(f"ℹ️  Google favicon unavailable for {domain}: {e}")
+        emit(logger, logging.INFO, 'favicon_error', "Google favicon unavailable for {domain}: {error}", domain=domain, error=e)
+    return None
+
+
+async def probe_image_size(session: aiohttp.ClientSession, image_url: str, max_bytes: int = 65536) -> Optional[Tuple[int, int]]:
+    """Read just enough of an image to get its dimensions.
+
+    SVGs are scalable and report (0, 0). Returns None if the image is unreachable
+    or its header cannot be decoded from the first ``max_bytes``.
+    """
+    try:
+        async with session.get(image_url, headers=BROWSER_HEADERS, timeout=aiohttp.ClientTimeout(total=5)) as resp:
+            if resp.status != 200:
+                return None
+            content_type = resp.headers.get('Content-Type', '').lower()
+            head = await resp.content.read(max_bytes)
+        if 'svg' in content_type or b'<svg' in head[:4096].lower():
+            return (0, 0)
+        return Image.open(io.BytesIO(head)).size
+    except Exception:
+        return None
+
+
+async def try_declared_icons(html: str, website_url: str, session: Optional[aiohttp.ClientSession] = None,
+                             min_size: int = 64) -> Optional["LogoResult"]:
+    """Try the brand assets the homepage declares (no LLM call).
+
+    Looks at JSON-LD ``Organization.logo``, apple-touch-icon, the web app manifest,
+    ``<link rel="icon">`` and og:image, in that order, and returns the first one
+    whose image is at least ``min_size`` pixels on its shorter side (SVGs always
+    qualify). og:image must also be roughly square, since it is usually a share
+    banner rather than a logo.
+
+    Args:
+        html: Homepage HTML
+        website_url: URL the HTML was served from (for resolving relative links)
+        session: Optional session to reuse for the manifest and image probes
+        min_size: Minimum width/height in pixels
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    icons, manifest_url = extract_declared_icons(soup, website_url)
+    if not icons and not manifest_url:
+        return None
+
+    own_session = session is None
+    if own_session:
+        session = aiohttp.ClientSession()
+    try:
+        if manifest_url:
+            try:
+                async with session.get(manifest_url, headers=BROWSER_HEADERS, timeout=aiohttp.ClientTimeout(total=5)) as resp:
+                    if resp.status == 200:
+                        icons.extend(parse_manifest_icons(await resp.json(content_type=None), manifest_url))
+            except Exception as e:
+                emit(logger, logging.DEBUG, 'manifest_error', "Could not read manifest {url}: {error}", url=manifest_url, error=e)
+
+        for icon in rank_declared_icons(icons):
+            size = await probe_image_size(session, icon.url)
+            if size is None:
+                continue
+            width, height = size
+            if size != (0, 0):
+                if min(width, height) < min_size:
+                    continue
+                if icon.source == 'og:image' and max(width, height) / min(width, height) > 1.25:
+                    continue
+            emit(logger, logging.INFO, 'declared_icon_hit', "Declared {source} icon found for {website}: {url}",
+                 source=icon.source, website=website_url, url=icon.url)
+            return LogoResult(
+                url=icon.url,
+                confidence=icon.confidence,
+                description=f"Logo declared in page HTML ({icon.source})",
+                page_url=website_url,
+                image_hash=hashlib.md5(icon.url.encode()).hexdigest(),
+                timestamp=datetime.now(),
+                is_header=True,
+                rank_score=1.0 + icon.confidence,
+                tier='declared_icons',
+            )
+    finally:
+        if own_session:
+            await session.close()
     return None
 
 
@@ -153,8 +277,72 @@ BROWSER_HEADERS = {
     "Sec-Ch-Ua-Platform": '"macOS"',
 }
 
+# Timeouts (seconds) of the homepage request and of each image download
+PAGE_TIMEOUT = 30
+IMAGE_TIMEOUT = 15
+
 # Use secure SSL context by default - removed insecure SSL bypass
 # If you need to handle self-signed certificates, use proper certificate validation
+def detect_url_column_name(csv_file_path: str) -> str:
+    """
+    Detect the URL column of a CSV file from its header row alone.
+    
+    Args:
+        csv_file_path: Path to the CSV file
+        
+    Returns:
+        Name of the URL column
+    """
+    possible_url_headers = [
+        'url', 'website', 'site', 'link', 'domain', 'company url', 
+        'website url', 'site url', 'company website', 'company site',
+        'web', 'webpage', 'page', 'address', 'homepage'
+    ]
+    
+    with open(csv_file_path, 'r', encoding='utf-8') as file:
+        headers = csv.DictReader(file).fieldnames
+    
+    if not headers:
+        raise ValueError("CSV file has no headers")
+    
+    # Find the URL column
+    url_column = None
+    for header in headers:
+        if header.lower().strip() in possible_url_headers:
+            url_column = header
+            break
+    
+    if not url_column:
+        # If no exact match, try partial matches
+        for header in headers:
+            header_lower = header.lower().strip()
+            for possible in possible_url_headers:
+                if possible in header_lower or header_lower in possible:
+                    url_column = header
+                    break
+            if url_column:
+                break
+    
+    if not url_column:
+        raise ValueError(
+            f"Could not detect URL column. Available columns: {headers}. "
+            f"Please ensure one of these columns contains URLs: {possible_url_headers}"
+        )
+    
+    return url_column
+
+def iter_csv_urls(csv_file_path: str, url_column: str) -> Iterator[str]:
+    """Stream the URLs of ``url_column`` row by row, adding https:// where missing."""
+    with open(csv_file_path, 'r', encoding='utf-8') as file:
+        for row in csv.DictReader(file):
+            url = (row.get(url_column) or '').strip()
+            if url and url.lower() not in ['', 'nan', 'none', 'null']:
+                # Ensure URL has protocol
+                if not url.startswith(('http://', 'https://')):
+                    url = 'https://' + url
+                yield url
+
+
 def create_secure_ssl_context():
     """Create a secure SSL context with proper certificate verification."""
     return ssl.create_default_context()
@@ -169,8 +357,29 @@ class LogoResult(BaseModel):
     is_header: bool = False
     rank_score: float = 0.0
     detection_scores: Dict[str, Dict[str, float]] = {}
+    partial: bool = False  # Found before a crawl_website deadline cut the analysis short
+    tier: Optional[str] = None  # Resolution tier that answered without image analysis
+
+@dataclass
+class PreparedImage:
+    """A downloaded candidate image, converted to PNG and ready for analysis."""
+    image_url: str
+    image_hash: str
+    png_data: bytes = b''
+    cached_result: Optional[LogoResult] = None
+
+    @property
+    def image_base64(self) -> str:
+        return base64.b64encode(self.png_data).decode('utf-8')
 
 class ImageCache:
+    """Vision results by image hash.
+
+    Results are copied in and out: crawls set ``is_header``, ``rank_score`` and
+    ``partial`` on the results they return, which must not leak into the cache or
+    into results already returned to other crawls.
+    """
+
     def __init__(self, cache_duration: timedelta = timedelta(days=1)):
         self.cache: Dict[str, LogoResult] = {}
         self.cache_duration = cache_duration
@@ -179,58 +388,95 @@ class ImageCache:
         if image_hash in self.cache:
             result = self.cache[image_hash]
             if datetime.now() - result.timestamp < self.cache_duration:
-                return result
+                return result.model_copy()
         return None
 
     def set(self, image_hash: str, result: LogoResult):
-        self.cache[image_hash] = result
+        self.cache[image_hash] = result.model_copy()
 
 class CloudStorage:
-    def __init__(self, supabase_url: Optional[str] = None, supabase_key: Optional[str] = None):
-        """Initialize cloud storage for uploading background-removed images."""
+    def __init__(self, supabase_url: Optional[str] = None, supabase_key: Optional[str] = None,
+                 backend: Optional[StorageBackend] = None, max_upload_workers: int = 4):
+        """Initialize cloud storage for uploading background-removed images.
+
+        Uploads go to ``backend`` if given (e.g. a LocalBackend), otherwise to the
+        Supabase project when configured. They run on a queue of
+        ``max_upload_workers`` threads so the event loop is never blocked.
+        """
         self.supabase_url = supabase_url
         self.supabase_key = supabase_key
-        self.client: Optional[Client] = None
+        self.client: Optional["Client"] = None
+        self.backend = backend
         
-        if SUPABASE_AVAILABLE and supabase_url and supabase_key:
-            try:
-                self.client = create_client(supabase_url, supabase_key)
-                print("✅ Supabase cloud storage initialized")
-            except Exception as e:
-                print(f"⚠️  Failed to initialize Supabase: {e}")
-                self.client = None
-        else:
-            print("⚠️  Supabase not configured - images will be stored locally only")
+        if backend is None:
+            if supabase_url and supabase_key:
+                try:
+                    # Optional: supabase for cloud storage
+                    from supabase import create_client
+                    self.client = create_client(supabase_url, supabase_key)
+                    self.backend = SupabaseBackend(self.client)
+                    emit(logger, logging.INFO, 'storage_ready', "Supabase cloud storage initialized")
+                except ImportError:
+                    emit(logger, logging.WARNING, 'storage_unavailable', "supabase is not installed - images will be stored locally only")
+                except Exception as e:
+                    emit(logger, logging.WARNING, 'storage_unavailable', "Failed to initialize Supabase: {error}", error=e)
+                    self.client = None
+            else:
+                emit(logger, logging.INFO, 'storage_local', "Supabase not configured - images will be stored locally only")
+        self.uploads: Optional[UploadQueue] = UploadQueue(self.backend, max_workers=max_upload_workers) if self.backend else None
     
-    async def upload_image(self, image_data: bytes, filename: str) -> Optional[str]:
-        """Upload image to cloud storage and return public URL."""
-        if not self.client:
+    def _blob_path(self, image_data: bytes, filename: Optional[str]) -> Tuple[str, str]:
+        extension = Path(filename).suffix.lstrip('.') if filename and Path(filename).suffix else 'png'
+        return blob_path(blob_hash(image_data), extension), f"image/{extension}"
+    
+    async def queue_image(self, image_data: bytes, filename: Optional[str] = None) -> Optional[str]:
+        """Queue an upload and return the public URL the image will have.
+
+        Images are stored under their content hash (``filename`` only supplies the
+        extension), so an image that already exists remotely is not uploaded again.
+        The upload completes in the background and may still fail; use ``upload_image``
+        before recording the URL as stored, and call ``flush`` before exiting.
+        """
+        if not self.uploads:
             return None
-            
         try:
-            # Upload to Supabase storage
-            bucket_name = "logo-images"
-            file_path = f"background-removed/{filename}"
-            
-            # Ensure bucket exists (this would need to be created manually in Supabase dashboard)
-            result = self.client.storage.from_(bucket_name).upload(
-                path=file_path,
-                file=image_data,
-                file_options={"content-type": "image/png"}
-            )
-            
-            # Get public URL
-            public_url = self.client.storage.from_(bucket_name).get_public_url(file_path)
-            return public_url
-            
+            path, content_type = self._blob_path(image_data, filename)
+            await self.uploads.submit(path, image_data, content_type)
+            return self.backend.public_url(path)
         except Exception as e:
-            print(f"⚠️  Failed to upload to cloud storage: {e}")
+            emit(logger, logging.WARNING, 'upload_error', "Failed to queue cloud upload: {error}", error=e)
+            return None
+    
+    async def upload_image(self, image_data: bytes, filename: Optional[str] = None) -> Optional[str]:
+        """Upload image to cloud storage and return public URL (None if the upload failed)."""
+        public_url = await self.queue_image(image_data, filename)
+        if public_url is None:
             return None
+        path, _ = self._blob_path(image_data, filename)
+        return public_url if await self.uploads.wait(path) else None
+    
+    async def flush(self):
+        """Wait for all queued uploads."""
+        if self.uploads:
+            await self.uploads.flush()
+    
+    async def close(self):
+        """Flush queued uploads and stop the upload workers."""
+        if self.uploads:
+            await self.uploads.close()
 
 class LogoCrawler:
     def __init__(self, api_key: Optional[str] = None, twitter_api_key: Optional[str] = None, 
                  use_azure: bool = False, supabase_url: Optional[str] = None, 
-                 supabase_key: Optional[str] = None):
+                 supabase_key: Optional[str] = None, detection_analyses: Optional[List[str]] = None,
+                 classifier_path: Optional[str] = None, rank_margin: float = 0.1,
+                 requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                 max_llm_concurrency: int = 16, llm_endpoints: Optional[List[LLMEndpoint]] = None,
+                 content_store_dir: Optional[str] = None, blob_store_dir: Optional[str] = None,
+                 storage_backend: Optional[StorageBackend] = None, clearbit_url: str = CLEARBIT_BASE_URL,
+                 google_favicon_url: str = GOOGLE_FAVICON_URL,
+                 early_stop: Optional[EarlyStopPolicy] = EarlyStopPolicy(), analysis_concurrency: int = 4,
+                 metrics: Optional[MetricsRegistry] = None, training_log: Optional[str] = None):
         """
         Initialize the LogoCrawler.
         
@@ -242,8 +488,44 @@ class LogoCrawler:
             use_azure: Set to True if using Azure OpenAI, False for regular OpenAI (default: False)
             supabase_url: Optional Supabase URL for cloud storage of background-removed images
             supabase_key: Optional Supabase key for cloud storage
+            detection_analyses: Names of the LogoDetectionStrategies analyses to run
+                                (default: all of LogoDetectionStrategies.ANALYSES)
+            classifier_path: Optional path to a trained LogoClassifier. When set, confident
+                             candidates are accepted or rejected locally without an LLM call.
+                             Train one with `python -m openlogo.classifier RESULTS_DIR`.
+            rank_margin: Results are ranked locally; the LLM ranker is only consulted when
+                         the top two local scores are closer than this. 0 never consults it.
+            requests_per_minute: Optional LLM request quota to stay under
+            tokens_per_minute: Optional LLM token quota to stay under
+            max_llm_concurrency: Upper bound for the adaptive number of in-flight LLM requests
+            llm_endpoints: Optional pool of LLMEndpoint (Azure deployments, OpenAI keys) with
+                           weights and per-endpoint quotas. Requests go to the least-loaded
+                           healthy endpoint and fail over to the others. Replaces the
+                           endpoint derived from api_key/use_azure.
+            content_store_dir: Optional directory keeping downloaded image bytes across runs.
+                               Images are always reused within a run; stored ones are
+                               revalidated with ETag/Last-Modified before reuse.
+            blob_store_dir: Content-addressed directory for background-removed images
+                            (default: "blobs" inside each output directory)
+            storage_backend: Optional upload target replacing Supabase (e.g. LocalBackend)
+            clearbit_url: Base URL of the Clearbit logo API
+            google_favicon_url: URL of the Google favicon service. Point both (and the
+                                llm_endpoints base URL) at ``openlogo.standins`` to run offline.
+            early_stop: Page images are analyzed header first, then by HTML-context score;
+                        once a result meets this policy no further images are analyzed
+                        and lower-priority analyses in flight are cancelled. None
+                        analyzes every image.
+            analysis_concurrency: Number of page images analyzed at the same time
+            metrics: Registry for the crawler's counters and latency histograms
+                     (tier outcomes, cache hits, downloads, LLM usage, stage latency);
+                     a new one when omitted. See ``openlogo.metrics``.
+            training_log: JSONL file receiving the detection scores and LLM answer of every
+                          candidate the LLM judges, non-logos included, to train the local
+                          classifier on. ``process_csv_batch``, ``process_queue`` and
+                          ``finish_batch`` write ``training.jsonl`` in their output
+                          directory when this is not set.
         """
-        if not api_key:
+        if not api_key and not llm_endpoints:
             raise ValueError(
                 "OpenAI API key is required. "
                 "Please provide your API key when initializing LogoCrawler. "
@@ -251,11 +533,31 @@ class LogoCrawler:
             )
         self.api_key = api_key
         self.use_azure = use_azure
+        self.detection_analyses = detection_analyses
         
         # Initialize image cache, detection strategies, and cloud storage
         self.image_cache = ImageCache()
+        self.content_store = ContentStore(content_store_dir)
         self.detection_strategies = LogoDetectionStrategies(twitter_api_key)
-        self.cloud_storage = CloudStorage(supabase_url, supabase_key)
+        self.cloud_storage = CloudStorage(supabase_url, supabase_key, backend=storage_backend)
+        self.blob_store_dir = blob_store_dir
+        self.clearbit_url = clearbit_url
+        self.google_favicon_url = google_favicon_url
+        self.classifier: Optional[LogoClassifier] = LogoClassifier.load(classifier_path) if classifier_path else None
+        self.training_log: Optional[TrainingLog] = TrainingLog(training_log) if training_log else None
+        self.local_ranker = LocalRanker(rank_margin)
+        self.early_stop = early_stop
+        self.analysis_concurrency = max(1, analysis_concurrency)
+        self.metrics = metrics if metrics is not None else MetricsRegistry()
+        if not llm_endpoints:
+            llm_endpoints = [LLMEndpoint.azure_deployment(api_key) if use_azure else LLMEndpoint.openai(api_key)]
+        self.llm = LLMClient(
+            EndpointPool(llm_endpoints),
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+            concurrency=AdaptiveConcurrency(initial=min(4, max_llm_concurrency), maximum=max_llm_concurrency),
+            metrics=self.metrics,
+        )
         
         # Minimum image dimensions
         self.min_width = 32
@@ -272,6 +574,14 @@ class LogoCrawler:
             'tag', 'price', 'discount', 'sale', 'new', 'hot', 'trending'
         ]
         
+    async def close(self):
+        """Flush queued uploads and stop the upload and detection thread pools.
+
+        Both pools start again on first use, so the crawler stays usable.
+        """
+        await self.cloud_storage.close()
+        self.detection_strategies.close()
+    
     def get_image_hash(self, image_data: bytes) -> str:
         """Generate a hash for an image to use as cache key."""
         return hashlib.md5(image_data).hexdigest()
@@ -305,7 +615,8 @@ class LogoCrawler:
 
     def remove_background(self, image: Image.Image) -> Image.Image:
         """Remove background from image using rembg."""
-        if not REMBG_AVAILABLE:
+        remove = load_rembg()
+        if remove is None:
             return image
         
         try:
@@ -320,7 +631,7 @@ class LogoCrawler:
             # Convert back to PIL image
             return Image.open(io.BytesIO(output))
         except Exception as e:
-            print(f"Background removal failed: {e}")
+            emit(logger, logging.WARNING, 'background_removal_error', "Background removal failed: {error}", error=e)
             return image
 
     def extract_confidence_score(self, content: str) -> float:
@@ -378,18 +689,9 @@ class LogoCrawler:
         
         return ' '.join(filtered_lines)
 
-    async def analyze_image_with_openai(self, image_base64: str, image_url: str, page_url: str, html_element: Optional[Tag] = None, page_html: Optional[str] = None) -> Optional[LogoResult]:
-        """Analyze an image using OpenAI API (regular or Azure) and additional detection strategies."""
-        if self.use_azure:
-            return await self._analyze_image_with_azure(image_base64, image_url, page_url, html_element, page_html)
-        else:
-            return await self._analyze_image_with_regular_openai(image_base64, image_url, page_url, html_element, page_html)
-
-    async def _analyze_image_with_azure(self, image_base64: str, image_url: str, page_url: str, html_element: Optional[Tag] = None, page_html: Optional[str] = None) -> Optional[LogoResult]:
-        """Analyze an image using Azure OpenAI gpt-4o-mini and additional detection strategies."""
-        url = "https://scailetech.openai.azure.com/openai/deployments/gpt-4o-mini/chat/completions?api-version=2023-03-15-preview"
-        
-        messages = [
+    def vision_messages(self, image_base64: str) -> List[Dict]:
+        """Chat messages asking the vision model whether an image is a logo."""
+        return [
             {"role": "system", "content": "You are a logo detection assistant. Analyze the image and determine if it's a logo. If it is, provide a confidence score (0-1) and description in this format: 'Confidence Score: X.XX\nDescription: ...'. If not, return 'null'."},
             {
                 "role": "user",
@@ -408,281 +710,383 @@ class LogoCrawler:
             }
         ]
 
-        data = {
-            "messages": messages,
-            "max_tokens": 300
-        }
+    @staticmethod
+    def vision_answered(result: Dict) -> bool:
+        """Whether a chat completion holds an answer (a logo or "null"), not a malformed response."""
+        choices = result.get('choices') or [{}]
+        return bool((choices[0].get('message') or {}).get('content'))
 
-        headers = {
-            'Content-Type': 'application/json',
-            'api-key': self.api_key
-        }
+    def record_training(self, image_url: str, page_url: str, detection_scores: Dict[str, Dict[str, float]],
+                        logo: Optional[LogoResult]):
+        """Add the LLM's answer for a candidate to ``training_log`` (None: not a logo)."""
+        if self.training_log is not None:
+            self.training_log.record(image_url, page_url, detection_scores, logo=logo is not None,
+                                     confidence=logo.confidence if logo is not None else 0.0)
 
-        try:
-            print(f"\nAnalyzing image: {image_url}")
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=data, headers=headers) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        print(f"API Error ({response.status}): {error_text}")
-                        return None
-                    
-                    try:
-                        result = await response.json()
-                        print(f"API Response: {json.dumps(result, indent=2)}")
-                    except json.JSONDecodeError as e:
-                        print(f"Error decoding JSON response: {e}")
-                        response_text = await response.text()
-                        print(f"Raw response: {response_text}")
-                        return None
-                    
-                    if not result.get('choices'):
-                        print(f"Warning: No 'choices' in API response")
-                        return None
-                    
-                    if not result['choices']:
-                        print(f"Warning: Empty 'choices' array in API response")
-                        return None
-                    
-                    if not result['choices'][0].get('message'):
-                        print(f"Warning: No 'message' in first choice")
-                        return None
-                    
-                    if not result['choices'][0]['message'].get('content'):
-                        print(f"Warning: No 'content' in message")
-                        return None
-                    
-                    content = result['choices'][0]['message']['content']
-                    print(f"Content from API: {content}")
-                    
-                    if content.lower() == "null":
-                        print("Content is 'null', skipping image")
-                        return None
-                    
-                    # Extract confidence score using the new method
-                    confidence = self.extract_confidence_score(content)
-                    print(f"Extracted confidence score: {confidence}")
-                    
-                    # Extract description using the new method
-                    description = self.extract_description(content)
-                    print(f"Extracted description: {description}")
-                    
-                    # Get additional detection scores
-                    detection_scores = {}
-                    if html_element and page_html:
-                        image_data = base64.b64decode(image_base64)
-                        domain = urlparse(page_url).netloc
-                        
-                        detection_scores['html_context'] = await self.detection_strategies.analyze_html_context(html_element, page_url)
-                        detection_scores['structural_position'] = await self.detection_strategies.analyze_structural_position(html_element, [])
-                        detection_scores['technical'] = await self.detection_strategies.analyze_image_technical(image_url, image_data)
-                        detection_scores['visual'] = await self.detection_strategies.analyze_visual_characteristics(image_data)
-                        detection_scores['url_semantics'] = await self.detection_strategies.analyze_url_semantics(image_url)
-                        detection_scores['metadata'] = await self.detection_strategies.analyze_metadata(image_data)
-                        detection_scores['social_media'] = await self.detection_strategies.analyze_social_media(domain)
-                        detection_scores['schema_markup'] = await self.detection_strategies.analyze_schema_markup(page_html)
-                        
-                        # Calculate rank score
-                        rank_score = await self.detection_strategies.get_final_score(detection_scores)
-                    else:
-                        rank_score = confidence
-                    
-                    return LogoResult(
-                        url=image_url,
-                        confidence=confidence,
-                        description=description,
-                        page_url=page_url,
-                        image_hash=self.get_image_hash(image_base64.encode()),
-                        timestamp=datetime.now(),
-                        rank_score=rank_score,
-                        detection_scores=detection_scores
-                    )
-            
-        except aiohttp.ClientError as e:
-            print(f"HTTP Error analyzing image {image_url}: {e}")
-            return None
-        except Exception as e:
-            print(f"Error analyzing image {image_url}: {e}")
-            print(f"Error type: {type(e)}")
-            import traceback
-            traceback.print_exc()
+    def open_training_log(self, output_path: Path) -> Optional[TrainingLog]:
+        """Record training samples in ``output_path`` unless a training log is set; returns the log opened here."""
+        if self.training_log is not None:
             return None
+        self.training_log = TrainingLog(output_path / TRAINING_FILE)
+        return self.training_log
+
+    def close_training_log(self, opened: Optional[TrainingLog]):
+        if opened is not None:
+            if self.training_log is opened:
+                self.training_log = None
+            opened.close()
 
-    async def _analyze_image_with_regular_openai(self, image_base64: str, image_url: str, page_url: str, html_element: Optional[Tag] = None, page_html: Optional[str] = None) -> Optional[LogoResult]:
-        """Analyze an image using regular OpenAI API and additional detection strategies."""
-        url = "https://api.openai.com/v1/chat/completions"
+    def parse_vision_response(self, result: Dict, image_url: str, page_url: str, image_hash: str) -> Optional[LogoResult]:
+        """Turn a chat completion for ``vision_messages`` into a LogoResult (None if not a logo)."""
+        if not result.get('choices'):
+            emit(logger, logging.WARNING, 'llm_malformed_response', "No 'choices' in API response", image_url=image_url)
+            return None
         
-        messages = [
-            {"role": "system", "content": "You are a logo detection assistant. Analyze the image and determine if it's a logo. If it is, provide a confidence score (0-1) and description in this format: 'Confidence Score: X.XX\nDescription: ...'. If not, return 'null'."},
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "text",
-                        "text": "Is this image a logo? If yes, provide a confidence score (0-1) and a brief description of what makes it a logo. Format your response as 'Confidence Score: X.XX\nDescription: ...'. If no, return null."
-                    },
-                    {
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:image/png;base64,{image_base64}"
-                        }
-                    }
-                ]
-            }
-        ]
+        if not result['choices'][0].get('message'):
+            emit(logger, logging.WARNING, 'llm_malformed_response', "No 'message' in first choice", image_url=image_url)
+            return None
+        
+        if not result['choices'][0]['message'].get('content'):
+            emit(logger, logging.WARNING, 'llm_malformed_response', "No 'content' in message", image_url=image_url)
+            return None
+        
+        content = result['choices'][0]['message']['content']
+        if content.lower() == "null":
+            emit(logger, logging.DEBUG, 'llm_null_answer', "Content is 'null', skipping {image_url}", image_url=image_url)
+            return None
+        
+        # Extract confidence score using the new method
+        confidence = self.extract_confidence_score(content)
+        
+        # Extract description using the new method
+        description = self.extract_description(content)
+        emit(logger, logging.DEBUG, 'llm_answer', "Vision answer for {image_url}: confidence {confidence}, {description!r}",
+             image_url=image_url, confidence=confidence, description=description, content=content)
+        
+        return LogoResult(
+            url=image_url,
+            confidence=confidence,
+            description=description,
+            page_url=page_url,
+            image_hash=image_hash,
+            timestamp=datetime.now(),
+            rank_score=confidence,
+        )
 
-        data = {
-            "model": "gpt-4o-mini",
-            "messages": messages,
-            "max_tokens": 300
-        }
+    async def analyze_image_with_openai(self, image_base64: str, image_url: str, page_url: str, html_element: Optional[Tag] = None, page_html: Optional[str] = None, detection_index: Optional[DetectionIndex] = None,
+                                        detection_scores: Optional[Union[Dict[str, Dict[str, float]], asyncio.Future]] = None) -> Optional[LogoResult]:
+        """Analyze an image using gpt-4o-mini (regular or Azure OpenAI) and additional detection strategies.
 
-        headers = {
-            'Content-Type': 'application/json',
-            'Authorization': f'Bearer {self.api_key}'
-        }
+        ``detection_scores`` (or a future of them, computed alongside the vision
+        call) are attached to the result; without them, the analyses run here when
+        ``html_element`` and ``page_html`` are given and also set the rank score.
+        Once the LLM has answered, the scores and its answer are recorded in
+        ``training_log``, whether or not the image is a logo.
+        """
+        messages = self.vision_messages(image_base64)
 
         try:
-            print(f"\nAnalyzing image: {image_url}")
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=data, headers=headers) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        print(f"API Error ({response.status}): {error_text}")
-                        return None
-                    
-                    try:
-                        result = await response.json()
-                        print(f"API Response: {json.dumps(result, indent=2)}")
-                    except json.JSONDecodeError as e:
-                        print(f"Error decoding JSON response: {e}")
-                        response_text = await response.text()
-                        print(f"Raw response: {response_text}")
-                        return None
-                    
-                    if not result.get('choices'):
-                        print(f"Warning: No 'choices' in API response")
-                        return None
-                    
-                    if not result['choices']:
-                        print(f"Warning: Empty 'choices' array in API response")
-                        return None
-                    
-                    if not result['choices'][0].get('message'):
-                        print(f"Warning: No 'message' in first choice")
-                        return None
-                    
-                    if not result['choices'][0]['message'].get('content'):
-                        print(f"Warning: No 'content' in message")
-                        return None
-                    
-                    content = result['choices'][0]['message']['content']
-                    print(f"Content from API: {content}")
-                    
-                    if content.lower() == "null":
-                        print("Content is 'null', skipping image")
-                        return None
-                    
-                    # Extract confidence score using the new method
-                    confidence = self.extract_confidence_score(content)
-                    print(f"Extracted confidence score: {confidence}")
-                    
-                    # Extract description using the new method
-                    description = self.extract_description(content)
-                    print(f"Extracted description: {description}")
-                    
-                    # Get additional detection scores
-                    detection_scores = {}
-                    if html_element and page_html:
-                        image_data = base64.b64decode(image_base64)
-                        domain = urlparse(page_url).netloc
-                        
-                        detection_scores['html_context'] = await self.detection_strategies.analyze_html_context(html_element, page_url)
-                        detection_scores['structural_position'] = await self.detection_strategies.analyze_structural_position(html_element, [])
-                        detection_scores['technical'] = await self.detection_strategies.analyze_image_technical(image_url, image_data)
-                        detection_scores['visual'] = await self.detection_strategies.analyze_visual_characteristics(image_data)
-                        detection_scores['url_semantics'] = await self.detection_strategies.analyze_url_semantics(image_url)
-                        detection_scores['metadata'] = await self.detection_strategies.analyze_metadata(image_data)
-                        detection_scores['social_media'] = await self.detection_strategies.analyze_social_media(domain)
-                        detection_scores['schema_markup'] = await self.detection_strategies.analyze_schema_markup(page_html)
-                        
-                        # Calculate rank score
-                        rank_score = await self.detection_strategies.get_final_score(detection_scores)
-                    else:
-                        rank_score = confidence
-                    
-                    return LogoResult(
-                        url=image_url,
-                        confidence=confidence,
-                        description=description,
-                        page_url=page_url,
-                        image_hash=self.get_image_hash(image_base64.encode()),
-                        timestamp=datetime.now(),
-                        rank_score=rank_score,
-                        detection_scores=detection_scores
-                    )
+            emit(logger, logging.DEBUG, 'llm_request', "Analyzing image: {image_url}", image_url=image_url)
+            try:
+                result = await self.llm.chat(messages, max_tokens=300)
+                emit(logger, logging.DEBUG, 'llm_response', "API Response: {response}", image_url=image_url, response=result)
+            except LLMError as e:
+                emit(logger, logging.WARNING, 'llm_error', "{error}", image_url=image_url, error=e, status=e.status)
+                return None
+            
+            logo = self.parse_vision_response(result, image_url, page_url, self.get_image_hash(image_base64.encode()))
+            
+            # Get additional detection scores
+            rank_by_scores = False
+            if isinstance(detection_scores, asyncio.Future):
+                detection_scores = await detection_scores
+            elif detection_scores is None and html_element is not None and page_html:
+                detection_scores = await self.detection_strategies.run_analyses(
+                    image_url=image_url,
+                    page_url=page_url,
+                    image_data=base64.b64decode(image_base64),
+                    element=html_element,
+                    page_html=page_html,
+                    index=detection_index,
+                    analyses=self.detection_analyses,
+                )
+                rank_by_scores = True
+            if detection_scores and self.vision_answered(result):
+                self.record_training(image_url, page_url, detection_scores, logo)
+            if logo is None:
+                return None
+            
+            if detection_scores:
+                logo.detection_scores = detection_scores
+                if rank_by_scores:
+                    # Calculate rank score
+                    logo.rank_score = await self.detection_strategies.get_final_score(detection_scores)
+            
+            return logo
             
-        except aiohttp.ClientError as e:
-            print(f"HTTP Error analyzing image {image_url}: {e}")
-            return None
         except Exception as e:
-            print(f"Error analyzing image {image_url}: {e}")
-            print(f"Error type: {type(e)}")
-            import traceback
-            traceback.print_exc()
+            emit(logger, logging.ERROR, 'analysis_error', "Error analyzing image {image_url}: {error}", exc_info=True,
+                 image_url=image_url, error=e)
             return None
         
-    async def analyze_image(self, image_url: str, page_url: str) -> Optional[LogoResult]:
-        """Analyze an image using gpt-4o-mini to determine if it's a logo."""
+    async def prepare_image(self, image_url: str) -> Optional[PreparedImage]:
+        """Download an image and convert it to the PNG sent for analysis.
+
+        Returns None if the image cannot be downloaded or decoded, or is too small.
+        When the image is already in the cache, only ``cached_result`` is set.
+        """
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(image_url, headers=BROWSER_HEADERS) as response:
-                    if response.status != 200:
-                        return None
-                    
-                    image_data = await response.read()
-                    image_hash = self.get_image_hash(image_data)
-                    
-                    # Check cache first
-                    cached_result = self.image_cache.get(image_hash)
-                    if cached_result:
-                        return cached_result
-                    
-                    # Handle SVG files
-                    if image_url.lower().endswith('.svg'):
-                        try:
-                            # Convert SVG to PNG using cairosvg
-                            png_data = cairosvg.svg2png(bytestring=image_data)
-                            image = Image.open(io.BytesIO(png_data))
-                        except Exception as e:
-                            print(f"Error converting SVG {image_url}: {e}")
-                            return None
-                    else:
-                        image = Image.open(io.BytesIO(image_data))
-                    
-                    # Skip if image is too small
-                    if not self.is_valid_image_size(image):
-                        return None
-                    
-                    # Remove background by default
-                    image = self.remove_background(image)
-                    
-                    buffered = io.BytesIO()
-                    image.save(buffered, format="PNG")
-                    image_base64 = base64.b64encode(buffered.getvalue()).decode('utf-8')
-                    
-                    # Analyze with OpenAI (Azure or regular)
-                    result = await self.analyze_image_with_openai(image_base64, image_url, page_url)
-                    
-                    if result:
-                        # Cache the result
-                        self.image_cache.set(image_hash, result)
-                    
-                    return result
+            with span('download') as download_span, self.metrics.timer('openlogo_stage_seconds', stage='download'):
+                async with aiohttp.ClientSession() as session:
+                    image_data = await self.content_store.fetch(session, image_url, headers=BROWSER_HEADERS,
+                                                                timeout=aiohttp.ClientTimeout(total=IMAGE_TIMEOUT))
+                download_span.set(bytes=len(image_data) if image_data is not None else 0)
+            if image_data is None:
+                self.metrics.inc('openlogo_images_rejected_total', reason='download')
+                return None
+            self.metrics.inc('openlogo_downloaded_bytes_total', len(image_data), kind='image')
+            
+            image_hash = self.get_image_hash(image_data)
+            
+            # Check cache first
+            cached_result = self.image_cache.get(image_hash)
+            self.metrics.inc('openlogo_image_cache_total', result='hit' if cached_result else 'miss')
+            if cached_result:
+                return PreparedImage(image_url=image_url, image_hash=image_hash, cached_result=cached_result)
+            
+            # Handle SVG files
+            if image_url.lower().endswith('.svg'):
+                try:
+                    # Convert SVG to PNG using cairosvg (needs the Cairo system library)
+                    import cairosvg
+                    with span('rasterize_svg'):
+                        png_data = cairosvg.svg2png(bytestring=image_data)
+                    image = Image.open(io.BytesIO(png_data))
+                except Exception as e:
+                    emit(logger, logging.WARNING, 'svg_error', "Error converting SVG {image_url}: {error}",
+                         image_url=image_url, error=e)
+                    self.metrics.inc('openlogo_images_rejected_total', reason='decode')
+                    return None
+            else:
+                image = Image.open(io.BytesIO(image_data))
+            
+            # Skip if image is too small
+            if not self.is_valid_image_size(image):
+                self.metrics.inc('openlogo_images_rejected_total', reason='size')
+                return None
+            
+            # Remove background by default
+            with span('remove_background'), self.metrics.timer('openlogo_stage_seconds', stage='remove_background'):
+                image = self.remove_background(image)
+            
+            buffered = io.BytesIO()
+            image.save(buffered, format="PNG")
+            return PreparedImage(image_url=image_url, image_hash=image_hash, png_data=buffered.getvalue())
                         
         except Exception as e:
-            print(f"Error analyzing image {image_url}: {e}")
+            emit(logger, logging.WARNING, 'prepare_error', "Error preparing image {image_url}: {error}",
+                 image_url=image_url, error=e)
+            self.metrics.inc('openlogo_images_rejected_total', reason='error')
             return None
+
+    async def analyze_image(self, image_url: str, page_url: str, spool: Optional[SiteSpool] = None,
+                            element: Optional[Tag] = None, page_html: Optional[str] = None,
+                            index: Optional[DetectionIndex] = None) -> Optional[LogoResult]:
+        """Analyze an image using gpt-4o-mini to determine if it's a logo.
+
+        The detection analyses run alongside the vision call; ``element`` (the tag
+        the image was found in), ``page_html`` and ``index`` give them their inputs.
+        With ``spool`` the vision request is written to the batch spool instead and
+        None is returned unless the image was already cached.
+        """
+        with span('candidate', image_url=image_url) as candidate_span:
+            prepared = await self.prepare_image(image_url)
+            if prepared is None:
+                candidate_span.set(outcome='skipped')
+                return None
+            if prepared.cached_result:
+                candidate_span.set(outcome='cached')
+                return prepared.cached_result
+            detection_scores = asyncio.ensure_future(self.detection_strategies.run_analyses(
+                image_url=image_url,
+                page_url=page_url,
+                image_data=prepared.png_data,
+                element=element,
+                page_html=page_html,
+                index=index,
+                analyses=self.detection_analyses,
+            ))
+            try:
+                if spool is not None:
+                    spool.add_request(page_url, image_url, prepared.image_hash,
+                                      self.get_image_hash(prepared.image_base64.encode()),
+                                      self.vision_messages(prepared.image_base64), await detection_scores)
+                    candidate_span.set(outcome='spooled')
+                    return None
+
+                # Analyze with OpenAI (Azure or regular)
+                result = await self.analyze_image_with_openai(prepared.image_base64, image_url, page_url,
+                                                              detection_scores=detection_scores)
+            finally:
+                detection_scores.cancel()
+
+            if result:
+                # Cache the result
+                self.image_cache.set(prepared.image_hash, result)
+            candidate_span.set(outcome='logo' if result else 'rejected')
+
+            return result
+
+    async def analyze_page_images(self, page_url: str, page_html: str, image_elements: Dict[str, Optional[Tag]],
+                                  spool: Optional[SiteSpool] = None,
+                                  results: Optional[List[LogoResult]] = None,
+                                  header_images: Optional[Set[str]] = None) -> List[LogoResult]:
+        """Analyze a page's images, letting the local classifier settle confident ones.
+
+        Detection scores are computed for every image, the classifier scores the
+        whole page in one batch, and only candidates it is unsure about are sent
+        to the LLM.
+
+        Args:
+            page_url: URL of the page the images were found on
+            page_html: HTML of that page
+            image_elements: Image URL -> the element it was found in (None if unknown)
+            spool: Spool the LLM requests for a later batch instead of sending them
+            results: List to append results to as they are settled, so they are
+                     kept if the analysis is cancelled
+            header_images: URLs of header/nav images; they are settled first and
+                           stop the page early when decisive (see ``early_stop``)
+        """
+        header_images = header_images or set()
+        index = DetectionIndex(all_pages_elements=[e for e in image_elements.values() if e is not None])
+        results = results if results is not None else []
+        pending: List[PreparedImage] = []
+        # One feature row per pending candidate; dicts are only rebuilt for results
+        features = FeatureMatrix.allocate(len(image_elements))
+
+        for image_url, element in image_elements.items():
+            with span('candidate', image_url=image_url):
+                prepared = await self.prepare_image(image_url)
+                if prepared is None:
+                    continue
+                if prepared.cached_result:
+                    results.append(prepared.cached_result)
+                    continue
+                detection_scores = await self.detection_strategies.run_analyses(
+                    image_url=image_url,
+                    page_url=page_url,
+                    image_data=prepared.png_data,
+                    element=element,
+                    page_html=page_html,
+                    index=index,
+                    analyses=self.detection_analyses,
+                )
+            features.set_row(len(pending), detection_scores)
+            pending.append(prepared)
+
+        features = features.take(range(len(pending)))
+        probabilities = self.classifier.predict_proba(features)
+        heuristic_scores = features.weighted_scores()
+        # Settle candidates header first, then best-first by the vectorized heuristic score
+        order = sorted(features.rank(), key=lambda row: pending[row].image_url not in header_images)
+        for row in order:
+            prepared, probability = pending[row], probabilities[row]
+            decision = self.classifier.decide(probability)
+            if decision is False:
+                continue
+            if decision:
+                result = LogoResult(
+                    url=prepared.image_url,
+                    confidence=probability,
+                    description="Logo identified by the local classifier",
+                    page_url=page_url,
+                    image_hash=self.get_image_hash(prepared.image_base64.encode()),
+                    timestamp=datetime.now(),
+                    rank_score=float(heuristic_scores[row]),
+                )
+            elif spool is not None:
+                spool.add_request(page_url, prepared.image_url, prepared.image_hash,
+                                  self.get_image_hash(prepared.image_base64.encode()),
+                                  self.vision_messages(prepared.image_base64),
+                                  features.to_detection_scores(row))
+                continue
+            else:
+                result = await self.analyze_image_with_openai(prepared.image_base64, prepared.image_url, page_url,
+                                                              detection_scores=features.to_detection_scores(row))
+                if not result:
+                    continue
+            result.detection_scores = features.to_detection_scores(row)
+            self.image_cache.set(prepared.image_hash, result)
+            result.is_header = result.url in header_images
+            results.append(result)
+            if self.early_stop is not None and self.early_stop.is_decisive(result):
+                emit(logger, logging.INFO, 'early_stop', "Decisive logo {logo_url}, skipping the remaining candidates",
+                     url=page_url, logo_url=result.url)
+                break
+
+        return results
+
+    async def prioritize_images(self, page_url: str, image_elements: Dict[str, Optional[Tag]],
+                                header_images: Set[str]) -> List[str]:
+        """Image URLs header/nav first, then by HTML-context score (no download needed); DOM order breaks ties."""
+        scores: Dict[str, float] = {}
+        for image_url, element in image_elements.items():
+            context = await self.detection_strategies.analyze_html_context(element, page_url) if element is not None else {}
+            scores[image_url] = sum(float(score) for score in context.values())
+        return sorted(image_elements, key=lambda image_url: (image_url not in header_images, -scores[image_url]))
+
+    async def analyze_in_priority_order(self, page_url: str, image_urls: List[str], header_images: Set[str],
+                                        results: List[LogoResult], spool: Optional[SiteSpool] = None,
+                                        image_elements: Optional[Dict[str, Optional[Tag]]] = None,
+                                        page_html: Optional[str] = None) -> bool:
+        """Analyze ``image_urls`` (highest priority first), ``analysis_concurrency`` at a time.
+
+        Results are appended to ``results`` as they complete. Once one meets
+        ``early_stop``, nothing further is started and analyses of lower priority
+        still in flight are cancelled; higher-priority ones may still finish.
+        ``image_elements`` (image URL -> element) and ``page_html`` feed the
+        detection analyses.
+
+        Returns:
+            True if the page was settled early
+        """
+        image_elements = image_elements or {}
+        index = DetectionIndex(all_pages_elements=[e for e in image_elements.values() if e is not None])
+        in_flight: Dict[asyncio.Future, int] = {}
+        next_position = 0
+        decisive_position: Optional[int] = None
+        try:
+            while in_flight or (decisive_position is None and next_position < len(image_urls)):
+                while (decisive_position is None and next_position < len(image_urls)
+                       and len(in_flight) < self.analysis_concurrency):
+                    image_url = image_urls[next_position]
+                    task = asyncio.ensure_future(self.analyze_image(image_url, page_url, spool,
+                                                                    element=image_elements.get(image_url),
+                                                                    page_html=page_html, index=index))
+                    in_flight[task] = next_position
+                    next_position += 1
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    position = in_flight.pop(task)
+                    result = task.result()
+                    if not result:
+                        continue
+                    result.is_header = result.url in header_images
+                    results.append(result)
+                    if self.early_stop is None or not self.early_stop.is_decisive(result):
+                        continue
+                    if decisive_position is None or position < decisive_position:
+                        decisive_position = position
+                        emit(logger, logging.INFO, 'early_stop', "Decisive logo {logo_url}, skipping the remaining candidates",
+                             url=page_url, logo_url=result.url)
+                    for other, other_position in list(in_flight.items()):
+                        if other_position > decisive_position:
+                            other.cancel()
+                            del in_flight[other]
+        finally:
+            for task in in_flight:
+                task.cancel()
+        return decisive_position is not None
     
     def extract_background_images(self, soup: BeautifulSoup) -> List[str]:
         """Extract background images from CSS."""
@@ -726,20 +1130,23 @@ class LogoCrawler:
                         # Get background images
                         background_images = self.extract_background_images(soup)
                         
-                        # Combine all image URLs
+                        # Combine all image URLs, remembering the element of img tags
                         all_image_urls = []
+                        image_elements: Dict[str, Tag] = {}
                         
                         # Add img tag sources
                         for img in images:
                             img_url = img.get('src')
                             if img_url:
                                 all_image_urls.append(urljoin(url, img_url))
+                                image_elements.setdefault(all_image_urls[-1], img)
                         
                         # Add background images
                         for bg_url in background_images:
                             all_image_urls.append(urljoin(url, bg_url))
                         
                         # Analyze each image
+                        index = DetectionIndex(all_pages_elements=list(image_elements.values()))
                         for img_url in all_image_urls:
                             if img_url in processed_images:
                                 continue
@@ -751,7 +1158,8 @@ class LogoCrawler:
                                 continue
                             
                             # Analyze image
-                            result = await self.analyze_image(img_url, url)
+                            result = await self.analyze_image(img_url, url, element=image_elements.get(img_url),
+                                                              page_html=content, index=index)
                             if result:
                                 logo_results.append(result)
                         
@@ -772,10 +1180,11 @@ class LogoCrawler:
                                     await process_page(absolute_url)
                 
             except Exception as e:
-                print(f"Error processing page {url}: {e}")
+                emit(logger, logging.WARNING, 'page_error', "Error processing page {url}: {error}", url=url, error=e)
         
         # Start crawling from the initial URL
         processed_urls.add(start_url)
+        from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
@@ -792,9 +1201,6 @@ class LogoCrawler:
         # Save results to file if output_file is specified
         if output_file:
             try:
-                print(f"\nPreparing to save results...")
-                print(f"Output file path: {output_file}")
-                
                 # Convert results to dict format
                 results_dict = []
                 for result in logo_results:
@@ -810,35 +1216,25 @@ class LogoCrawler:
                     }
                     results_dict.append(result_dict)
                 
-                print(f"Converted {len(results_dict)} results to JSON format")
-                
                 # Create output directory if needed
                 output_path = Path(output_file)
                 if output_path.parent != Path('.'):
-                    print(f"Creating directory: {output_path.parent}")
                     output_path.parent.mkdir(parents=True, exist_ok=True)
                 
                 # Save to file
-                print(f"Writing results to file: {output_path}")
                 json_data = json.dumps(results_dict, indent=2)
-                print(f"JSON data length: {len(json_data)} bytes")
                 
                 with open(output_path, 'w') as f:
                     f.write(json_data)
                     f.flush()
                     os.fsync(f.fileno())  # Ensure data is written to disk
                 
-                # Verify file was written
-                if output_path.exists():
-                    print(f"File exists after writing: {output_path}")
-                    print(f"File size: {output_path.stat().st_size} bytes")
-                else:
-                    print(f"Warning: File does not exist after writing: {output_path}")
+                emit(logger, logging.DEBUG, 'results_saved', "Wrote {count} results ({bytes} bytes) to {path}",
+                     count=len(results_dict), bytes=len(json_data), path=output_path)
                 
             except Exception as e:
-                print(f"Error saving results to file: {e}")
-                import traceback
-                traceback.print_exc()
+                emit(logger, logging.ERROR, 'results_save_error', "Error saving results to file: {error}", exc_info=True,
+                     path=output_file, error=e)
         
         return logo_results 
 
@@ -884,8 +1280,6 @@ class LogoCrawler:
         if not logos:
             return []
 
-        url = "https://scailetech.openai.azure.com/openai/deployments/gpt-4o-mini/chat/completions?api-version=2023-03-15-preview"
-        
         # Prepare the prompt with all logo information
         logo_descriptions = []
         for i, logo in enumerate(logos, 1):
@@ -903,418 +1297,803 @@ class LogoCrawler:
             }
         ]
 
-        data = {
-            "messages": messages,
-            "max_tokens": 500
-        }
-
-        headers = {
-            'Content-Type': 'application/json',
-            'api-key': self.api_key
-        }
-
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=data, headers=headers) as response:
-                    if response.status != 200:
-                        print(f"Error ranking logos: {await response.text()}")
-                        return logos
-
-                    result = await response.json()
-                    content = result['choices'][0]['message']['content']
-                    
-                    # Extract ranking scores using regex
-                    for i, logo in enumerate(logos, 1):
-                        pattern = rf"Logo {i}.*?score:?\s*(\d*\.?\d+)"
-                        match = re.search(pattern, content, re.IGNORECASE | re.DOTALL)
-                        if match:
-                            try:
-                                logo.rank_score = float(match.group(1))
-                            except ValueError:
-                                logo.rank_score = 0.0
-                        
-                    # Sort logos by rank_score in descending order
-                    return sorted(logos, key=lambda x: x.rank_score, reverse=True)
+            try:
+                result = await self.llm.chat(messages, max_tokens=500)
+            except LLMError as e:
+                emit(logger, logging.WARNING, 'ranking_error', "Error ranking logos: {error}", error=e)
+                return logos
+
+            content = result['choices'][0]['message']['content']
+            
+            # Extract ranking scores using regex
+            for i, logo in enumerate(logos, 1):
+                pattern = rf"Logo {i}.*?score:?\s*(\d*\.?\d+)"
+                match = re.search(pattern, content, re.IGNORECASE | re.DOTALL)
+                if match:
+                    try:
+                        logo.rank_score = float(match.group(1))
+                    except ValueError:
+                        logo.rank_score = 0.0
+                
+            # Sort logos by rank_score in descending order
+            return sorted(logos, key=lambda x: x.rank_score, reverse=True)
 
         except Exception as e:
-            print(f"Error during logo ranking: {e}")
+            emit(logger, logging.WARNING, 'ranking_error', "Error during logo ranking: {error}", error=e)
             return logos
 
-    async def crawl_website(self, url: str, skip_clearbit: bool = False, skip_google_favicon: bool = False) -> List[LogoResult]:
+    async def fetch_homepage(self, session: aiohttp.ClientSession, url: str,
+                             timeout: Optional[float] = PAGE_TIMEOUT) -> Optional[Tuple[str, str]]:
+        """Fetch the HTML of ``url``, following a meta refresh stub; (html, final URL) or None."""
+        client_timeout = aiohttp.ClientTimeout(total=timeout)
+        async with session.get(url, headers=BROWSER_HEADERS, timeout=client_timeout) as response:
+            if response.status != 200:
+                return None
+            html = await response.text()
+
+        # Check for meta refresh redirect (not followed by aiohttp)
+        # This handles sites like helpify.net that use <meta http-equiv="refresh">
+        if len(html) < 500:  # Only check short pages that might be redirect stubs
+            meta_refresh_url = extract_meta_refresh_url(html, url)
+            if meta_refresh_url:
+                emit(logger, logging.DEBUG, 'meta_refresh', "Found meta refresh redirect to: {target}", url=url,
+                     target=meta_refresh_url)
+                async with session.get(meta_refresh_url, headers=BROWSER_HEADERS, timeout=client_timeout) as redirect_response:
+                    if redirect_response.status == 200:
+                        html = await redirect_response.text()
+                        url = str(redirect_response.url)
+                        emit(logger, logging.DEBUG, 'meta_refresh_followed', "Followed meta refresh to: {url}", url=url)
+        return html, url
+
+    async def crawl_website(self, url: str, skip_clearbit: bool = False, skip_google_favicon: bool = False,
+                            skip_declared_icons: bool = False, spool: Optional[SiteSpool] = None,
+                            deadline: Optional[float] = None,
+                            profiler: Optional[DomainProfiler] = None) -> List[LogoResult]:
         """Crawl a website and find logos.
         
         Args:
             url: Website URL to crawl
             skip_clearbit: If True, skip Clearbit API
             skip_google_favicon: If True, skip Google Favicon fallback
+            skip_declared_icons: If True, skip the icons declared in the homepage HTML
+            spool: Write the vision requests to this batch spool instead of sending them.
+                   Only results settled without the LLM are returned, unranked if
+                   requests were spooled; ``finish_batch`` completes the website.
+            deadline: Latency budget in seconds for the whole call. Each tier gets a
+                      share of it (see ``openlogo.deadline.STAGE_SHARES``); when it runs
+                      out, unfinished image analyses are cancelled and the results
+                      found so far are returned, ranked locally and marked ``partial``.
+            profiler: Profile the call; the profile is kept with the stage timings if
+                      the website is slower than the profiler's threshold.
+
+        Traced as a ``domain`` span with a child span per tier (see ``openlogo.tracing``).
         """
+        with span('domain', url=url) as domain_span, self.metrics.timer('openlogo_stage_seconds', stage='domain'), \
+                (profiler.profile(url, domain_span) if profiler is not None else nullcontext()):
+            results = await self._crawl_website(url, skip_clearbit, skip_google_favicon, skip_declared_icons,
+                                                spool, deadline)
+            domain_span.set(logos=len(results), partial=any(result.partial for result in results))
+            return results
+
+    def count_tier(self, tier: str, hit: bool, timed_out: bool = False):
+        outcome = 'timeout' if timed_out else 'hit' if hit else 'miss'
+        self.metrics.inc('openlogo_tier_results_total', tier=tier, outcome=outcome)
+
+    async def _crawl_website(self, url: str, skip_clearbit: bool, skip_google_favicon: bool,
+                             skip_declared_icons: bool, spool: Optional[SiteSpool],
+                             deadline: Optional[float]) -> List[LogoResult]:
+        budget = Deadline(deadline, metrics=self.metrics)
+        
         # Extract domain for logo lookup
         domain = urlparse(url).netloc.replace("www.", "")
         
         # Try Clearbit first (free, fast, reliable for established companies)
         if not skip_clearbit:
-            clearbit_result = await try_clearbit_logo(domain, url)
+            clearbit_result, timed_out = await budget.run('clearbit', try_clearbit_logo(domain, url, base_url=self.clearbit_url))
+            self.count_tier('clearbit', bool(clearbit_result), timed_out)
             if clearbit_result:
-                print(f"🚀 Using Clearbit logo for {domain} (skipping crawl)")
+                emit(logger, logging.INFO, 'tier_resolved', "Using Clearbit logo for {domain} (skipping crawl)",
+                     domain=domain, tier='clearbit')
                 return [clearbit_result]
-            print(f"ℹ️  Clearbit unavailable for {domain}")
         
         # Try Google Favicon as fallback (good coverage, lower quality)
         if not skip_google_favicon:
-            favicon_result = await try_google_favicon(domain, url)
+            favicon_result, timed_out = await budget.run('google_favicon', try_google_favicon(
+                domain, url, content_store=self.content_store, base_url=self.google_favicon_url))
+            self.count_tier('google_favicon', bool(favicon_result), timed_out)
             if favicon_result:
-                print(f"🔄 Using Google favicon for {domain} (skipping crawl)")
+                emit(logger, logging.INFO, 'tier_resolved', "Using Google favicon for {domain} (skipping crawl)",
+                     domain=domain, tier='google_favicon')
                 return [favicon_result]
-            print(f"ℹ️  Google favicon unavailable for {domain}, falling back to crawler...")
         
         try:
             async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=BROWSER_HEADERS) as response:
-                    if response.status != 200:
-                        return []
-
-                    html = await response.text()
-
-                    # Check for meta refresh redirect (not followed by aiohttp)
-                    # This handles sites like helpify.net that use <meta http-equiv="refresh">
-                    if len(html) < 500:  # Only check short pages that might be redirect stubs
-                        meta_refresh_url = extract_meta_refresh_url(html, url)
-                        if meta_refresh_url:
-                            print(f"Found meta refresh redirect to: {meta_refresh_url}")
-                            async with session.get(meta_refresh_url, headers=BROWSER_HEADERS) as redirect_response:
-                                if redirect_response.status == 200:
-                                    html = await redirect_response.text()
-                                    url = str(redirect_response.url)
-                                    print(f"Followed meta refresh to: {url}")
-
-                    soup = BeautifulSoup(html, 'html.parser')
-                    
-                    # First, get header/nav images
-                    header_images = await self.analyze_header_nav_elements(soup, url)
-                    
-                    # Then get all other images
-                    all_images = set()
-                    for img in soup.find_all('img'):
-                        src = img.get('src')
-                        if src:
-                            full_url = urljoin(url, src)
-                            all_images.add(full_url)
-                    
-                    for svg in soup.find_all('svg'):
-                        for image in svg.find_all('image'):
-                            href = image.get('href') or image.get('xlink:href')
-                            if href:
-                                full_url = urljoin(url, href)
-                                all_images.add(full_url)
-                    
-                    # Analyze all images
-                    results = []
-                    for image_url in all_images:
-                        result = await self.analyze_image(image_url, url)
-                        if result:
-                            # Mark if image is from header/nav
-                            result.is_header = image_url in header_images
-                            results.append(result)
-                    
-                    print(f"Crawl completed. Found {len(results)} results\n")
-                    
-                    if results:
-                        # Rank the logos
-                        ranked_results = await self.rank_logos(results)
-                        
-                        print("\nFound logos (ranked by likelihood of being main company logo):\n")
-                        for result in ranked_results:
-                            location = "header/navigation" if result.is_header else "main content"
-                            print(f"URL: {result.url}")
-                            print(f"Location: {location}")
-                            print(f"Confidence: {result.confidence}")
-                            print(f"Rank Score: {result.rank_score}")
-                            print(f"Description: {result.description}")
-                            print(f"Page URL: {result.page_url}")
-                            print("-" * 50 + "\n")
-                        
-                        return ranked_results
-                    
+                with span('homepage'), self.metrics.timer('openlogo_stage_seconds', stage='homepage'):
+                    page = await self.fetch_homepage(session, url, budget.slice('homepage', PAGE_TIMEOUT))
+                if page is None:
+                    self.count_tier('crawler', False)
                     return []
-                    
+                html, url = page
+                self.metrics.inc('openlogo_downloaded_bytes_total', len(html.encode()), kind='page')
+
+                # Try the brand assets the page declares before spending vision tokens
+                if not skip_declared_icons:
+                    declared_result, timed_out = await budget.run('declared_icons', try_declared_icons(html, url, session))
+                    self.count_tier('declared_icons', bool(declared_result), timed_out)
+                    if declared_result:
+                        emit(logger, logging.INFO, 'tier_resolved', "Using declared icon for {domain} (skipping AI analysis)",
+                             domain=domain, tier='declared_icons')
+                        return [declared_result]
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            emit(logger, logging.WARNING, 'crawl_error', "Error crawling website {url}: {error!r}", url=url, error=e)
+            self.count_tier('crawler', False, isinstance(e, asyncio.TimeoutError))
+            return []
+        except Exception as e:
+            emit(logger, logging.ERROR, 'crawl_error', "Unexpected error crawling {url}: {error}", exc_info=True,
+                 url=url, error=e)
+            self.count_tier('crawler', False)
+            return []
+
+        try:
+            soup = BeautifulSoup(html, 'html.parser')
+            
+            # First, get header/nav images
+            header_images = set(await self.analyze_header_nav_elements(soup, url))
+            if spool is not None:
+                spool.header_images.update(header_images)
+            
+            # Then get all other images, remembering the element each was found in
+            all_images: Dict[str, Tag] = {}
+            for img in soup.find_all('img'):
+                src = img.get('src')
+                if src:
+                    full_url = urljoin(url, src)
+                    all_images.setdefault(full_url, img)
+            
+            for svg in soup.find_all('svg'):
+                for image in svg.find_all('image'):
+                    href = image.get('href') or image.get('xlink:href')
+                    if href:
+                        full_url = urljoin(url, href)
+                        all_images.setdefault(full_url, image)
+            
+            # Analyze all images; results are collected as they settle so a
+            # deadline keeps everything found before it expired
+            results: List[LogoResult] = []
+            if self.classifier is not None:
+                analysis = self.analyze_page_images(url, html, all_images, spool, results=results,
+                                                    header_images=header_images)
+            else:
+                ordered = await self.prioritize_images(url, all_images, header_images)
+                analysis = self.analyze_in_priority_order(url, ordered, header_images, results, spool,
+                                                          image_elements=all_images, page_html=html)
+            _, partial = await budget.run('analysis', analysis)
+            if partial:
+                emit(logger, logging.INFO, 'deadline_reached', "Deadline reached for {url}, returning {count} results found so far",
+                     url=url, count=len(results))
+            self.count_tier('crawler', bool(results), partial and not results)
+            
+            # Mark if image is from header/nav
+            for result in results:
+                result.is_header = result.url in header_images
+                result.partial = partial
+            
+            if spool is not None and spool.request_count:
+                emit(logger, logging.INFO, 'requests_spooled', "Spooled {count} vision requests for {url}",
+                     url=url, count=spool.request_count)
+                return results
+            
+            emit(logger, logging.INFO, 'crawl_completed', "Crawl of {url} completed. Found {count} results",
+                 url=url, count=len(results))
+            
+            if results:
+                # Rank the logos locally; ask the LLM only when the top two are too close to call
+                ranked_results = self.local_ranker.rank(results)
+                if self.local_ranker.is_ambiguous(ranked_results) and not budget.expired:
+                    llm_ranked, _ = await budget.run('ranking', self.rank_logos(ranked_results))
+                    ranked_results = llm_ranked or ranked_results
+                
+                if logger.isEnabledFor(logging.DEBUG):
+                    for position, result in enumerate(ranked_results, 1):
+                        emit(logger, logging.DEBUG, 'logo_ranked',
+                             "#{position} {logo_url} ({location}, confidence {confidence}, rank score {rank_score}): {description}",
+                             position=position, url=url, logo_url=result.url, page_url=result.page_url,
+                             location="header/navigation" if result.is_header else "main content",
+                             confidence=result.confidence, rank_score=result.rank_score, description=result.description)
+                
+                return ranked_results
+            
+            return []
+            
         except aiohttp.ClientError as e:
-            print(f"Error crawling website: {e}")
+            emit(logger, logging.WARNING, 'crawl_error', "Error crawling website {url}: {error!r}", url=url, error=e)
             return []
         except Exception as e:
-            print(f"Unexpected error: {e}")
+            emit(logger, logging.ERROR, 'crawl_error', "Unexpected error crawling {url}: {error}", exc_info=True,
+                 url=url, error=e)
             return []
 
+    def detect_url_column_name(self, csv_file_path: str) -> str:
+        """Detect the URL column of a CSV file from its header row alone."""
+        return detect_url_column_name(csv_file_path)
+
+    def iter_csv_urls(self, csv_file_path: str, url_column: str) -> Iterator[str]:
+        """Stream the URLs of ``url_column`` row by row, adding https:// where missing."""
+        return iter_csv_urls(csv_file_path, url_column)
+
     def detect_url_column(self, csv_file_path: str) -> Tuple[str, List[str]]:
         """
         Automatically detect the URL column in a CSV file.
         
+        Reads every URL into memory; batch processing streams them with
+        ``detect_url_column_name`` and ``iter_csv_urls`` instead.
+        
         Args:
             csv_file_path: Path to the CSV file
             
         Returns:
             Tuple of (column_name, list_of_urls)
         """
-        possible_url_headers = [
-            'url', 'website', 'site', 'link', 'domain', 'company url', 
-            'website url', 'site url', 'company website', 'company site',
-            'web', 'webpage', 'page', 'address', 'homepage'
-        ]
-        
-        with open(csv_file_path, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            headers = reader.fieldnames
-            
-            if not headers:
-                raise ValueError("CSV file has no headers")
+        url_column = self.detect_url_column_name(csv_file_path)
+        return url_column, list(self.iter_csv_urls(csv_file_path, url_column))
+
+    async def save_url_results(self, url: str, results: List[LogoResult], output_path: Path) -> List[Dict[str, Any]]:
+        """Write one website's results to ``output_path``, saving background-removed images
+        of the logo a resolution tier returned or of its company logos above 0.8 confidence.
+
+        Returns the saved result dicts.
+        """
+        # Save individual results
+        if results:
+            # Create filename from URL
+            domain = urlparse(url).netloc.replace('.', '_')
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"{domain}_{timestamp}.json"
+            filepath = output_path / filename
             
-            # Find the URL column
-            url_column = None
-            for header in headers:
-                if header.lower().strip() in possible_url_headers:
-                    url_column = header
-                    break
+            # Background-removed logos are stored once per distinct image
+            blob_store = BlobStore(self.blob_store_dir or output_path / "blobs")
             
-            if not url_column:
-                # If no exact match, try partial matches
-                for header in headers:
-                    header_lower = header.lower().strip()
-                    for possible in possible_url_headers:
-                        if possible in header_lower or header_lower in possible:
-                            url_column = header
-                            break
-                    if url_column:
-                        break
+            # Convert results to JSON format and save background-removed images
+            results_dict = []
+            uploads = []
+            for result in results:
+                # A tier's answer ended the crawl; the confidence and keyword filters are for vision results
+                vision = result.tier is None
+
+                # Only process images with confidence score > 0.8
+                if vision and result.confidence <= 0.8:
+                    emit(logger, logging.DEBUG, 'logo_skipped', "Skipping logo with low confidence ({confidence}): {logo_url}",
+                         url=url, logo_url=result.url, confidence=result.confidence, reason='confidence')
+                    continue
+                
+                # Only process company logos (not social media, generic icons, etc.)
+                if vision and not self.is_company_logo(result.description, result.url):
+                    emit(logger, logging.DEBUG, 'logo_skipped', "Skipping non-company logo: {logo_url} - {description}",
+                         url=url, logo_url=result.url, description=result.description, reason='not_company')
+                    continue
+                
+                # Save background-removed image
+                try:
+                    # Reuse the bytes downloaded during analysis (or an earlier run)
+                    async with aiohttp.ClientSession() as session:
+                        image_data = await self.content_store.fetch(session, result.url, headers=BROWSER_HEADERS,
+                                                                    timeout=aiohttp.ClientTimeout(total=IMAGE_TIMEOUT))
+                    if image_data is not None:
+                        image = Image.open(io.BytesIO(image_data))
+                        
+                        # Remove background
+                        image_no_bg = self.remove_background(image)
+                        
+                        # Save background-removed image locally, addressed by its hash
+                        img_byte_arr = io.BytesIO()
+                        image_no_bg.save(img_byte_arr, format='PNG')
+                        img_bytes = img_byte_arr.getvalue()
+                        image_blob = blob_store.put(img_bytes)
+                        image_path = blob_store.path(image_blob)
+                        
+                        # Upload to cloud storage alongside the website's other logos
+                        upload = asyncio.ensure_future(self.cloud_storage.upload_image(img_bytes)) \
+                            if self.cloud_storage.uploads else None
+                        
+                        # Create local file URL
+                        local_file_url = f"file://{image_path.absolute()}"
+                        
+                        # Add image paths and URLs to result
+                        result_dict = {
+                            "url": result.url,
+                            "confidence": result.confidence,
+                            "description": result.description,
+                            "page_url": result.page_url,
+                            "image_hash": result.image_hash,
+                            "timestamp": result.timestamp.isoformat(),
+                            "rank_score": result.rank_score,
+                            "detection_scores": result.detection_scores,
+                            "is_header": result.is_header,
+                            "background_removed_image_hash": image_blob,
+                            "background_removed_image_path": str(image_path),
+                            "background_removed_image_url": local_file_url,
+                            "cloud_storage_url": None
+                        }
+                        if upload is not None:
+                            uploads.append((result_dict, upload))
+                    else:
+                        # If image download fails, save without background-removed image
+                        result_dict = {
+                            "url": result.url,
+                            "confidence": result.confidence,
+                            "description": result.description,
+                            "page_url": result.page_url,
+                            "image_hash": result.image_hash,
+                            "timestamp": result.timestamp.isoformat(),
+                            "rank_score": result.rank_score,
+                            "detection_scores": result.detection_scores,
+                            "is_header": result.is_header,
+                            "background_removed_image_hash": None,
+                            "background_removed_image_path": None,
+                            "background_removed_image_url": None,
+                            "cloud_storage_url": None
+                        }
+                except Exception as e:
+                    emit(logger, logging.WARNING, 'blob_save_error', "Could not save background-removed image for {logo_url}: {error}",
+                         url=url, logo_url=result.url, error=e)
+                    result_dict = {
+                        "url": result.url,
+                        "confidence": result.confidence,
+                        "description": result.description,
+                        "page_url": result.page_url,
+                        "image_hash": result.image_hash,
+                        "timestamp": result.timestamp.isoformat(),
+                        "rank_score": result.rank_score,
+                        "detection_scores": result.detection_scores,
+                        "is_header": result.is_header,
+                        "background_removed_image_hash": None,
+                        "background_removed_image_path": None,
+                        "background_removed_image_url": None,
+                        "cloud_storage_url": None
+                    }
+                
+                results_dict.append(result_dict)
             
-            if not url_column:
-                raise ValueError(
-                    f"Could not detect URL column. Available columns: {headers}. "
-                    f"Please ensure one of these columns contains URLs: {possible_url_headers}"
-                )
+            # Cloud URLs are recorded once the upload is confirmed; a failed one keeps the local file URL
+            for result_dict, upload in uploads:
+                cloud_url = await upload
+                if cloud_url:
+                    result_dict["background_removed_image_url"] = result_dict["cloud_storage_url"] = cloud_url
             
-            # Extract URLs from the detected column
-            urls = []
-            for row in reader:
-                url = row[url_column].strip()
-                if url and url.lower() not in ['', 'nan', 'none', 'null']:
-                    # Ensure URL has protocol
-                    if not url.startswith(('http://', 'https://')):
-                        url = 'https://' + url
-                    urls.append(url)
+            # Save to file
+            with open(filepath, 'w') as f:
+                json.dump(results_dict, f, indent=2)
             
-            return url_column, urls
+            emit(logger, logging.INFO, 'website_saved',
+                 "{url}: Found {found} logos, saved {saved} company logos (>0.8 confidence) to {path}",
+                 url=url, found=len(results), saved=len(results_dict), path=filepath, blob_dir=blob_store.root,
+                 cloud=any(r.get('cloud_storage_url') for r in results_dict))
+            return results_dict
+        else:
+            emit(logger, logging.INFO, 'website_saved', "{url}: No logos found", url=url, found=0, saved=0)
+            return []
+
+    def site_record(self, results: List[LogoResult], saved: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """JSONL record of one website: summary entry of every logo plus the saved logos."""
+        return {
+            "logo_count": len(results),
+            "all_logos": [
+                {
+                    "url": result.url,
+                    "confidence": result.confidence,
+                    "rank_score": result.rank_score,
+                    "description": result.description,
+                    "is_header": result.is_header
+                }
+                for result in results
+            ],
+            "saved_logos": saved,
+        }
+
+    def write_batch_summary(self, writer: ResultWriter, csv_file_path: str, url_column: str,
+                            total_urls: int, metrics: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Write batch_summary.json from the writer's records and print the totals.
+
+        ``metrics`` is the metrics snapshot of the batch (default: everything the
+        crawler recorded so far).
+        """
+        summary_file = writer.output_dir / "batch_summary.json"
+        summary = {
+            "processed_at": datetime.now().isoformat(),
+            "csv_file": csv_file_path,
+            "url_column": url_column,
+            "total_urls": total_urls,
+            "failed_uploads": list(self.cloud_storage.uploads.failed) if self.cloud_storage.uploads else [],
+            "metrics": metrics if metrics is not None else self.metrics.snapshot(),
+        }
+        writer.write_summary(summary_file, summary)
+        
+        print(f"\n🎉 Batch processing complete!")
+        print(f"📊 Summary: {writer.summary.successful_crawls}/{total_urls} websites processed successfully")
+        print(f"📁 Results saved to: {writer.output_dir} ({writer.results_path.name})")
+        print(f"📋 Summary report: {summary_file}")
+        print(f"📸 Background-removed images saved by content hash in {self.blob_store_dir or writer.output_dir / 'blobs'}")
+        
+        return {**summary, "successful_crawls": writer.summary.successful_crawls,
+                "total_logos_found": writer.summary.total_logos_found}
 
-    async def process_csv_batch(self, csv_file_path: str, output_dir: str = "results", confirm_header: bool = True) -> Dict[str, List[LogoResult]]:
+    def confirm_url_column(self, csv_file_path: str, url_column: str, total_urls: int) -> bool:
+        """Ask whether to proceed with the detected column; unattended runs (no TTY) proceed."""
+        print(f"\nDetected URL column: '{url_column}'")
+        print(f"Found {total_urls} URLs to process:")
+        for i, url in enumerate(islice(self.iter_csv_urls(csv_file_path, url_column), 5), 1):  # Show first 5 URLs
+            print(f"  {i}. {url}")
+        if total_urls > 5:
+            print(f"  ... and {total_urls - 5} more")
+        
+        if not sys.stdin or not sys.stdin.isatty():
+            print("No interactive terminal, proceeding without confirmation.")
+            return True
+        response = input("\nProceed with this column? (y/n): ").lower().strip()
+        return response in ['y', 'yes']
+
+    async def process_csv_batch(self, csv_file_path: str, output_dir: str = "results", confirm_header: bool = True,
+                                spool_dir: Optional[str] = None, resume: bool = True,
+                                return_results: bool = True, concurrency: int = 1,
+                                queue: Optional[WorkQueue] = None,
+                                profile_threshold: Optional[float] = None) -> Dict[str, List[LogoResult]]:
         """
         Process a CSV file containing URLs and crawl each website for logos.
         
+        URLs are streamed from the CSV. Each website's results are appended to
+        ``results.jsonl`` in ``output_dir`` as soon as it completes and recorded in
+        ``checkpoint.txt``; a restarted run skips the websites already done.
+        Resuming into a directory written for another CSV raises ValueError.
+        
         Args:
             csv_file_path: Path to the CSV file containing URLs
             output_dir: Directory to save individual results
-            confirm_header: Whether to confirm the detected URL column with user
+            confirm_header: Whether to confirm the detected URL column with user.
+                            Skipped automatically when stdin is not a terminal.
+            spool_dir: Deferred mode. Crawl and preprocess every website but write the
+                       vision requests to OpenAI batch input files in this directory
+                       instead of calling the API. Submit them with the batch API, then
+                       call ``finish_batch`` with the output files to write the results.
+            resume: Skip websites recorded in the checkpoint of ``output_dir``, which
+                    must belong to the same CSV (same path or same content)
+            return_results: Keep every result in memory to return it. Pass False for
+                            large runs; the results are in results.jsonl either way.
+            concurrency: Number of websites crawled at the same time. For more than
+                         one core, see ``openlogo.sharding.run_sharded_batch``.
+            queue: Add the URLs to this work queue instead of crawling them;
+                   workers on any machine then run ``process_queue``.
+            profile_threshold: Profile every website and keep, in ``output_dir/profiles``,
+                               the profiles of those taking at least this many seconds
+                               (see ``openlogo.profiling.DomainProfiler``)
             
         Returns:
-            Dictionary mapping URLs to their logo results
+            Dictionary mapping URLs to their logo results for the websites processed
+            by this call (in deferred mode, only the results settled without the LLM)
         """
         print(f"Processing CSV file: {csv_file_path}")
         
-        # Detect URL column
-        url_column, urls = self.detect_url_column(csv_file_path)
+        # Detect URL column and count the rows without holding them
+        url_column = self.detect_url_column_name(csv_file_path)
+        total_urls = sum(1 for _ in self.iter_csv_urls(csv_file_path, url_column))
         
-        if confirm_header:
-            print(f"\nDetected URL column: '{url_column}'")
-            print(f"Found {len(urls)} URLs to process:")
-            for i, url in enumerate(urls[:5], 1):  # Show first 5 URLs
-                print(f"  {i}. {url}")
-            if len(urls) > 5:
-                print(f"  ... and {len(urls) - 5} more")
-            
-            response = input("\nProceed with this column? (y/n): ").lower().strip()
-            if response not in ['y', 'yes']:
-                print("Processing cancelled.")
-                return {}
+        if confirm_header and not self.confirm_url_column(csv_file_path, url_column, total_urls):
+            print("Processing cancelled.")
+            return {}
+        
+        if queue is not None:
+            added = queue.enqueue(self.iter_csv_urls(csv_file_path, url_column))
+            print(f"📥 Queued {added} new URLs ({total_urls - added} already queued)")
+            print(f"📊 Queue: {queue.progress()}")
+            return {}
         
         # Create output directory
         output_path = Path(output_dir)
         output_path.mkdir(exist_ok=True)
+        if not resume:
+            for stale in (output_path / RESULTS_FILE, output_path / CHECKPOINT_FILE):
+                stale.unlink(missing_ok=True)
         
         # Process each URL
-        all_results = {}
+        spool = None
+        writer = None
+        profiler = None
+        metrics_before = self.metrics.snapshot()
+        if profile_threshold is not None:
+            profiler = DomainProfiler(output_path / PROFILES_DIR, threshold=profile_threshold)
+        if spool_dir:
+            spool = BatchSpool(
+                spool_dir,
+                model=self.llm.endpoint.model,
+                endpoint_path='/chat/completions' if self.llm.endpoint.azure else '/v1/chat/completions',
+                metadata={"csv_file": csv_file_path, "url_column": url_column, "total_urls": total_urls},
+            )
+        else:
+            bind_source(output_path, csv_file_path, resume=resume)
+            writer = ResultWriter(output_path)
+            if writer.completed:
+                print(f"↩️  Resuming: {len(writer.completed)} websites already completed")
         
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            BarColumn(),
-            TaskProgressColumn(),
-            TextColumn("[progress.percentage]{task.percentage:>3.0f}%")
-        ) as progress:
-            task = progress.add_task("Processing websites...", total=len(urls))
+        try:
+            from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
+            with Progress(
+                SpinnerColumn(),
+                TextColumn("[progress.description]{task.description}"),
+                BarColumn(),
+                TaskProgressColumn(),
+                TextColumn("[progress.percentage]{task.percentage:>3.0f}%")
+            ) as progress:
+                task = progress.add_task("Processing websites...", total=total_urls)
+                with span('batch', csv_file=csv_file_path, total_urls=total_urls, concurrency=concurrency):
+                    all_results = await self.process_urls(
+                        self.iter_csv_urls(csv_file_path, url_column), output_path, writer=writer, spool=spool,
+                        concurrency=concurrency, return_results=return_results,
+                        crawl_options={'profiler': profiler} if profiler is not None else None,
+                        on_start=lambda url: progress.update(task, description=f"Processing {url}"),
+                        on_complete=lambda url: progress.advance(task),
+                    )
             
-            for url in urls:
-                try:
-                    progress.update(task, description=f"Processing {url}")
-                    
-                    # Crawl the website
-                    results = await self.crawl_website(url)
-                    
-                    # Save individual results
-                    if results:
-                        # Create filename from URL
-                        domain = urlparse(url).netloc.replace('.', '_')
-                        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                        filename = f"{domain}_{timestamp}.json"
-                        filepath = output_path / filename
-                        
-                        # Create images subdirectory for background-removed logos
-                        images_dir = output_path / f"{domain}_{timestamp}_images"
-                        images_dir.mkdir(exist_ok=True)
-                        
-                        # Convert results to JSON format and save background-removed images
-                        results_dict = []
-                        for i, result in enumerate(results):
-                            # Only process images with confidence score > 0.8
-                            if result.confidence <= 0.8:
-                                print(f"Skipping logo with low confidence ({result.confidence}): {result.url}")
-                                continue
-                            
-                            # Only process company logos (not social media, generic icons, etc.)
-                            if not self.is_company_logo(result.description, result.url):
-                                print(f"Skipping non-company logo: {result.url} - {result.description}")
-                                continue
-                            
-                            # Save background-removed image
-                            try:
-                                # Download the original image
-                                async with aiohttp.ClientSession() as session:
-                                    async with session.get(result.url, headers=BROWSER_HEADERS) as response:
-                                        if response.status == 200:
-                                            image_data = await response.read()
-                                            image = Image.open(io.BytesIO(image_data))
-                                            
-                                            # Remove background
-                                            image_no_bg = self.remove_background(image)
-                                            
-                                            # Save background-removed image locally
-                                            image_filename = f"logo_{i+1}_{result.confidence:.2f}.png"
-                                            image_path = images_dir / image_filename
-                                            image_no_bg.save(image_path, "PNG")
-                                            
-                                            # Convert to bytes for cloud upload
-                                            img_byte_arr = io.BytesIO()
-                                            image_no_bg.save(img_byte_arr, format='PNG')
-                                            img_bytes = img_byte_arr.getvalue()
-                                            
-                                            # Upload to cloud storage
-                                            cloud_url = await self.cloud_storage.upload_image(img_bytes, image_filename)
-                                            
-                                            # Create local file URL
-                                            local_file_url = f"file://{image_path.absolute()}"
-                                            
-                                            # Add image paths and URLs to result
-                                            result_dict = {
-                                                "url": result.url,
-                                                "confidence": result.confidence,
-                                                "description": result.description,
-                                                "page_url": result.page_url,
-                                                "image_hash": result.image_hash,
-                                                "timestamp": result.timestamp.isoformat(),
-                                                "rank_score": result.rank_score,
-                                                "detection_scores": result.detection_scores,
-                                                "is_header": result.is_header,
-                                                "background_removed_image_path": str(image_path),
-                                                "background_removed_image_url": cloud_url if cloud_url else local_file_url,
-                                                "cloud_storage_url": cloud_url
-                                            }
-                                        else:
-                                            # If image download fails, save without background-removed image
-                                            result_dict = {
-                                                "url": result.url,
-                                                "confidence": result.confidence,
-                                                "description": result.description,
-                                                "page_url": result.page_url,
-                                                "image_hash": result.image_hash,
-                                                "timestamp": result.timestamp.isoformat(),
-                                                "rank_score": result.rank_score,
-                                                "detection_scores": result.detection_scores,
-                                                "is_header": result.is_header,
-                                                "background_removed_image_path": None,
-                                                "background_removed_image_url": None,
-                                                "cloud_storage_url": None
-                                            }
-                            except Exception as e:
-                                print(f"Warning: Could not save background-removed image for {result.url}: {e}")
-                                result_dict = {
-                                    "url": result.url,
-                                    "confidence": result.confidence,
-                                    "description": result.description,
-                                    "page_url": result.page_url,
-                                    "image_hash": result.image_hash,
-                                    "timestamp": result.timestamp.isoformat(),
-                                    "rank_score": result.rank_score,
-                                    "detection_scores": result.detection_scores,
-                                    "is_header": result.is_header,
-                                    "background_removed_image_path": None,
-                                    "background_removed_image_url": None,
-                                    "cloud_storage_url": None
-                                }
-                            
-                            results_dict.append(result_dict)
-                        
-                        # Save to file
-                        with open(filepath, 'w') as f:
-                            json.dump(results_dict, f, indent=2)
-                        
-                        print(f"\n✅ {url}: Found {len(results)} logos, saved {len(results_dict)} company logos (>0.8 confidence) to {filepath}")
-                        if results_dict:
-                            print(f"📁 Background-removed images saved to: {images_dir}")
-                            if any(r.get('cloud_storage_url') for r in results_dict):
-                                print(f"☁️  Images uploaded to cloud storage")
-                        else:
-                            print(f"⚠️  No company logos found (all below 0.8 threshold or non-company logos)")
-                    else:
-                        print(f"\n❌ {url}: No logos found")
-                    
-                    all_results[url] = results
-                    
-                except Exception as e:
-                    print(f"\n❌ {url}: Error - {e}")
-                    all_results[url] = []
+            if spool is not None:
+                print(f"\n📦 Spooled {spool.request_count} vision requests to {len(spool.request_files)} batch file(s) in {spool_dir}")
+                print(f"Submit them to the batch API, then run finish_batch('{spool_dir}', [output files])")
+                return all_results
+            
+            # Uploads overlapped with crawling; wait for the stragglers before summarizing
+            await self.cloud_storage.flush()
+            self.write_batch_summary(writer, csv_file_path, url_column, total_urls,
+                                     metrics=diff_snapshots(self.metrics.snapshot(), metrics_before))
+        finally:
+            if spool is not None:
+                spool.close()
+            if writer is not None:
+                writer.close()
+            self.detection_strategies.close()
+            if profiler is not None:
+                profiler.close()
+                print(f"🔬 Kept {len(profiler.kept)} profiles of websites slower than {profile_threshold}s "
+                      f"in {profiler.output_dir}")
+        
+        return all_results
+
+    async def process_urls(self, urls: Iterable[str], output_path: Path, writer: Optional[ResultWriter] = None,
+                           spool: Optional[BatchSpool] = None, concurrency: int = 1,
+                           stop: Optional[asyncio.Event] = None, crawl_options: Optional[Dict[str, Any]] = None,
+                           return_results: bool = True, on_start: Optional[Callable[[str], None]] = None,
+                           on_complete: Optional[Callable[[str], None]] = None) -> Dict[str, List[LogoResult]]:
+        """
+        Crawl ``urls`` and record each website with ``writer`` (or ``spool``) as it completes.
+        
+        Training samples go to ``training.jsonl`` next to the writer's records (in
+        ``output_path`` without a writer) unless the crawler has a training log.
+        
+        Args:
+            urls: Website URLs, consumed lazily
+            output_path: Directory for the per-website JSON files and images
+            writer: Records results and skips websites it already completed
+            spool: Deferred mode, see ``process_csv_batch``
+            concurrency: Number of websites crawled at the same time
+            stop: When set, no further websites are started; those in flight finish
+            crawl_options: Extra keyword arguments for ``crawl_website``
+            return_results: Keep the results to return them
+            on_start: Called with each URL when its crawl starts
+            on_complete: Called with each URL once it is done or skipped
+            
+        Returns:
+            Dictionary mapping URLs to their logo results (empty if not return_results)
+        """
+        all_results: Dict[str, List[LogoResult]] = {}
+        crawl_options = crawl_options or {}
+        
+        async def process(url: str):
+            if on_start:
+                on_start(url)
+            try:
+                # Crawl the website
+                site = spool.site(url) if spool else None
+                results = await self.crawl_website(url, spool=site, **crawl_options)
                 
-                progress.advance(task)
+                if site is not None:
+                    site.finish(results)
+                else:
+                    saved = await self.save_url_results(url, results, output_path)
+                    if writer is not None:
+                        writer.write(url, self.site_record(results, saved))
+            except Exception as e:
+                emit(logger, logging.ERROR, 'website_error', "{url}: Error - {error}", exc_info=True, url=url, error=e)
+                results = []
+            if return_results:
+                all_results[url] = results
+            if on_complete:
+                on_complete(url)
         
-        # Create summary report
-        summary_file = output_path / "batch_summary.json"
-        summary = {
-            "processed_at": datetime.now().isoformat(),
-            "csv_file": csv_file_path,
-            "url_column": url_column,
-            "total_urls": len(urls),
-            "successful_crawls": sum(1 for results in all_results.values() if results),
-            "total_logos_found": sum(len(results) for results in all_results.values()),
-            "results": {
-                url: {
-                    "logo_count": len(results),
-                    "all_logos": [
-                        {
-                            "url": result.url,
-                            "confidence": result.confidence,
-                            "rank_score": result.rank_score,
-                            "description": result.description,
-                            "is_header": result.is_header
-                        }
-                        for result in results
-                    ] if results else []
-                }
-                for url, results in all_results.items()
-            }
-        }
+        in_flight: Set[asyncio.Future] = set()
+        # A sharded run's writer is its shard directory, so workers never share a file
+        training = self.open_training_log(writer.output_dir if writer is not None else output_path)
+        try:
+            for url in urls:
+                if stop is not None and stop.is_set():
+                    print("🛑 Stop requested, finishing websites in progress")
+                    break
+                if writer is not None and writer.is_done(url):
+                    if on_complete:
+                        on_complete(url)
+                    continue
+                if concurrency <= 1:
+                    await process(url)
+                    continue
+                if len(in_flight) >= concurrency:
+                    done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for finished in done:
+                        finished.result()
+                in_flight.add(asyncio.ensure_future(process(url)))
+            if in_flight:
+                done, in_flight = await asyncio.wait(in_flight)
+                for finished in done:
+                    finished.result()
+        finally:
+            for unfinished in in_flight:
+                unfinished.cancel()
+            self.close_training_log(training)
         
-        with open(summary_file, 'w') as f:
-            json.dump(summary, f, indent=2)
+        return all_results
+
+    async def process_queue(self, queue: WorkQueue, output_dir: str = "results", worker_id: Optional[str] = None,
+                            lease_seconds: float = 300, concurrency: int = 1, stop: Optional[asyncio.Event] = None,
+                            crawl_options: Optional[Dict[str, Any]] = None, poll_interval: float = 5,
+                            progress_interval: float = 30) -> QueueProgress:
+        """
+        Claim websites from a shared work queue and crawl them until the queue is finished.
         
-        print(f"\n🎉 Batch processing complete!")
-        print(f"📊 Summary: {summary['successful_crawls']}/{summary['total_urls']} websites processed successfully")
-        print(f"📁 Results saved to: {output_path}")
-        print(f"📋 Summary report: {summary_file}")
-        print(f"📸 Background-removed images saved in subdirectories")
+        Each claimed URL is leased to this worker and the lease is renewed every
+        third of ``lease_seconds`` while the website is crawled, so a worker that
+        dies only delays its websites until the lease expires. Results are saved to
+        ``output_dir`` as in ``process_csv_batch`` and recorded in the queue.
+        When nothing is pending but other workers still hold leases, the worker
+        polls in case one of them expires.
+        
+        Args:
+            queue: Queue filled by ``process_csv_batch(queue=...)`` or ``queue.enqueue``
+            output_dir: Directory to save individual results
+            worker_id: Name of this worker in the queue (default: host name and process ID)
+            lease_seconds: How long a claim lasts without a heartbeat
+            concurrency: Number of websites crawled at the same time
+            stop: When set, no further websites are claimed; those in flight finish
+            crawl_options: Extra keyword arguments for ``crawl_website``
+            poll_interval: Seconds between claims while other workers hold the remaining leases
+            progress_interval: Seconds between progress reports
+            
+        Returns:
+            Progress of the whole queue when this worker stopped
+        """
+        loop = asyncio.get_running_loop()
+        worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        crawl_options = crawl_options or {}
+        output_path = Path(output_dir)
+        output_path.mkdir(parents=True, exist_ok=True)
+        
+        async def call(method, *args):
+            # Queue backends are blocking clients; keep them off the event loop
+            return await loop.run_in_executor(None, method, *args)
+        
+        async def heartbeat(lease: Lease):
+            while True:
+                await asyncio.sleep(lease_seconds / 3)
+                if not await call(queue.heartbeat, lease, lease_seconds):
+                    emit(logger, logging.WARNING, 'lease_lost', "Lost the lease on {url}", url=lease.url, worker_id=worker_id)
+                    return
+        
+        async def process(lease: Lease):
+            keepalive = asyncio.ensure_future(heartbeat(lease))
+            try:
+                results = await self.crawl_website(lease.url, **crawl_options)
+                saved = await self.save_url_results(lease.url, results, output_path)
+                record = self.site_record(results, saved)
+            except Exception as e:
+                emit(logger, logging.ERROR, 'website_error', "{url}: Error - {error}", exc_info=True, url=lease.url,
+                     error=e, worker_id=worker_id)
+                await call(queue.fail, lease, str(e))
+                return
+            finally:
+                keepalive.cancel()
+            if not await call(queue.complete, lease, record):
+                emit(logger, logging.WARNING, 'lease_lost', "{url} was reclaimed by another worker, result discarded",
+                     url=lease.url, worker_id=worker_id)
+        
+        print(f"👷 Worker {worker_id} processing queue")
+        in_flight: Set[asyncio.Future] = set()
+        last_report = time.monotonic()
+        training = self.open_training_log(output_path)
+        try:
+            while not (stop is not None and stop.is_set()):
+                if len(in_flight) < concurrency:
+                    lease = await call(queue.claim, worker_id, lease_seconds)
+                    if lease is not None:
+                        in_flight.add(asyncio.ensure_future(process(lease)))
+                        continue
+                if in_flight:
+                    done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for finished in done:
+                        finished.result()
+                else:
+                    if (await call(queue.progress)).finished:
+                        break
+                    await asyncio.sleep(poll_interval)
+                if time.monotonic() - last_report >= progress_interval:
+                    last_report = time.monotonic()
+                    print(f"📊 Queue: {await call(queue.progress)}")
+            if in_flight:
+                done, in_flight = await asyncio.wait(in_flight)
+                for finished in done:
+                    finished.result()
+        finally:
+            for unfinished in in_flight:
+                unfinished.cancel()
+            self.close_training_log(training)
+            self.detection_strategies.close()
+        
+        await self.cloud_storage.flush()
+        progress = await call(queue.progress)
+        print(f"📊 Queue: {progress}")
+        return progress
+
+    async def finish_batch(self, spool_dir: str, response_files: List[str], output_dir: str = "results") -> Dict[str, List[LogoResult]]:
+        """
+        Finish a run spooled by ``process_csv_batch(spool_dir=...)``.
+        
+        Reads the batch API output files, turns each response into a result and
+        ranks, saves and summarizes every website as ``process_csv_batch`` does.
+        Ranking is local only; no API calls are made here.
+        
+        Args:
+            spool_dir: Directory the requests were spooled to
+            response_files: Batch output (and error) JSONL files
+            output_dir: Directory to save individual results
+            
+        Returns:
+            Dictionary mapping URLs to their logo results
+        """
+        manifest = load_spool(spool_dir)
+        responses = read_batch_responses(response_files)
+        output_path = Path(output_dir)
+        output_path.mkdir(exist_ok=True)
+        
+        all_results = {}
+        training = self.open_training_log(output_path)
+        try:
+            with ResultWriter(output_path) as writer:
+                for site in manifest.sites:
+                    if writer.is_done(site.site_url):
+                        continue
+                    results = [LogoResult(**result) for result in site.results]
+                    for request in site.requests:
+                        response = responses.get(request.custom_id)
+                        if response is None:
+                            emit(logger, logging.WARNING, 'batch_response_missing', "No batch response for {image_url}",
+                                 url=site.site_url, image_url=request.image_url)
+                            continue
+                        result = self.parse_vision_response(response, request.image_url, request.page_url, request.image_hash)
+                        if request.detection_scores and self.vision_answered(response):
+                            self.record_training(request.image_url, request.page_url, request.detection_scores, result)
+                        if result is None:
+                            continue
+                        result.is_header = request.is_header
+                        if request.detection_scores:
+                            result.detection_scores = request.detection_scores
+                        self.image_cache.set(request.cache_key, result)
+                        results.append(result)
+                
+                    if site.requests:
+                        results = self.local_ranker.rank(results)
+                
+                    saved = await self.save_url_results(site.site_url, results, output_path)
+                    writer.write(site.site_url, self.site_record(results, saved))
+                    all_results[site.site_url] = results
+            
+                await self.cloud_storage.flush()
+                self.write_batch_summary(writer, manifest.metadata.get("csv_file", ""), manifest.metadata.get("url_column", ""),
+                                         manifest.metadata.get("total_urls", len(manifest.sites)))
+        finally:
+            self.close_training_log(training)
         
-        return all_results 
\ No newline at end of file
+        return all_results
@@ -0,0 +1,74 @@
+import asyncio
+import time
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from .tracing import span
+
+if TYPE_CHECKING:
+    from .metrics import MetricsRegistry
+
+T = TypeVar('T')
+
+# Share of the whole budget each stage of crawl_website may use at most.
+# Time a stage does not use stays available to the later ones; candidate
+# analysis gets whatever remains.
+STAGE_SHARES: Dict[str, float] = {
+    'clearbit': 0.1,
+    'google_favicon': 0.1,
+    'homepage': 0.3,
+    'declared_icons': 0.15,
+}
+
+
+class Deadline:
+    """Latency budget of one call, handed out to its stages in slices.
+
+    ``seconds=None`` is an unlimited budget: every slice is None (no timeout).
+    Stages run through ``run`` are observed in ``metrics`` when given.
+    """
+
+    def __init__(self, seconds: Optional[float] = None, shares: Optional[Dict[str, float]] = None,
+                 clock: Callable[[], float] = time.monotonic, metrics: Optional['MetricsRegistry'] = None):
+        self.seconds = seconds
+        self.shares = shares if shares is not None else STAGE_SHARES
+        self.clock = clock
+        self.metrics = metrics
+        self.expires_at = clock() + seconds if seconds is not None else None
+
+    def remaining(self) -> Optional[float]:
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - self.clock())
+
+    @property
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def slice(self, stage: str, default: Optional[float] = None) -> Optional[float]:
+        """Timeout for ``stage``: its share of the budget, capped by what remains.
+
+        Without a budget, ``default`` (the stage's usual timeout) is returned.
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        budget = self.seconds * self.shares.get(stage, 1.0)
+        return min(budget, remaining, default) if default is not None else min(budget, remaining)
+
+    async def run(self, stage: str, awaitable: Awaitable[T], default: Optional[float] = None) -> Tuple[Optional[T], bool]:
+        """Await ``awaitable`` within the slice of ``stage``; (result, False), or (None, True) on timeout.
+
+        The stage is traced as a span of that name.
+        """
+        timeout = self.slice(stage, default)
+        started = time.perf_counter()
+        with span(stage, timeout=timeout) as stage_span:
+            try:
+                return await asyncio.wait_for(awaitable, timeout), False
+            except asyncio.TimeoutError:
+                stage_span.set(timed_out=True)
+                return None, True
+            finally:
+                if self.metrics is not None:
+                    self.metrics.observe('openlogo_stage_seconds', time.perf_counter() - started, stage=stage)
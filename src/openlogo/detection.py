@@ -1,32 +1,41 @@
+import asyncio
 import os
 import re
-from typing import List, Dict, Set, Optional, Tuple, Any
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Dict, Set, Optional, Tuple, Any, Iterable
 from urllib.parse import urljoin, urlparse
 import json
-import magic
-import cv2
 import numpy as np
 from bs4 import BeautifulSoup, Tag
-import extcolors
 from PIL import Image
-import pytesseract
-import imagehash
-import tweepy
-from jsonschema import validate
 import aiohttp
-from dataclasses import dataclass
-from sklearn.ensemble import RandomForestClassifier
+from dataclasses import dataclass, field
 import logging
 import base64
 import io
 from datetime import datetime
 from pydantic import BaseModel
 
-# Configure pytesseract path - use shutil.which to find it, or env var
+from .features import FeatureMatrix
+from .tracing import span
+from .events import emit
+
 import shutil
-_tesseract_path = os.environ.get('TESSERACT_CMD') or shutil.which('tesseract')
-if _tesseract_path:
-    pytesseract.pytesseract.tesseract_cmd = _tesseract_path
+
+# OpenCV, OCR, color extraction, libmagic and tweepy are imported by the
+# analyses that use them, so importing openlogo stays fast
+if TYPE_CHECKING:
+    import tweepy
+
+@lru_cache(maxsize=None)
+def load_pytesseract():
+    """pytesseract, pointed at $TESSERACT_CMD or the tesseract on PATH (imported on first OCR)."""
+    import pytesseract
+    tesseract_path = os.environ.get('TESSERACT_CMD') or shutil.which('tesseract')
+    if tesseract_path:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_path
+    return pytesseract
 
 def extract_domain(url: str) -> str:
     """Extract domain name from URL."""
@@ -36,6 +45,33 @@ def extract_domain(url: str) -> str:
     except Exception:
         return url
 
+def brand_name(page_url: str) -> str:
+    """Domain name without subdomain "www" or TLD, e.g. "stripe" for https://www.stripe.com."""
+    domain = extract_domain(page_url).lower()
+    if domain.startswith('www.'):
+        domain = domain[4:]
+    return re.sub(r'[^a-z0-9\s]', '', domain.split('.')[0]).strip()
+
+def logo_text_words(text: str) -> List[str]:
+    """Lowercase words of OCR/description text with special characters removed."""
+    return re.sub(r'[^a-z0-9\s]', '', (text or '').lower()).split()
+
+def location_match_score(is_header: bool, is_domain_match: bool) -> float:
+    """Heuristic rank from where the logo sits and whether its text names the domain."""
+    if is_domain_match and is_header:
+        rank_score = 2.0  # Domain match in header: almost certainly the main logo
+    elif is_header:
+        rank_score = 1.0  # Header logos get at least 1.0
+    elif is_domain_match:
+        rank_score = 0.9  # Domain match in main content
+    else:
+        rank_score = 0.5  # Default score for other logos
+
+    # Small bonus so header logos win ties
+    if is_header:
+        rank_score += 0.01
+    return rank_score
+
 @dataclass
 class LogoCandidate:
     url: str
@@ -56,21 +92,156 @@ class LogoCandidate:
     schema_markup: str = ''
     classification: str = "unknown"  # Can be "company", "third_party", or "design_element"
 
+@dataclass
+class ImageOccurrences:
+    """Aggregated appearances of a single image URL across crawled pages."""
+    count: int = 0
+    positions: Set[Any] = field(default_factory=set)
+    sizes: Set[Any] = field(default_factory=set)
+    always_in_template: bool = True
+
+class DetectionIndex:
+    """Lookup tables for the cross-page analyses, built once per crawl.
+
+    ``analyze_structural_position`` and ``analyze_multi_page_consistency`` compare a
+    candidate against every element/image seen on the crawled pages. Counting element
+    paths and aggregating image occurrences up front turns those comparisons into
+    dictionary lookups.
+    """
+
+    def __init__(self, all_pages_elements: Optional[List[Tag]] = None,
+                 all_pages_images: Optional[List[Dict]] = None):
+        self.path_counts: Dict[str, int] = {}
+        self.element_total = 0
+        self.images: Dict[str, ImageOccurrences] = {}
+        self.image_total = 0
+        # id(node) -> (node, path); the node is kept so its id cannot be reused
+        self._node_paths: Dict[int, Tuple[Any, str]] = {}
+        self._sibling_indexes: Dict[int, int] = {}
+
+        for element in all_pages_elements or []:
+            self.add_element(element)
+        for image in all_pages_images or []:
+            self.add_image(image)
+
+    def add_element(self, element: Tag):
+        path = self.element_path(element)
+        self.path_counts[path] = self.path_counts.get(path, 0) + 1
+        self.element_total += 1
+
+    def add_image(self, image: Dict):
+        occurrences = self.images.setdefault(image['url'], ImageOccurrences())
+        occurrences.count += 1
+        occurrences.positions.add(image['position'])
+        occurrences.sizes.add(image['size'])
+        occurrences.always_in_template = occurrences.always_in_template and bool(image['in_template'])
+        self.image_total += 1
+
+    def path_count(self, element: Tag) -> int:
+        return self.path_counts.get(self.element_path(element), 0)
+
+    def image_occurrences(self, image_url: str) -> ImageOccurrences:
+        return self.images.get(image_url) or ImageOccurrences()
+
+    def element_path(self, element: Tag) -> str:
+        """Same path as ``LogoDetectionStrategies._get_element_path``, memoized per ancestor."""
+        if element.parent is None:
+            return ''
+        return self._node_path(element.parent)
+
+    def _node_path(self, node: Tag) -> str:
+        # Walk up to the closest ancestor whose path is already known, then build
+        # the paths back down so every ancestor is resolved once per crawl.
+        pending = []
+        prefix = ''
+        while node is not None:
+            cached = self._node_paths.get(id(node))
+            if cached is not None:
+                prefix = cached[1]
+                break
+            pending.append(node)
+            node = node.parent
+
+        for node in reversed(pending):
+            segment = f"{node.name}[{self._sibling_index(node)}]"
+            prefix = f"{prefix} > {segment}" if prefix else segment
+            self._node_paths[id(node)] = (node, prefix)
+        return prefix
+
+    def _sibling_index(self, node: Tag) -> int:
+        parent = node.parent
+        if parent is None:
+            return 0
+        if id(node) not in self._sibling_indexes:
+            # Index all children of this parent in one pass instead of rescanning
+            # the sibling list for every child.
+            seen: Dict[str, int] = {}
+            for child in parent.children:
+                if isinstance(child, Tag):
+                    self._sibling_indexes[id(child)] = seen.get(child.name, 0)
+                    seen[child.name] = seen.get(child.name, 0) + 1
+        return self._sibling_indexes[id(node)]
+
 class LogoDetectionStrategies:
-    def __init__(self, twitter_api_key: Optional[str] = None):
+    # Analyses available to ``run_analyses``, in the order their scores are reported
+    ANALYSES = (
+        'html_context',
+        'structural_position',
+        'technical',
+        'visual',
+        'url_semantics',
+        'metadata',
+        'multi_page_consistency',
+        'social_media',
+        'schema_markup',
+    )
+    DEFAULT_ANALYSIS_TIMEOUT = 5.0
+    # OCR and the homepage/Twitter lookups need more headroom than the rest
+    DEFAULT_ANALYSIS_TIMEOUTS = {'visual': 15.0, 'social_media': 10.0}
+
+    def __init__(self, twitter_api_key: Optional[str] = None, executor: Optional[Executor] = None,
+                 max_workers: Optional[int] = None, analysis_timeouts: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            twitter_api_key: Optional Twitter API key for social media analysis
+            executor: Executor shared by the CPU-bound and blocking analyses. A thread
+                      pool of ``max_workers`` is created on first use when omitted.
+            analysis_timeouts: Per-analysis timeouts (seconds) used by ``run_analyses``
+        """
         self.twitter_api_key = twitter_api_key
         self.twitter_client = self._setup_twitter_client() if twitter_api_key else None
         self.logger = logging.getLogger(__name__)
-
-    def _setup_twitter_client(self) -> Optional[tweepy.Client]:
+        self.max_workers = max_workers
+        self.analysis_timeouts = {**self.DEFAULT_ANALYSIS_TIMEOUTS, **(analysis_timeouts or {})}
+        self._executor = executor
+        self._owns_executor = executor is None
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix="openlogo-detection")
+        return self._executor
+
+    def close(self):
+        """Shut down the executor if this instance created it."""
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _setup_twitter_client(self) -> Optional["tweepy.Client"]:
         try:
+            import tweepy
             return tweepy.Client(bearer_token=self.twitter_api_key)
         except Exception as e:
-            self.logger.warning(f"Failed to initialize Twitter client: {e}")
+            emit(self.logger, logging.WARNING, 'twitter_unavailable', "Failed to initialize Twitter client: {error}", error=e)
             return None
 
     async def analyze_html_context(self, element: Tag, base_url: str) -> Dict[str, float]:
         """Analyze HTML context for logo indicators."""
+        return self._html_context_scores(element, base_url)
+
+    def _html_context_scores(self, element: Tag, base_url: str) -> Dict[str, float]:
         scores = {
             'class_score': 0.0,
             'alt_text_score': 0.0,
@@ -104,8 +275,17 @@ class LogoDetectionStrategies:
 
         return scores
 
-    async def analyze_structural_position(self, element: Tag, all_pages_elements: List[Tag]) -> Dict[str, float]:
-        """Analyze structural position in the DOM."""
+    async def analyze_structural_position(self, element: Tag, all_pages_elements: List[Tag],
+                                          index: Optional[DetectionIndex] = None) -> Dict[str, float]:
+        """Analyze structural position in the DOM.
+
+        Pass the crawl's ``DetectionIndex`` to avoid recomputing the path of every
+        element in ``all_pages_elements`` for each candidate.
+        """
+        return self._structural_position_scores(element, all_pages_elements, index)
+
+    def _structural_position_scores(self, element: Tag, all_pages_elements: List[Tag],
+                                    index: Optional[DetectionIndex] = None) -> Dict[str, float]:
         scores = {
             'dom_depth_score': 0.0,
             'position_score': 0.0,
@@ -122,15 +302,18 @@ class LogoDetectionStrategies:
             scores['position_score'] = any(pos in parent_box.lower() for pos in ['top', 'left: 0', 'margin-left: auto'])
 
         # Check consistency across pages
-        if all_pages_elements:
-            element_path = self._get_element_path(element)
-            matching_elements = sum(1 for e in all_pages_elements if self._get_element_path(e) == element_path)
-            scores['consistency_score'] = matching_elements / len(all_pages_elements)
+        if index is None and all_pages_elements:
+            index = DetectionIndex(all_pages_elements=all_pages_elements)
+        if index is not None and index.element_total:
+            scores['consistency_score'] = index.path_count(element) / index.element_total
 
         return scores
 
     async def analyze_image_technical(self, image_url: str, image_data: bytes) -> Dict[str, float]:
         """Analyze technical aspects of the image."""
+        return self._image_technical_scores(image_url, image_data)
+
+    def _image_technical_scores(self, image_url: str, image_data: bytes) -> Dict[str, float]:
         scores = {
             'aspect_ratio_score': 0.0,
             'transparency_score': 0.0,
@@ -140,6 +323,8 @@ class LogoDetectionStrategies:
         }
 
         try:
+            import magic
+
             # Check file format
             mime = magic.from_buffer(image_data, mime=True)
             scores['format_score'] = 1.0 if mime in ['image/svg+xml', 'image/png'] else 0.5
@@ -165,12 +350,16 @@ class LogoDetectionStrategies:
             scores['size_score'] = 1.0 if 5000 <= area <= 100000 else 0.0
 
         except Exception as e:
-            self.logger.error(f"Error analyzing image technical aspects: {e}")
+            emit(self.logger, logging.ERROR, 'detection_error', "Error analyzing image technical aspects: {error}",
+                 analysis='technical', error=e)
 
         return scores
 
     async def analyze_visual_characteristics(self, image_data: bytes, logo_candidate: LogoCandidate) -> Dict[str, float]:
         """Analyze visual characteristics of the image."""
+        return self._visual_characteristics_scores(image_data, logo_candidate)
+
+    def _visual_characteristics_scores(self, image_data: bytes, logo_candidate: LogoCandidate) -> Dict[str, float]:
         scores = {
             'text_presence_score': 0.0,
             'color_palette_score': 0.0,
@@ -179,6 +368,10 @@ class LogoDetectionStrategies:
         }
 
         try:
+            import cv2
+            import extcolors
+            pytesseract = load_pytesseract()
+
             # Convert to OpenCV format
             nparr = np.frombuffer(image_data, np.uint8)
             img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
@@ -189,19 +382,19 @@ class LogoDetectionStrategies:
             # Try PSM 7 (single line of text) first
             text = pytesseract.image_to_string(img, config='--psm 7 --oem 3')
             text = re.sub(r'[^a-zA-Z0-9\s]', '', text).strip()
-            print(f"DEBUG: OCR text (PSM 7): {text}")
+            emit(self.logger, logging.DEBUG, 'ocr_text', "OCR text (PSM {psm}): {text}", psm=7, text=text)
             
             # If no text found, try PSM 6 (uniform block of text)
             if not text:
                 text = pytesseract.image_to_string(img, config='--psm 6 --oem 3')
                 text = re.sub(r'[^a-zA-Z0-9\s]', '', text).strip()
-                print(f"DEBUG: OCR text (PSM 6): {text}")
+                emit(self.logger, logging.DEBUG, 'ocr_text', "OCR text (PSM {psm}): {text}", psm=6, text=text)
             
             # If still no text found, try PSM 3 (fully automatic page segmentation)
             if not text:
                 text = pytesseract.image_to_string(img, config='--psm 3 --oem 3')
                 text = re.sub(r'[^a-zA-Z0-9\s]', '', text).strip()
-                print(f"DEBUG: OCR text (PSM 3): {text}")
+                emit(self.logger, logging.DEBUG, 'ocr_text', "OCR text (PSM {psm}): {text}", psm=3, text=text)
             
             # Store the extracted text in the logo candidate
             logo_candidate.text = text
@@ -224,12 +417,22 @@ class LogoDetectionStrategies:
             scores['whitespace_score'] = white_pixels / total_pixels
 
         except Exception as e:
-            self.logger.error(f"Error analyzing visual characteristics: {e}")
+            emit(self.logger, logging.ERROR, 'detection_error', "Error analyzing visual characteristics: {error}",
+                 analysis='visual', error=e)
 
         return scores
 
-    async def analyze_multi_page_consistency(self, image_url: str, all_pages_images: List[Dict]) -> Dict[str, float]:
-        """Analyze image consistency across multiple pages."""
+    async def analyze_multi_page_consistency(self, image_url: str, all_pages_images: List[Dict],
+                                             index: Optional[DetectionIndex] = None) -> Dict[str, float]:
+        """Analyze image consistency across multiple pages.
+
+        Pass the crawl's ``DetectionIndex`` to look the URL up instead of scanning
+        ``all_pages_images``.
+        """
+        return self._multi_page_consistency_scores(image_url, all_pages_images, index)
+
+    def _multi_page_consistency_scores(self, image_url: str, all_pages_images: List[Dict],
+                                       index: Optional[DetectionIndex] = None) -> Dict[str, float]:
         scores = {
             'appearance_score': 0.0,
             'position_consistency_score': 0.0,
@@ -238,29 +441,35 @@ class LogoDetectionStrategies:
         }
 
         try:
+            if index is None:
+                index = DetectionIndex(all_pages_images=all_pages_images)
+            if not index.image_total:
+                return scores
+            occurrences = index.image_occurrences(image_url)
+
             # Count appearances
-            appearances = sum(1 for img in all_pages_images if img['url'] == image_url)
-            scores['appearance_score'] = appearances / len(all_pages_images)
+            scores['appearance_score'] = occurrences.count / index.image_total
 
             # Position consistency
-            positions = [img['position'] for img in all_pages_images if img['url'] == image_url]
-            scores['position_consistency_score'] = len(set(positions)) == 1
+            scores['position_consistency_score'] = len(occurrences.positions) == 1
 
             # Size consistency
-            sizes = [img['size'] for img in all_pages_images if img['url'] == image_url]
-            scores['size_consistency_score'] = len(set(sizes)) == 1
+            scores['size_consistency_score'] = len(occurrences.sizes) == 1
 
             # Template analysis (check if image appears in header/footer)
-            template_positions = [img['in_template'] for img in all_pages_images if img['url'] == image_url]
-            scores['template_score'] = all(template_positions)
+            scores['template_score'] = occurrences.always_in_template
 
         except Exception as e:
-            self.logger.error(f"Error analyzing multi-page consistency: {e}")
+            emit(self.logger, logging.ERROR, 'detection_error', "Error analyzing multi-page consistency: {error}",
+                 analysis='multi_page_consistency', error=e)
 
         return scores
 
     async def analyze_url_semantics(self, image_url: str) -> Dict[str, float]:
         """Analyze URL patterns and semantics."""
+        return self._url_semantics_scores(image_url)
+
+    def _url_semantics_scores(self, image_url: str) -> Dict[str, float]:
         scores = {
             'path_score': 0.0,
             'cdn_score': 0.0,
@@ -284,6 +493,9 @@ class LogoDetectionStrategies:
 
     async def analyze_metadata(self, image_data: bytes) -> Dict[str, float]:
         """Analyze image metadata."""
+        return self._metadata_scores(image_data)
+
+    def _metadata_scores(self, image_data: bytes) -> Dict[str, float]:
         scores = {
             'copyright_score': 0.0,
             'software_score': 0.0,
@@ -311,12 +523,17 @@ class LogoDetectionStrategies:
             scores['guidelines_score'] = 'brand' in str(metadata).lower() or 'guidelines' in str(metadata).lower()
 
         except Exception as e:
-            self.logger.error(f"Error analyzing metadata: {e}")
+            emit(self.logger, logging.ERROR, 'detection_error', "Error analyzing metadata: {error}",
+                 analysis='metadata', error=e)
 
         return scores
 
-    async def analyze_social_media(self, domain: str) -> Dict[str, float]:
-        """Analyze social media presence and cross-reference logos."""
+    async def analyze_social_media(self, domain: str, html: Optional[str] = None) -> Dict[str, float]:
+        """Analyze social media presence and cross-reference logos.
+
+        The blocking Twitter lookup runs on the shared executor. Pass the homepage
+        ``html`` when it has already been downloaded to avoid fetching it again.
+        """
         scores = {
             'twitter_match_score': 0.0,
             'og_image_score': 0.0,
@@ -326,44 +543,55 @@ class LogoDetectionStrategies:
         try:
             # Check Twitter profile image
             if self.twitter_client:
-                try:
-                    # Search for the company's Twitter account
-                    query = f"url:{domain}"
-                    response = self.twitter_client.search_recent_tweets(query=query, max_results=10)
-                    if response.data:
-                        for tweet in response.data:
-                            if domain in tweet.text.lower():
-                                author_id = tweet.author_id
-                                user = self.twitter_client.get_user(id=author_id)
-                                if user.data:
-                                    profile_image_url = user.data.profile_image_url
-                                    scores['twitter_match_score'] = 1.0
-                except Exception as e:
-                    self.logger.warning(f"Twitter API error: {e}")
+                loop = asyncio.get_running_loop()
+                scores['twitter_match_score'] = await loop.run_in_executor(
+                    self.executor, self._twitter_match_score, domain)
 
             # Check OpenGraph and Twitter Card images
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"https://{domain}") as response:
-                    if response.status == 200:
+            if html is None:
+                async with aiohttp.ClientSession() as session:
+                    async with session.get(f"https://{domain}") as response:
+                        if response.status != 200:
+                            return scores
                         html = await response.text()
-                        soup = BeautifulSoup(html, 'html.parser')
-                        
-                        og_image = soup.find('meta', property='og:image')
-                        twitter_image = soup.find('meta', name='twitter:image')
-                        
-                        scores['og_image_score'] = 1.0 if og_image or twitter_image else 0.0
 
-                        # Check favicon
-                        favicon = soup.find('link', rel='icon') or soup.find('link', rel='shortcut icon')
-                        scores['favicon_score'] = 1.0 if favicon else 0.0
+            soup = BeautifulSoup(html, 'html.parser')
+
+            og_image = soup.find('meta', property='og:image')
+            twitter_image = soup.find('meta', attrs={'name': 'twitter:image'})
+
+            scores['og_image_score'] = 1.0 if og_image or twitter_image else 0.0
+
+            # Check favicon
+            favicon = soup.find('link', rel='icon') or soup.find('link', rel='shortcut icon')
+            scores['favicon_score'] = 1.0 if favicon else 0.0
 
         except Exception as e:
-            self.logger.error(f"Error analyzing social media: {e}")
+            emit(self.logger, logging.ERROR, 'detection_error', "Error analyzing social media: {error}",
+                 analysis='social_media', error=e)
 
         return scores
 
+    def _twitter_match_score(self, domain: str) -> float:
+        try:
+            # Search for the company's Twitter account
+            query = f"url:{domain}"
+            response = self.twitter_client.search_recent_tweets(query=query, max_results=10)
+            if response.data:
+                for tweet in response.data:
+                    if domain in tweet.text.lower():
+                        user = self.twitter_client.get_user(id=tweet.author_id)
+                        if user.data:
+                            return 1.0
+        except Exception as e:
+            emit(self.logger, logging.WARNING, 'twitter_error', "Twitter API error: {error}", error=e)
+        return 0.0
+
     async def analyze_schema_markup(self, html: str) -> Dict[str, float]:
         """Analyze schema.org and SEO markup."""
+        return self._schema_markup_scores(html)
+
+    def _schema_markup_scores(self, html: str) -> Dict[str, float]:
         scores = {
             'schema_score': 0.0,
             'json_ld_score': 0.0,
@@ -398,73 +626,121 @@ class LogoDetectionStrategies:
                     break
 
         except Exception as e:
-            self.logger.error(f"Error analyzing schema markup: {e}")
+            emit(self.logger, logging.ERROR, 'detection_error', "Error analyzing schema markup: {error}",
+                 analysis='schema_markup', error=e)
 
         return scores
 
-    def _get_element_path(self, element: Tag) -> str:
-        """Get a unique path for an element in the DOM."""
+    async def run_analyses(self, image_url: str, page_url: str, image_data: bytes = b'',
+                           element: Optional[Tag] = None, page_html: Optional[str] = None,
+                           candidate: Optional[LogoCandidate] = None,
+                           index: Optional[DetectionIndex] = None,
+                           analyses: Optional[Iterable[str]] = None,
+                           timeouts: Optional[Dict[str, float]] = None) -> Dict[str, Dict[str, float]]:
+        """Run the selected analyses concurrently and return their scores by name.
+
+        Analyses working on in-memory data run on the shared executor, while
+        ``social_media`` awaits the network on the event loop. Each analysis is
+        bounded by its timeout; analyses that time out, fail or lack their inputs
+        are left out of the result. A timed-out executor job is abandoned, not
+        interrupted. Each analysis is traced as a ``detection.<name>`` span.
+
+        Args:
+            analyses: Names from ``ANALYSES`` to run (default: all of them)
+            timeouts: Per-analysis timeouts in seconds, overriding ``analysis_timeouts``
+        """
+        selected = self.ANALYSES if analyses is None else tuple(analyses)
+        unknown = set(selected) - set(self.ANALYSES)
+        if unknown:
+            raise ValueError(f"Unknown detection analyses: {sorted(unknown)}")
+
+        if candidate is None:
+            candidate = LogoCandidate(url=image_url, score=0.0, features={}, metadata={},
+                                      image_url=image_url, page_url=page_url)
+
+        loop = asyncio.get_running_loop()
+
+        def offload(func, *args):
+            return loop.run_in_executor(self.executor, func, *args)
+
+        # name -> (inputs available, factory for the awaitable)
+        factories = {
+            'html_context': (element is not None,
+                             lambda: offload(self._html_context_scores, element, page_url)),
+            'structural_position': (element is not None,
+                                    lambda: offload(self._structural_position_scores, element, [], index)),
+            'technical': (bool(image_data),
+                          lambda: offload(self._image_technical_scores, image_url, image_data)),
+            'visual': (bool(image_data),
+                       lambda: offload(self._visual_characteristics_scores, image_data, candidate)),
+            'url_semantics': (True, lambda: offload(self._url_semantics_scores, image_url)),
+            'metadata': (bool(image_data), lambda: offload(self._metadata_scores, image_data)),
+            'multi_page_consistency': (index is not None and index.image_total > 0,
+                                       lambda: offload(self._multi_page_consistency_scores, image_url, [], index)),
+            'social_media': (True, lambda: self.analyze_social_media(extract_domain(page_url), page_html)),
+            'schema_markup': (bool(page_html), lambda: offload(self._schema_markup_scores, page_html)),
+        }
+        limits = {**self.analysis_timeouts, **(timeouts or {})}
+
+        async def bounded(name: str):
+            with span(f"detection.{name}") as analysis_span:
+                try:
+                    return await asyncio.wait_for(factories[name][1](),
+                                                  limits.get(name, self.DEFAULT_ANALYSIS_TIMEOUT))
+                except asyncio.TimeoutError:
+                    analysis_span.set(timed_out=True)
+                    emit(self.logger, logging.WARNING, 'detection_timeout', "Detection analysis '{analysis}' timed out for {image_url}",
+                         analysis=name, image_url=image_url)
+                except Exception as e:
+                    analysis_span.set(failed=str(e))
+                    emit(self.logger, logging.ERROR, 'detection_error', "Detection analysis '{analysis}' failed for {image_url}: {error}",
+                         analysis=name, image_url=image_url, error=e)
+                return None
+
+        names = [name for name in selected if factories[name][0]]
+        results = await asyncio.gather(*(bounded(name) for name in names))
+        return {name: scores for name, scores in zip(names, results) if scores is not None}
+
+    def _get_element_path(self, element: Tag, index: Optional[DetectionIndex] = None) -> str:
+        """Get a unique path for an element in the DOM.
+
+        Each ancestor contributes ``name[i]`` where ``i`` is its position among
+        same-named siblings.
+        """
+        if index is not None:
+            return index.element_path(element)
         path = []
         for parent in element.parents:
-            siblings = parent.find_all(parent.name, recursive=False)
-            path.append(f"{parent.name}[{list(siblings).index(parent)}]")
+            position = sum(1 for sibling in parent.find_previous_siblings(parent.name))
+            path.append(f"{parent.name}[{position}]")
         return ' > '.join(reversed(path))
 
+    async def get_final_score(self, detection_scores: Dict[str, Dict[str, float]]) -> float:
+        """Combine detection scores into a single 0-1 score (see DEFAULT_FEATURE_WEIGHTS)."""
+        return float(FeatureMatrix.from_detection_scores([detection_scores]).weighted_scores()[0])
+
     async def calculate_rank_score(self, logo_candidate: LogoCandidate) -> float:
         """Calculate a rank score for a logo candidate."""
         try:
-            # Extract domain name without TLD and clean it
             full_domain = extract_domain(logo_candidate.page_url)
-            domain_name = full_domain.split('.')[0].lower()
-            domain_name = re.sub(r'[^a-z0-9\s]', '', domain_name).strip()
-            
-            # Clean and check logo text
-            logo_text = logo_candidate.text.lower() if hasattr(logo_candidate, 'text') and logo_candidate.text else ''
-            # Clean OCR text by removing special characters and extra whitespace
-            logo_text = re.sub(r'[^a-z0-9\s]', '', logo_text).strip()
-            # Split into words and check each word
-            logo_words = logo_text.split()
-            
-            # Check for domain match - either exact match or domain is a word in the logo text
-            is_domain_match = domain_name == logo_text or any(word == domain_name for word in logo_words)
+            domain_name = brand_name(logo_candidate.page_url)
+            logo_words = logo_text_words(logo_candidate.text)
+            logo_text = ' '.join(logo_words)
+            is_domain_match = domain_name in logo_words
             
             # Check if logo is in header/navigation
             is_header = logo_candidate.location.lower() == 'header/navigation'
             
-            # Debug logging
-            print(f"\nDEBUG: Calculating rank score for logo at {logo_candidate.image_url}")
-            print(f"DEBUG: Full domain: {full_domain}")
-            print(f"DEBUG: Domain name (without TLD): {domain_name}")
-            print(f"DEBUG: Logo text: {logo_text}")
-            print(f"DEBUG: Logo words: {logo_words}")
-            print(f"DEBUG: Is domain match: {is_domain_match}")
-            print(f"DEBUG: Is header: {is_header}")
-            
-            # Calculate rank score
-            rank_score = 0.0
-            
-            # If it's a domain match in header, it's definitely the main logo
-            if is_domain_match and is_header:
-                print(f"DEBUG: Found main logo! Domain match and header location.")
-                rank_score = 2.0  # Highest possible score
-            elif is_header:
-                print(f"DEBUG: Header logo but no domain match.")
-                rank_score = 1.0  # Header logos get at least 1.0
-            elif is_domain_match:
-                print(f"DEBUG: Domain match but not in header.")
-                rank_score = 0.9  # Domain match in main content
-            else:
-                print(f"DEBUG: No domain match and not in header.")
-                rank_score = 0.5  # Default score for other logos
-            
-            # Add a small bonus to header logos to ensure they rank higher when scores are equal
-            if is_header:
-                rank_score += 0.01
-            
-            print(f"DEBUG: Final rank score: {rank_score}")
+            rank_score = location_match_score(is_header, is_domain_match)
+            emit(self.logger, logging.DEBUG, 'rank_score',
+                 "Rank score {rank_score} for {image_url} (domain {domain_name}, logo text {logo_text!r}, "
+                 "domain match {is_domain_match}, header {is_header})",
+                 image_url=logo_candidate.image_url, full_domain=full_domain, domain_name=domain_name,
+                 logo_text=logo_text, logo_words=logo_words, is_domain_match=is_domain_match,
+                 is_header=is_header, rank_score=rank_score)
             return rank_score
         except Exception as e:
-            print(f"Error calculating rank score: {e}")
+            emit(self.logger, logging.ERROR, 'rank_score_error', "Error calculating rank score: {error}", error=e)
             return 0.0
 
     async def analyze_logo(self, logo_info: Dict[str, Any]) -> LogoCandidate:
@@ -473,35 +749,32 @@ class LogoDetectionStrategies:
             # Create logo candidate with initial score
             logo_candidate = LogoCandidate(
                 url=logo_info.get("url", ""),
-                score=logo_info.get("score", 0.0)
+                score=logo_info.get("score", 0.0),
+                features={},
+                metadata={},
+                image_url=logo_info.get("url", ""),
+                page_url=logo_info.get("page_url", ""),
             )
             
             # Initialize visual characteristics
             logo_candidate.visual_characteristics = {}
             
-            # Analyze visual characteristics
-            await self.analyze_visual_characteristics(logo_info.get('image_data', b''), logo_candidate)
-            
-            # Analyze HTML context
-            await self.analyze_html_context(logo_info['element'], logo_info['page_url'])
-            
-            # Analyze structural position
-            await self.analyze_structural_position(logo_info['element'], logo_info.get('all_pages_elements', []))
-            
-            # Analyze URL semantics
-            await self.analyze_url_semantics(logo_info['url'])
-            
-            # Analyze image technical characteristics
-            await self.analyze_image_technical(logo_info['url'], logo_info.get('image_data', b''))
-            
-            # Analyze multi-page consistency
-            await self.analyze_multi_page_consistency(logo_info['url'], logo_info.get('all_pages_images', []))
-            
-            # Analyze social media presence
-            await self.analyze_social_media(extract_domain(logo_info['page_url']))
-            
-            # Analyze schema markup
-            await self.analyze_schema_markup(logo_info['element'])
+            # Cross-page lookups share one index per crawl when the caller provides it
+            index = logo_info.get('index') or DetectionIndex(logo_info.get('all_pages_elements'),
+                                                             logo_info.get('all_pages_images'))
+
+            # Run the independent analyses concurrently
+            element = logo_info['element']
+            logo_candidate.metadata['detection_scores'] = await self.run_analyses(
+                image_url=logo_info['url'],
+                page_url=logo_info['page_url'],
+                image_data=logo_info.get('image_data', b''),
+                element=element,
+                page_html=logo_info.get('page_html') or str(element),
+                candidate=logo_candidate,
+                index=index,
+                analyses=logo_info.get('analyses'),
+            )
             
             # Extract text from image using OCR
             try:
@@ -510,7 +783,7 @@ class LogoDetectionStrategies:
                 extracted_text = ""
                 for psm in psm_modes:
                     try:
-                        text = pytesseract.image_to_string(Image.open(io.BytesIO(logo_info.get('image_data', b'') if logo_info.get('image_data') else b'')), config=f'--psm {psm} --oem 3')
+                        text = load_pytesseract().image_to_string(Image.open(io.BytesIO(logo_info.get('image_data', b'') if logo_info.get('image_data') else b'')), config=f'--psm {psm} --oem 3')
                         if text:
                             extracted_text = text
                             break
@@ -518,7 +791,7 @@ class LogoDetectionStrategies:
                         continue
                 logo_candidate.text = extracted_text
             except Exception as e:
-                print(f"Error extracting text from image: {str(e)}")
+                emit(self.logger, logging.ERROR, 'ocr_error', "Error extracting text from image: {error}", error=e)
             
             # Check if this is likely the main logo based on location and text
             if (logo_candidate.location.lower() == 'header/navigation' and 
@@ -536,12 +809,12 @@ class LogoDetectionStrategies:
                     logo_candidate.classification = "unknown"
             
             # Calculate final rank score
-            logo_candidate.score = self.calculate_rank_score(logo_candidate)
+            logo_candidate.score = await self.calculate_rank_score(logo_candidate)
             
             return logo_candidate
             
         except Exception as e:
-            print(f"Error analyzing logo: {str(e)}")
+            emit(self.logger, logging.ERROR, 'logo_analysis_error', "Error analyzing logo: {error}", error=e)
             return None 
 
 class LogoResult(BaseModel):
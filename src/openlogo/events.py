@@ -0,0 +1,59 @@
+import json
+import logging
+import sys
+from typing import Any, Dict, Optional, TextIO, Union
+
+# The library is silent unless the application configures logging
+logging.getLogger('openlogo').addHandler(logging.NullHandler())
+
+
+class _Event:
+    """Log message formatted from its fields only when a handler emits it."""
+    __slots__ = ('template', 'fields')
+
+    def __init__(self, template: str, fields: Dict[str, Any]):
+        self.template = template
+        self.fields = fields
+
+    def __str__(self) -> str:
+        return self.template.format(**self.fields)
+
+
+def emit(logger: logging.Logger, level: int, event: str, template: str, exc_info: bool = False, **fields: Any):
+    """Log ``event`` with its ``fields`` attached to the record (``record.event``, ``record.fields``).
+
+    ``template`` is a ``str.format`` template over ``fields``. Nothing is built
+    when ``level`` is disabled, and the text is only formatted by a handler.
+    """
+    if logger.isEnabledFor(level):
+        logger.log(level, _Event(template, fields), exc_info=exc_info, stacklevel=2,
+                   extra={'event': event, 'fields': fields})
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, event, message and the event fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            **getattr(record, 'fields', {}),
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'event': getattr(record, 'event', None),
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
+
+
+def configure_logging(level: Union[int, str] = logging.INFO, json_format: bool = False,
+                      stream: Optional[TextIO] = None) -> logging.Handler:
+    """Send openlogo's events at ``level`` and above to ``stream`` (stderr), as text or JSON lines."""
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(JSONFormatter() if json_format
+                         else logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    package_logger = logging.getLogger('openlogo')
+    package_logger.addHandler(handler)
+    package_logger.setLevel(level)
+    return handler
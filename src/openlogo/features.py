@@ -0,0 +1,144 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Fixed (analysis, score) layout of the detection_scores produced by
+# LogoDetectionStrategies.run_analyses. The order is part of every persisted model,
+# so only append to it.
+FEATURE_SCHEMA: Tuple[Tuple[str, str], ...] = (
+    ('html_context', 'class_score'),
+    ('html_context', 'alt_text_score'),
+    ('html_context', 'homepage_link_score'),
+    ('html_context', 'brand_proximity_score'),
+    ('structural_position', 'dom_depth_score'),
+    ('structural_position', 'position_score'),
+    ('structural_position', 'consistency_score'),
+    ('technical', 'aspect_ratio_score'),
+    ('technical', 'transparency_score'),
+    ('technical', 'format_score'),
+    ('technical', 'filename_score'),
+    ('technical', 'size_score'),
+    ('visual', 'text_presence_score'),
+    ('visual', 'color_palette_score'),
+    ('visual', 'geometric_score'),
+    ('visual', 'whitespace_score'),
+    ('url_semantics', 'path_score'),
+    ('url_semantics', 'cdn_score'),
+    ('url_semantics', 'versioning_score'),
+    ('metadata', 'copyright_score'),
+    ('metadata', 'software_score'),
+    ('metadata', 'date_score'),
+    ('metadata', 'guidelines_score'),
+    ('multi_page_consistency', 'appearance_score'),
+    ('multi_page_consistency', 'position_consistency_score'),
+    ('multi_page_consistency', 'size_consistency_score'),
+    ('multi_page_consistency', 'template_score'),
+    ('social_media', 'twitter_match_score'),
+    ('social_media', 'og_image_score'),
+    ('social_media', 'favicon_score'),
+    ('schema_markup', 'schema_score'),
+    ('schema_markup', 'json_ld_score'),
+    ('schema_markup', 'meta_score'),
+)
+
+FEATURE_NAMES: Tuple[str, ...] = tuple(f"{analysis}.{score}" for analysis, score in FEATURE_SCHEMA)
+
+
+ANALYSES: Tuple[str, ...] = tuple(dict.fromkeys(analysis for analysis, _ in FEATURE_SCHEMA))
+_ANALYSIS_COLUMNS: Dict[str, List[Tuple[int, str]]] = {}
+for _column, (_analysis, _score) in enumerate(FEATURE_SCHEMA):
+    _ANALYSIS_COLUMNS.setdefault(_analysis, []).append((_column, _score))
+del _column, _analysis, _score
+
+# Relative weight of each feature in the heuristic score. Direct markup/URL
+# evidence of a logo counts more than generic image properties.
+DEFAULT_FEATURE_WEIGHTS: Dict[str, float] = {name: 1.0 for name in FEATURE_NAMES}
+DEFAULT_FEATURE_WEIGHTS.update({
+    'html_context.class_score': 3.0,
+    'html_context.alt_text_score': 3.0,
+    'html_context.homepage_link_score': 3.0,
+    'technical.filename_score': 2.0,
+    'url_semantics.path_score': 2.0,
+    'multi_page_consistency.template_score': 2.0,
+    'visual.whitespace_score': 0.5,
+    'url_semantics.cdn_score': 0.5,
+    'url_semantics.versioning_score': 0.5,
+    'metadata.date_score': 0.5,
+})
+
+
+def weight_vector(weights: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """Weights in FEATURE_SCHEMA order; names missing from ``weights`` get 0."""
+    weights = DEFAULT_FEATURE_WEIGHTS if weights is None else weights
+    unknown = set(weights) - set(FEATURE_NAMES)
+    if unknown:
+        raise ValueError(f"Unknown features: {sorted(unknown)}")
+    return np.array([weights.get(name, 0.0) for name in FEATURE_NAMES], dtype=np.float64)
+
+
+class FeatureMatrix:
+    """Detection scores of a batch of candidates as one array.
+
+    Rows are candidates and columns follow FEATURE_SCHEMA, so scoring and ranking a
+    whole page is a single matrix-vector product. A per-analysis mask records which
+    analyses actually ran, so ``to_detection_scores`` reproduces the dict format
+    used by ``LogoResult`` at the output boundary.
+    """
+
+    __slots__ = ('values', 'present')
+
+    def __init__(self, values: np.ndarray, present: Optional[np.ndarray] = None):
+        if values.ndim != 2 or values.shape[1] != len(FEATURE_SCHEMA):
+            raise ValueError(f"Expected an (n, {len(FEATURE_SCHEMA)}) array, got {values.shape}")
+        self.values = values
+        self.present = present if present is not None else np.ones((len(values), len(ANALYSES)), dtype=bool)
+
+    @classmethod
+    def allocate(cls, rows: int) -> "FeatureMatrix":
+        """Zeroed matrix to be filled with ``set_row``; no analyses marked as run."""
+        return cls(np.zeros((rows, len(FEATURE_SCHEMA)), dtype=np.float64),
+                   np.zeros((rows, len(ANALYSES)), dtype=bool))
+
+    @classmethod
+    def from_detection_scores(cls, samples: Sequence[Dict[str, Dict[str, float]]]) -> "FeatureMatrix":
+        matrix = cls.allocate(len(samples))
+        for row, detection_scores in enumerate(samples):
+            matrix.set_row(row, detection_scores)
+        return matrix
+
+    def set_row(self, row: int, detection_scores: Dict[str, Dict[str, float]]):
+        for position, analysis in enumerate(ANALYSES):
+            scores = detection_scores.get(analysis)
+            if scores is None:
+                continue
+            self.present[row, position] = True
+            for column, score in _ANALYSIS_COLUMNS[analysis]:
+                self.values[row, column] = float(scores.get(score, 0.0) or 0.0)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def take(self, rows: Sequence[int]) -> "FeatureMatrix":
+        rows = np.asarray(rows, dtype=np.intp)
+        return FeatureMatrix(self.values[rows], self.present[rows])
+
+    def to_detection_scores(self, row: int) -> Dict[str, Dict[str, float]]:
+        """Rebuild the nested dict for one candidate (output boundary only)."""
+        values = self.values[row]
+        return {
+            analysis: {score: float(values[column]) for column, score in _ANALYSIS_COLUMNS[analysis]}
+            for position, analysis in enumerate(ANALYSES)
+            if self.present[row, position]
+        }
+
+    def weighted_scores(self, weights: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """Weighted mean of the features per candidate, each in [0, 1]."""
+        vector = weight_vector(weights)
+        total = float(vector.sum())
+        if total <= 0:
+            raise ValueError("Feature weights must sum to a positive value")
+        return self.values @ vector / total
+
+    def rank(self, weights: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """Row indices ordered from the best to the worst weighted score (stable on ties)."""
+        return np.argsort(-self.weighted_scores(weights), kind='stable')
@@ -0,0 +1,136 @@
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+# Declared sources, best first. JSON-LD Organization.logo is the site's own
+# statement of its logo; og:image is frequently a share banner.
+ICON_SOURCES = ('json_ld', 'apple-touch-icon', 'manifest', 'icon', 'og:image')
+
+# Confidence reported for a validated icon of each source
+ICON_SOURCE_CONFIDENCE = {
+    'json_ld': 0.9,
+    'apple-touch-icon': 0.85,
+    'manifest': 0.85,
+    'icon': 0.8,
+    'og:image': 0.7,
+}
+
+ORGANIZATION_TYPES = {'organization', 'corporation', 'localbusiness', 'brand', 'ngo',
+                      'educationalorganization', 'governmentorganization', 'newsmediaorganization'}
+
+
+@dataclass
+class DeclaredIcon:
+    url: str
+    source: str
+    declared_size: int = 0  # Largest declared side in pixels, 0 if unknown
+
+    @property
+    def confidence(self) -> float:
+        return ICON_SOURCE_CONFIDENCE[self.source]
+
+
+def parse_sizes(sizes: Optional[str]) -> int:
+    """Largest side from a ``sizes`` attribute ("32x32 192x192"); "any" (SVG) counts as 512."""
+    if not sizes:
+        return 0
+    largest = 0
+    for token in sizes.lower().split():
+        if token == 'any':
+            largest = max(largest, 512)
+            continue
+        match = re.fullmatch(r'(\d+)x(\d+)', token)
+        if match:
+            largest = max(largest, int(match.group(1)), int(match.group(2)))
+    return largest
+
+
+def _walk_json_ld(data: Any) -> Iterator[Dict]:
+    if isinstance(data, list):
+        for item in data:
+            yield from _walk_json_ld(item)
+    elif isinstance(data, dict):
+        yield data
+        for key in ('@graph', 'publisher', 'brand', 'author', 'organization'):
+            if key in data:
+                yield from _walk_json_ld(data[key])
+
+
+def _json_ld_logo_url(logo: Any) -> Optional[str]:
+    if isinstance(logo, str):
+        return logo
+    if isinstance(logo, list) and logo:
+        return _json_ld_logo_url(logo[0])
+    if isinstance(logo, dict):
+        return logo.get('url') or logo.get('contentUrl')
+    return None
+
+
+def _is_organization(node: Dict) -> bool:
+    types = node.get('@type', [])
+    types = types if isinstance(types, list) else [types]
+    return any(str(t).lower() in ORGANIZATION_TYPES for t in types)
+
+
+def extract_declared_icons(soup: BeautifulSoup, base_url: str) -> Tuple[List[DeclaredIcon], Optional[str]]:
+    """Collect the brand assets a page declares in its markup.
+
+    Returns the icons found in the HTML and the URL of the web app manifest, if
+    one is linked (its icons are read with ``parse_manifest_icons``).
+    """
+    icons: List[DeclaredIcon] = []
+
+    for script in soup.find_all('script', type='application/ld+json'):
+        try:
+            data = json.loads(script.string or '')
+        except (json.JSONDecodeError, TypeError):
+            continue
+        for node in _walk_json_ld(data):
+            if _is_organization(node):
+                logo_url = _json_ld_logo_url(node.get('logo'))
+                if logo_url:
+                    icons.append(DeclaredIcon(urljoin(base_url, logo_url), 'json_ld'))
+
+    manifest_url = None
+    for link in soup.find_all('link', href=True):
+        rel = {r.lower() for r in (link.get('rel') or [])}
+        href = urljoin(base_url, link['href'])
+        if 'manifest' in rel:
+            manifest_url = manifest_url or href
+        elif rel & {'apple-touch-icon', 'apple-touch-icon-precomposed'}:
+            # Apple touch icons default to 180px when sizes is omitted
+            icons.append(DeclaredIcon(href, 'apple-touch-icon', parse_sizes(link.get('sizes')) or 180))
+        elif 'icon' in rel:
+            icons.append(DeclaredIcon(href, 'icon', parse_sizes(link.get('sizes'))))
+
+    for meta in soup.find_all('meta', content=True):
+        if (meta.get('property') or meta.get('name') or '').lower() == 'og:image':
+            icons.append(DeclaredIcon(urljoin(base_url, meta['content']), 'og:image'))
+
+    return icons, manifest_url
+
+
+def parse_manifest_icons(manifest: Dict, manifest_url: str) -> List[DeclaredIcon]:
+    """Icons listed in a web app manifest, resolved against the manifest URL."""
+    icons = []
+    for icon in manifest.get('icons') or []:
+        if isinstance(icon, dict) and icon.get('src'):
+            icons.append(DeclaredIcon(urljoin(manifest_url, icon['src']), 'manifest',
+                                      parse_sizes(icon.get('sizes'))))
+    return icons
+
+
+def rank_declared_icons(icons: List[DeclaredIcon]) -> List[DeclaredIcon]:
+    """Best source first, larger declared size first within a source, one entry per URL."""
+    ranked = sorted(icons, key=lambda icon: (ICON_SOURCES.index(icon.source), -icon.declared_size))
+    seen = set()
+    unique = []
+    for icon in ranked:
+        if icon.url not in seen and not icon.url.startswith('data:'):
+            seen.add(icon.url)
+            unique.append(icon)
+    return unique
@@ -0,0 +1,480 @@
+import asyncio
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Union
+
+import aiohttp
+
+from .metrics import MetricsRegistry
+from .tracing import span
+
+# Rough prompt cost of one image part; the default "auto" detail of a small logo
+# stays well below this, so the tokens/min bucket errs on the safe side.
+IMAGE_TOKEN_ESTIMATE = 765
+
+RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+# Statuses that point at the endpoint (bad key, missing deployment) rather than
+# the request; another endpoint of the pool may still serve it.
+ENDPOINT_ERROR_STATUSES = {401, 403, 404}
+
+
+class LLMError(Exception):
+    """A chat completion request failed after all retries."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass
+class LLMEndpoint:
+    """A chat completions endpoint: regular OpenAI or an Azure OpenAI deployment.
+
+    ``weight`` is the endpoint's share of traffic in an ``EndpointPool``;
+    ``requests_per_minute`` / ``tokens_per_minute`` are its own quota, if known.
+    """
+    url: str
+    api_key: str
+    azure: bool = False
+    model: str = "gpt-4o-mini"
+    weight: float = 1.0
+    requests_per_minute: Optional[float] = None
+    tokens_per_minute: Optional[float] = None
+
+    @classmethod
+    def openai(cls, api_key: str, base_url: str = "https://api.openai.com/v1", model: str = "gpt-4o-mini",
+               **kwargs) -> "LLMEndpoint":
+        return cls(url=f"{base_url.rstrip('/')}/chat/completions", api_key=api_key, model=model, **kwargs)
+
+    @classmethod
+    def azure_deployment(cls, api_key: str, resource: str = "scailetech", deployment: str = "gpt-4o-mini",
+                         api_version: str = "2023-03-15-preview", **kwargs) -> "LLMEndpoint":
+        url = (f"https://{resource}.openai.azure.com/openai/deployments/{deployment}"
+               f"/chat/completions?api-version={api_version}")
+        return cls(url=url, api_key=api_key, azure=True, model=deployment, **kwargs)
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        if self.azure:
+            return {'Content-Type': 'application/json', 'api-key': self.api_key}
+        return {'Content-Type': 'application/json', 'Authorization': f'Bearer {self.api_key}'}
+
+    def payload(self, messages: List[Dict], max_tokens: int) -> Dict[str, Any]:
+        # Azure selects the model through the deployment in the URL
+        data = {"messages": messages, "max_tokens": max_tokens}
+        if not self.azure:
+            data["model"] = self.model
+        return data
+
+
+def estimate_tokens(messages: List[Dict], max_tokens: int) -> int:
+    """Upper-bound token cost of a request, for the tokens/min limit."""
+    tokens = max_tokens
+    for message in messages:
+        content = message.get('content')
+        parts = content if isinstance(content, list) else [{'type': 'text', 'text': content or ''}]
+        for part in parts:
+            if part.get('type') == 'image_url':
+                tokens += IMAGE_TOKEN_ESTIMATE
+            else:
+                tokens += len(part.get('text') or '') // 4 + 4
+    return tokens
+
+
+def parse_retry_after(headers: Any, now: Optional[datetime] = None) -> Optional[float]:
+    """Seconds to wait from ``retry-after-ms`` / ``Retry-After`` (seconds or HTTP date)."""
+    value = headers.get('retry-after-ms')
+    if value:
+        try:
+            return max(0.0, float(value) / 1000.0)
+        except ValueError:
+            pass
+    value = headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    now = now or datetime.now(timezone.utc)
+    return max(0.0, (when - now).total_seconds())
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``rate_per_minute``.
+
+    ``reserve`` takes the tokens immediately, letting the balance go negative, and
+    returns how long the caller must wait before using them. Callers are therefore
+    served in arrival order and the long-run rate never exceeds the limit.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be positive")
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        self._refill()
+        self.tokens -= amount
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def delay(self, amount: float) -> float:
+        """How long a reservation of ``amount`` made now would wait, without making it."""
+        self._refill()
+        return max(0.0, (amount - self.tokens) / self.rate)
+
+    def refund(self, amount: float):
+        """Return over-reserved tokens (or charge more with a negative amount)."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class RateLimiter:
+    """Requests/min and tokens/min limits plus a shared pause for ``Retry-After``."""
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.requests = TokenBucket(requests_per_minute, clock=clock) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, clock=clock) if tokens_per_minute else None
+        self.paused_until = 0.0
+
+    def pause(self, seconds: float):
+        """Hold every request until ``seconds`` from now (provider asked us to back off)."""
+        self.paused_until = max(self.paused_until, self.clock() + seconds)
+
+    async def acquire(self, tokens: int):
+        while True:
+            wait = self.paused_until - self.clock()
+            if wait <= 0:
+                break
+            await asyncio.sleep(wait)
+        wait = 0.0
+        if self.requests:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens:
+            wait = max(wait, self.tokens.reserve(tokens))
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def delay(self, tokens: int) -> float:
+        """How long ``acquire(tokens)`` would wait if called now."""
+        wait = max(0.0, self.paused_until - self.clock())
+        if self.requests:
+            wait = max(wait, self.requests.delay(1))
+        if self.tokens:
+            wait = max(wait, self.tokens.delay(tokens))
+        return wait
+
+    def settle(self, estimated: int, actual: int):
+        """Correct the tokens/min bucket once the response reports real usage."""
+        if self.tokens:
+            self.tokens.refund(estimated - actual)
+
+
+class EndpointState:
+    """Load, quota and health of one endpoint of a pool."""
+
+    def __init__(self, endpoint: LLMEndpoint, clock: Callable[[], float] = time.monotonic):
+        if endpoint.weight <= 0:
+            raise ValueError("Endpoint weight must be positive")
+        self.endpoint = endpoint
+        self.clock = clock
+        self.rate_limiter = RateLimiter(endpoint.requests_per_minute, endpoint.tokens_per_minute, clock)
+        self.in_flight = 0
+        self.consecutive_failures = 0
+        self.unhealthy_until = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return self.clock() >= self.unhealthy_until
+
+    @property
+    def load(self) -> float:
+        """In-flight and queued requests per unit of weight, counting the one about to start."""
+        return (self.in_flight + 1) / self.endpoint.weight
+
+
+class EndpointPool:
+    """Weighted pool of chat completions endpoints with failover.
+
+    ``select`` picks the healthy endpoint whose quota can take the request
+    soonest and, among those, the lowest load (requests in flight or waiting
+    on its quota) relative to its weight, so traffic spreads in proportion to
+    the weights and drains away from slow or throttled deployments. An endpoint is taken out of rotation for the
+    provider's ``Retry-After`` on a 429, for ``cooldown`` seconds after
+    ``failure_threshold`` consecutive failures (5xx, timeouts, connection errors;
+    client errors such as a 400 for a bad payload do not count), and for
+    ``endpoint_error_cooldown`` on an auth/not-found error. When every endpoint is
+    out, the one that comes back first is used.
+    """
+
+    def __init__(self, endpoints: Sequence[LLMEndpoint], failure_threshold: int = 3, cooldown: float = 30.0,
+                 endpoint_error_cooldown: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        if not endpoints:
+            raise ValueError("EndpointPool needs at least one endpoint")
+        self.states = [EndpointState(endpoint, clock) for endpoint in endpoints]
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.endpoint_error_cooldown = endpoint_error_cooldown
+        self.clock = clock
+
+    @property
+    def endpoints(self) -> List[LLMEndpoint]:
+        return [state.endpoint for state in self.states]
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    def select(self, exclude: Sequence[EndpointState] = (), tokens: int = 0) -> EndpointState:
+        """Healthy endpoint with the shortest quota wait for ``tokens``, then the least load,
+        preferring ones not in ``exclude``."""
+        for candidates in ([s for s in self.states if s.healthy and s not in exclude],
+                           [s for s in self.states if s.healthy]):
+            if candidates:
+                return min(candidates, key=lambda s: (s.rate_limiter.delay(tokens), s.load, -s.endpoint.weight))
+        return min(self.states, key=lambda s: s.unhealthy_until)
+
+    def has_alternative(self, exclude: Sequence[EndpointState]) -> bool:
+        """True when a healthy endpoint outside ``exclude`` can take a retry."""
+        return any(state.healthy and state not in exclude for state in self.states)
+
+    def record_success(self, state: EndpointState):
+        state.consecutive_failures = 0
+
+    def record_failure(self, state: EndpointState, status: Optional[int] = None,
+                       retry_after: Optional[float] = None):
+        state.consecutive_failures += 1
+        now = self.clock()
+        if status == 429:
+            # Without Retry-After, back off exponentially in consecutive 429s
+            wait = retry_after if retry_after is not None else min(self.cooldown, 2.0 ** state.consecutive_failures)
+            state.rate_limiter.pause(wait)
+            state.unhealthy_until = max(state.unhealthy_until, now + wait)
+        elif status in ENDPOINT_ERROR_STATUSES:
+            state.unhealthy_until = max(state.unhealthy_until, now + self.endpoint_error_cooldown)
+        elif state.consecutive_failures >= self.failure_threshold:
+            state.unhealthy_until = max(state.unhealthy_until, now + self.cooldown)
+
+
+class AdaptiveConcurrency:
+    """AIMD limit on in-flight requests.
+
+    The limit grows by one after a full window of healthy responses and is cut by
+    ``decrease_factor`` on a 429, a timeout or connection error, or a latency spike
+    (``latency_spike_factor`` times the moving average), at most once per window so a burst of simultaneous
+    failures counts as a single congestion signal.
+    """
+
+    def __init__(self, initial: int = 4, minimum: int = 1, maximum: int = 32,
+                 decrease_factor: float = 0.5, latency_spike_factor: float = 3.0):
+        if not 1 <= minimum <= initial <= maximum:
+            raise ValueError("Concurrency limits must satisfy 1 <= minimum <= initial <= maximum")
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_factor = decrease_factor
+        self.latency_spike_factor = latency_spike_factor
+        self.in_flight = 0
+        self.average_latency: Optional[float] = None
+        self._samples = 0
+        self._successes = 0
+        # Responses since the last decrease; starts "a full window ago"
+        self._since_decrease = initial
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self):
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was handed over just before cancellation; pass it on
+                self.release()
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def on_success(self, latency: float):
+        self._samples += 1
+        if (self.average_latency is not None and self._samples > 5
+                and latency > self.latency_spike_factor * self.average_latency):
+            self.on_overload()
+            return
+        self._since_decrease += 1
+        self.average_latency = latency if self.average_latency is None else 0.8 * self.average_latency + 0.2 * latency
+        self._successes += 1
+        if self._successes >= self.limit and self.limit < self.maximum:
+            self.limit += 1
+            self._successes = 0
+            self._wake()
+
+    def on_overload(self):
+        self._successes = 0
+        self._since_decrease += 1
+        if self._since_decrease < self.limit:
+            return
+        self.limit = max(self.minimum, int(self.limit * self.decrease_factor))
+        self._since_decrease = 0
+
+
+class LLMClient:
+    """Chat completions client shared by every LLM call of a crawler.
+
+    Requests pass through the global rate limiter, the adaptive concurrency limit
+    and the quota of the endpoint chosen from the pool. Retryable failures (429,
+    5xx, timeouts, connection errors) are retried with exponential backoff and full
+    jitter, waiting at least as long as the provider's ``Retry-After``, which also
+    pauses every request to that endpoint. When another endpoint of the pool is
+    healthy and not yet tried for this request, the retry fails over to it
+    immediately instead. Requests, statuses, tokens and latency are counted in
+    ``metrics``.
+    """
+
+    def __init__(self, endpoint: Union[LLMEndpoint, EndpointPool, Sequence[LLMEndpoint]],
+                 requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                 concurrency: Optional[AdaptiveConcurrency] = None, max_retries: int = 5,
+                 base_delay: float = 0.5, max_delay: float = 30.0, request_timeout: float = 60.0,
+                 metrics: Optional[MetricsRegistry] = None):
+        if isinstance(endpoint, EndpointPool):
+            self.pool = endpoint
+        elif isinstance(endpoint, LLMEndpoint):
+            self.pool = EndpointPool([endpoint])
+        else:
+            self.pool = EndpointPool(list(endpoint))
+        self.rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self.concurrency = concurrency or AdaptiveConcurrency()
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.request_timeout = request_timeout
+        self.metrics = metrics if metrics is not None else MetricsRegistry()
+
+    @property
+    def endpoint(self) -> LLMEndpoint:
+        """The first endpoint of the pool."""
+        return self.pool.states[0].endpoint
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        return max(delay, retry_after or 0.0)
+
+    async def chat(self, messages: List[Dict], max_tokens: int = 300) -> Dict[str, Any]:
+        """Send a chat completion and return the decoded JSON response.
+
+        Traced as an ``llm`` span (endpoint, attempts, tokens), including the
+        time spent waiting for the rate limits.
+
+        Raises:
+            LLMError: On a non-retryable error or when retries are exhausted
+        """
+        with span('llm', max_tokens=max_tokens) as llm_span, self.metrics.timer('openlogo_stage_seconds', stage='llm'):
+            return await self._chat(messages, max_tokens, llm_span)
+
+    async def _chat(self, messages: List[Dict], max_tokens: int, llm_span) -> Dict[str, Any]:
+        estimated = estimate_tokens(messages, max_tokens)
+        last_error = "no attempt made"
+        last_status = None
+        failed: List[EndpointState] = []
+
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire(estimated)
+            state = self.pool.select(exclude=failed, tokens=estimated)
+            endpoint = state.endpoint
+            llm_span.set(endpoint=endpoint.url, attempts=attempt + 1)
+            # Counted as load while waiting for the endpoint's quota, so other callers see it
+            state.in_flight += 1
+            try:
+                await state.rate_limiter.acquire(estimated)
+                await self.concurrency.acquire()
+            except BaseException:
+                state.in_flight -= 1
+                raise
+            retry_after = None
+            started = time.monotonic()
+            try:
+                async with aiohttp.ClientSession() as session:
+                    async with session.post(endpoint.url, json=endpoint.payload(messages, max_tokens),
+                                            headers=endpoint.headers,
+                                            timeout=aiohttp.ClientTimeout(total=self.request_timeout)) as response:
+                        if response.status == 200:
+                            try:
+                                result = await response.json(content_type=None)
+                            except ValueError as e:
+                                raise LLMError(f"Invalid JSON response: {e}", response.status)
+                            self.concurrency.on_success(time.monotonic() - started)
+                            self.pool.record_success(state)
+                            usage = result.get('usage') or {}
+                            llm_span.set(status=response.status, total_tokens=usage.get('total_tokens'))
+                            self.metrics.inc('openlogo_llm_requests_total', status=response.status)
+                            for kind in ('prompt', 'completion'):
+                                if usage.get(f'{kind}_tokens'):
+                                    self.metrics.inc('openlogo_llm_tokens_total', usage[f'{kind}_tokens'], kind=kind)
+                            if usage.get('total_tokens'):
+                                self.rate_limiter.settle(estimated, usage['total_tokens'])
+                                state.rate_limiter.settle(estimated, usage['total_tokens'])
+                            return result
+
+                        last_status = response.status
+                        llm_span.set(status=response.status)
+                        self.metrics.inc('openlogo_llm_requests_total', status=response.status)
+                        last_error = f"API Error ({response.status}): {await response.text()}"
+                        retry_after = parse_retry_after(response.headers)
+                        if response.status in RETRYABLE_STATUSES or response.status in ENDPOINT_ERROR_STATUSES:
+                            # Other client errors (a bad image or prompt) say nothing about the endpoint
+                            self.pool.record_failure(state, response.status, retry_after)
+                        fails_over = (response.status in ENDPOINT_ERROR_STATUSES
+                                      and self.pool.has_alternative(failed + [state]))
+                        if response.status not in RETRYABLE_STATUSES and not fails_over:
+                            raise LLMError(last_error, response.status)
+                        if response.status == 429:
+                            self.concurrency.on_overload()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                last_status = None
+                last_error = f"HTTP error: {e!r}"
+                self.metrics.inc('openlogo_llm_requests_total', status='error')
+                self.pool.record_failure(state)
+                self.concurrency.on_overload()
+            finally:
+                state.in_flight -= 1
+                self.concurrency.release()
+
+            failed.append(state)
+            if attempt < self.max_retries and not self.pool.has_alternative(failed):
+                await asyncio.sleep(self.backoff(attempt, retry_after))
+
+        raise LLMError(f"{last_error} (after {self.max_retries + 1} attempts)", last_status)
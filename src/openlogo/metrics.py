@@ -0,0 +1,183 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, Union
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implied
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRIC_HELP: Dict[str, str] = {
+    'openlogo_tier_results_total': "Resolution tier outcomes by tier and outcome (hit, miss, timeout)",
+    'openlogo_image_cache_total': "Image cache lookups by result (hit, miss)",
+    'openlogo_downloaded_bytes_total': "Bytes downloaded by kind (page, image)",
+    'openlogo_images_rejected_total': "Candidate images dropped before analysis by reason",
+    'openlogo_llm_requests_total': "LLM HTTP requests by status (HTTP status, or error)",
+    'openlogo_llm_tokens_total': "LLM tokens reported in the response usage by kind (prompt, completion)",
+    'openlogo_service_requests_total': "Logo service requests by source (cache, coalesced, crawl)",
+    'openlogo_stage_seconds': "Latency of the pipeline stages in seconds",
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _label_string(key: LabelKey) -> str:
+    """``tier=clearbit,outcome=hit``: the label part of snapshot keys."""
+    return ','.join(f"{name}={value}" for name, value in key)
+
+
+def _parse_label_string(text: str) -> LabelKey:
+    return tuple(tuple(pair.split('=', 1)) for pair in text.split(',')) if text else ()
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _prometheus_labels(key: LabelKey, extra: Iterable[Tuple[str, str]] = ()) -> str:
+    pairs = [*key, *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class MetricsRegistry:
+    """Counters and latency histograms of a crawler, safe to update from any thread.
+
+    ``snapshot`` returns a JSON-serializable copy (see ``diff_snapshots`` and
+    ``merge_snapshots``); ``to_prometheus`` renders the Prometheus text format.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        # name -> labels -> [count per bucket (+Inf last), sum]
+        self._histograms: Dict[str, Dict[LabelKey, Tuple[List[int], List[float]]]] = {}
+
+    def inc(self, name: str, amount: float = 1, **labels: Any):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels: Any):
+        key = _label_key(labels)
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            counts, total = series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    @contextmanager
+    def timer(self, name: str, **labels: Any) -> Iterator[None]:
+        """Observe the duration of the block (also when it raises)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def value(self, name: str, **labels: Any) -> float:
+        """Current value of a counter (0 if never incremented)."""
+        with self._lock:
+            return self._counters.get(name, {}).get(_label_key(labels), 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-serializable copy: counters and histograms by name, then by label string."""
+        with self._lock:
+            return {
+                'buckets': list(self.buckets),
+                'counters': {name: {_label_string(key): value for key, value in series.items()}
+                             for name, series in self._counters.items()},
+                'histograms': {name: {_label_string(key): {'counts': list(counts), 'sum': total[0],
+                                                           'count': sum(counts)}
+                                      for key, (counts, total) in series.items()}
+                               for name, series in self._histograms.items()},
+            }
+
+    def to_prometheus(self) -> str:
+        """The metrics in the Prometheus text exposition format (version 0.0.4)."""
+        return snapshot_to_prometheus(self.snapshot())
+
+
+def snapshot_to_prometheus(snapshot: Dict[str, Any]) -> str:
+    lines: List[str] = []
+    for name, series in sorted(snapshot['counters'].items()):
+        lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+        lines.append(f"# TYPE {name} counter")
+        for labels, value in sorted(series.items()):
+            lines.append(f"{name}{_prometheus_labels(_parse_label_string(labels))} {_format_value(value)}")
+    bounds = [_format_value(bound) for bound in snapshot['buckets']] + ['+Inf']
+    for name, series in sorted(snapshot['histograms'].items()):
+        lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+        lines.append(f"# TYPE {name} histogram")
+        for labels, histogram in sorted(series.items()):
+            key = _parse_label_string(labels)
+            cumulative = 0
+            for bound, count in zip(bounds, histogram['counts']):
+                cumulative += count
+                lines.append(f"{name}_bucket{_prometheus_labels(key, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_sum{_prometheus_labels(key)} {_format_value(histogram['sum'])}")
+            lines.append(f"{name}_count{_prometheus_labels(key)} {histogram['count']}")
+    return '\n'.join(lines) + '\n'
+
+
+def diff_snapshots(after: Dict[str, Any], before: Dict[str, Any]) -> Dict[str, Any]:
+    """What was recorded between two snapshots of the same registry (e.g. during one batch)."""
+    counters = {}
+    for name, series in after['counters'].items():
+        previous = before['counters'].get(name, {})
+        changed = {labels: value - previous.get(labels, 0) for labels, value in series.items()
+                   if value != previous.get(labels, 0)}
+        if changed:
+            counters[name] = changed
+    histograms = {}
+    for name, series in after['histograms'].items():
+        previous = before['histograms'].get(name, {})
+        changed = {}
+        for labels, histogram in series.items():
+            old = previous.get(labels, {'counts': [0] * len(histogram['counts']), 'sum': 0.0, 'count': 0})
+            if histogram['count'] != old['count']:
+                changed[labels] = {'counts': [a - b for a, b in zip(histogram['counts'], old['counts'])],
+                                   'sum': histogram['sum'] - old['sum'], 'count': histogram['count'] - old['count']}
+        if changed:
+            histograms[name] = changed
+    return {'buckets': after['buckets'], 'counters': counters, 'histograms': histograms}
+
+
+def merge_snapshots(snapshots: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Sum snapshots taken with the same buckets (e.g. the shards of a batch)."""
+    merged: Dict[str, Any] = {'buckets': list(DEFAULT_BUCKETS), 'counters': {}, 'histograms': {}}
+    for snapshot in snapshots:
+        merged['buckets'] = snapshot['buckets']
+        for name, series in snapshot['counters'].items():
+            target = merged['counters'].setdefault(name, {})
+            for labels, value in series.items():
+                target[labels] = target.get(labels, 0) + value
+        for name, series in snapshot['histograms'].items():
+            target = merged['histograms'].setdefault(name, {})
+            for labels, histogram in series.items():
+                total = target.setdefault(labels, {'counts': [0] * len(histogram['counts']), 'sum': 0.0, 'count': 0})
+                total['counts'] = [a + b for a, b in zip(total['counts'], histogram['counts'])]
+                total['sum'] += histogram['sum']
+                total['count'] += histogram['count']
+    return merged
+
+
+def write_prometheus(registry: MetricsRegistry, path: Union[str, Path]):
+    """Write the metrics for the node_exporter textfile collector, replacing ``path`` atomically."""
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(registry.to_prometheus())
+    os.replace(tmp_path, path)
@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Set, Union
+
+RESULTS_FILE = 'results.jsonl'
+CHECKPOINT_FILE = 'checkpoint.txt'
+SOURCE_FILE = 'source.json'
+
+
+@dataclass
+class BatchSummary:
+    """Running totals of a batch, updated as each website completes."""
+    processed: int = 0
+    successful_crawls: int = 0
+    total_logos_found: int = 0
+
+    def add(self, logo_count: int):
+        self.processed += 1
+        self.total_logos_found += logo_count
+        if logo_count:
+            self.successful_crawls += 1
+
+
+def csv_source(csv_file_path: Union[str, Path]) -> Dict[str, str]:
+    """The resolved path and SHA-256 of a CSV file, identifying the input of a batch."""
+    path = Path(csv_file_path)
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return {'path': str(path.resolve()), 'sha256': digest.hexdigest()}
+
+
+def bind_source(output_dir: Union[str, Path], csv_file_path: Union[str, Path], resume: bool = True):
+    """Record in ``output_dir`` the CSV its results and checkpoint belong to.
+
+    When resuming, a directory recorded for another CSV (neither the same path
+    nor the same content) raises ValueError instead of silently skipping every
+    URL checkpointed by that other batch.
+    """
+    source_path = Path(output_dir) / SOURCE_FILE
+    source = csv_source(csv_file_path)
+    if resume and source_path.exists():
+        recorded = json.loads(source_path.read_text())
+        if recorded.get('path') != source['path'] and recorded.get('sha256') != source['sha256']:
+            raise ValueError(f"{output_dir} holds the checkpoint of {recorded.get('path')}, not {csv_file_path}; "
+                             f"use another output directory or resume=False to start over")
+    source_path.write_text(json.dumps(source) + '\n')
+
+
+class ResultWriter:
+    """Appends each website's results to ``results.jsonl`` as soon as it completes.
+
+    The URL is then appended to ``checkpoint.txt``, one line per record in the same
+    order, so a restarted run skips completed websites. A record written just
+    before a crash but not yet checkpointed is dropped on reopen and redone.
+    Totals are kept in ``summary`` as records are written; the per-website part
+    of the summary is read back from the JSONL file when needed.
+    """
+
+    def __init__(self, output_dir: Union[str, Path], durable: bool = True):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.results_path = self.output_dir / RESULTS_FILE
+        self.checkpoint_path = self.output_dir / CHECKPOINT_FILE
+        self.durable = durable
+        self.completed: Set[str] = set()
+        self.summary = BatchSummary()
+        checkpointed = self._read_checkpoint()
+        self._truncate_to(len(checkpointed))
+        self.completed.update(checkpointed)
+        for record in self.iter_records():
+            self.summary.add(record['logo_count'])
+        self._results = open(self.results_path, 'a')
+        self._checkpoint = open(self.checkpoint_path, 'a')
+
+    def _read_checkpoint(self) -> List[str]:
+        if not self.checkpoint_path.exists():
+            return []
+        with open(self.checkpoint_path) as f:
+            # Ignore a final line cut off mid-write
+            return [line[:-1] for line in f if line.endswith('\n')]
+
+    def _truncate_to(self, records: int):
+        """Keep exactly the first ``records`` lines of the results file."""
+        if not self.results_path.exists():
+            return
+        with open(self.results_path, 'rb+') as f:
+            for _ in range(records):
+                if not f.readline():
+                    break
+            f.truncate(f.tell())
+
+    def is_done(self, url: str) -> bool:
+        return url in self.completed
+
+    def write(self, url: str, record: Dict[str, Any]):
+        """Append the record of ``url`` (must hold ``logo_count``) and checkpoint it."""
+        record = {'url': url, 'completed_at': datetime.now().isoformat(), **record}
+        self._append(self._results, json.dumps(record) + '\n')
+        self._append(self._checkpoint, url + '\n')
+        self.completed.add(url)
+        self.summary.add(record['logo_count'])
+
+    def _append(self, f, line: str):
+        f.write(line)
+        f.flush()
+        if self.durable:
+            os.fsync(f.fileno())
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        if not self.results_path.exists():
+            return
+        with open(self.results_path) as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def write_summary(self, path: Union[str, Path], header: Dict[str, Any]):
+        """Write ``header``, the totals and every website's entry to ``path``, streaming the entries."""
+        with open(path, 'w') as f:
+            f.write(json.dumps({
+                **header,
+                'processed_urls': self.summary.processed,
+                'successful_crawls': self.summary.successful_crawls,
+                'total_logos_found': self.summary.total_logos_found,
+            }, indent=2)[:-2])
+            f.write(',\n  "results": {')
+            for i, record in enumerate(self.iter_records()):
+                entry = {'logo_count': record['logo_count'], 'all_logos': record.get('all_logos', [])}
+                f.write(',' if i else '')
+                f.write(f"\n    {json.dumps(record['url'])}: {json.dumps(entry)}")
+            f.write('\n  }\n}\n')
+
+    def close(self):
+        self._results.close()
+        self._checkpoint.close()
+
+    def __enter__(self) -> "ResultWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,182 @@
+import cProfile
+import json
+import pstats
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+from urllib.parse import urlparse
+
+from .tracing import Span, SpanExporter, add_exporter, remove_exporter
+
+PROFILES_DIR = 'profiles'
+INDEX_FILE = 'index.jsonl'
+
+
+@lru_cache(maxsize=1)
+def load_pyinstrument():
+    """pyinstrument's Profiler class, or None when it is not installed."""
+    try:
+        from pyinstrument import Profiler
+        return Profiler
+    except ImportError:
+        return None
+
+
+@dataclass
+class DomainProfile:
+    """A kept profile: ``path`` is the profile data, ``report_path`` the JSON with stages and hot spots."""
+    url: str
+    seconds: float
+    backend: str
+    path: Path
+    report_path: Path
+
+
+class DomainProfiler(SpanExporter):
+    """Profiles crawl_website calls and keeps the profiles of slow domains.
+
+    Every call is profiled; only calls taking at least ``threshold`` seconds are
+    written to ``output_dir``: the profile itself (a pstats ``.prof`` file for
+    cProfile, a text report for pyinstrument), a JSON report with the stage
+    timings and the top ``top`` functions by cumulative time, and a line in
+    ``index.jsonl``.
+
+    ``backend`` is "cprofile", "pyinstrument" or "auto" (pyinstrument when
+    installed). pyinstrument's async mode attributes only the profiled crawl's
+    own work; cProfile sees everything running on the event loop meanwhile and
+    profiles one crawl at a time (concurrent crawls run unprofiled), so profile
+    with ``concurrency=1`` when using it.
+
+    The stage timings are the crawl's tracing spans: the profiler adds itself
+    as a span exporter (turning tracing on) until ``close``.
+    """
+
+    def __init__(self, output_dir: Union[str, Path], threshold: float = 10.0, backend: str = 'auto', top: int = 25):
+        if backend == 'auto':
+            backend = 'pyinstrument' if load_pyinstrument() is not None else 'cprofile'
+        if backend not in ('cprofile', 'pyinstrument'):
+            raise ValueError(f"Unknown profiler backend: {backend!r}")
+        if backend == 'pyinstrument' and load_pyinstrument() is None:
+            raise ImportError("The pyinstrument backend needs pyinstrument (pip install pyinstrument)")
+        self.output_dir = Path(output_dir)
+        self.threshold = threshold
+        self.backend = backend
+        self.top = top
+        self.kept: List[DomainProfile] = []
+        self.profiled = 0
+        self.unprofiled = 0
+        self._lock = threading.Lock()
+        self._cprofile_active = False
+        # span id -> id of the domain span it belongs to, and the finished stages per domain span
+        self._domain_of: Dict[str, str] = {}
+        self._stages: Dict[str, List[Span]] = {}
+        add_exporter(self)
+
+    def on_start(self, span: Span):
+        if span.name == 'domain':
+            self._domain_of[span.span_id] = span.span_id
+            self._stages[span.span_id] = []
+        elif span.parent_id in self._domain_of:
+            self._domain_of[span.span_id] = self._domain_of[span.parent_id]
+
+    def export(self, span: Span):
+        domain_id = self._domain_of.pop(span.span_id, None)
+        if span.name == 'domain':
+            self._stages.pop(span.span_id, None)
+        elif domain_id in self._stages:
+            self._stages[domain_id].append(span)
+
+    def close(self):
+        remove_exporter(self)
+
+    def _start(self):
+        if self.backend == 'pyinstrument':
+            profiler = load_pyinstrument()(async_mode='enabled')
+            profiler.start()
+            return profiler
+        with self._lock:
+            if self._cprofile_active:
+                return None
+            self._cprofile_active = True
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def _stop(self, profiler):
+        if self.backend == 'pyinstrument':
+            profiler.stop()
+            return
+        profiler.disable()
+        with self._lock:
+            self._cprofile_active = False
+
+    @contextmanager
+    def profile(self, url: str, domain_span: Optional[Span] = None) -> Iterator[None]:
+        """Profile the block (the crawl of ``url``); ``domain_span`` supplies the stage timings."""
+        profiler = self._start()
+        if profiler is None:
+            self.unprofiled += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            if profiler is not None:
+                self._stop(profiler)
+                self.profiled += 1
+                if seconds >= self.threshold:
+                    stages = list(self._stages.get(getattr(domain_span, 'span_id', None), []))
+                    self.kept.append(self._write(url, seconds, profiler, domain_span, stages))
+
+    def _write(self, url: str, seconds: float, profiler, domain_span: Optional[Span],
+               stages: List[Span]) -> DomainProfile:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        host = re.sub(r'[^A-Za-z0-9.-]+', '_', urlparse(url).netloc or url)[:80]
+        name = f"{host}-{datetime.now().strftime('%Y%m%dT%H%M%S')}-{int(time.time() * 1e6) % 1_000_000:06d}"
+        if self.backend == 'pyinstrument':
+            path = self.output_dir / f"{name}.txt"
+            path.write_text(profiler.output_text(unicode=False, color=False))
+            hotspots: List[Dict[str, Any]] = []
+        else:
+            path = self.output_dir / f"{name}.prof"
+            profiler.dump_stats(path)
+            hotspots = self._hotspots(profiler)
+
+        started_at = domain_span.start_time if isinstance(domain_span, Span) else None
+        report = {
+            'url': url,
+            'seconds': round(seconds, 4),
+            'threshold': self.threshold,
+            'backend': self.backend,
+            'profiled_at': datetime.now().isoformat(),
+            'profile': path.name,
+            'stages': [{
+                'name': stage.name,
+                'offset': round(stage.start_time - started_at, 4) if started_at is not None else None,
+                'seconds': round(stage.duration or 0.0, 4),
+                'attributes': stage.attributes,
+                'error': stage.error,
+            } for stage in sorted(stages, key=lambda stage: stage.start_time)],
+            'hotspots': hotspots,
+        }
+        report_path = self.output_dir / f"{name}.json"
+        report_path.write_text(json.dumps(report, indent=2, default=str))
+        with self._lock, open(self.output_dir / INDEX_FILE, 'a') as index:
+            index.write(json.dumps({'url': url, 'seconds': report['seconds'], 'report': report_path.name}) + '\n')
+        return DomainProfile(url=url, seconds=seconds, backend=self.backend, path=path, report_path=report_path)
+
+    def _hotspots(self, profiler: cProfile.Profile) -> List[Dict[str, Any]]:
+        stats = pstats.Stats(profiler).sort_stats('cumulative')
+        hotspots = []
+        for function in stats.fcn_list[:self.top]:
+            primitive_calls, calls, own_time, cumulative_time, _ = stats.stats[function]
+            filename, line, name = function
+            hotspots.append({'function': f"{filename}:{line}({name})", 'calls': calls,
+                             'own_seconds': round(own_time, 4), 'cumulative_seconds': round(cumulative_time, 4)})
+        return hotspots
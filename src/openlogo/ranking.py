@@ -0,0 +1,63 @@
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, List, Sequence
+from urllib.parse import urlparse
+
+from .detection import brand_name, location_match_score, logo_text_words
+
+if TYPE_CHECKING:
+    from .crawler import LogoResult
+
+
+class LocalRanker:
+    """Deterministic ranking of a page's logos without an LLM round trip.
+
+    Each logo scores ``location_match_score`` (header location and whether its
+    description or file name names the domain, the same heuristic as
+    ``LogoDetectionStrategies.calculate_rank_score``) plus its confidence. When the
+    top two are closer than ``margin`` the ranking is ambiguous and the caller can
+    escalate to the LLM ranker.
+    """
+
+    def __init__(self, margin: float = 0.1):
+        if margin < 0:
+            raise ValueError("margin must be >= 0")
+        self.margin = margin
+
+    def score(self, logo: "LogoResult") -> float:
+        file_words = re.sub(r'[^A-Za-z0-9]+', ' ', urlparse(logo.url).path)
+        words = logo_text_words(f"{logo.description} {file_words}")
+        is_domain_match = brand_name(logo.page_url) in words
+        return location_match_score(logo.is_header, is_domain_match) + logo.confidence
+
+    def rank(self, logos: Sequence["LogoResult"]) -> List["LogoResult"]:
+        """Set each logo's rank_score and return them best-first (stable on ties)."""
+        for logo in logos:
+            logo.rank_score = self.score(logo)
+        return sorted(logos, key=lambda logo: logo.rank_score, reverse=True)
+
+    def is_ambiguous(self, ranked: Sequence["LogoResult"]) -> bool:
+        """True when the top two ranked logos are within ``margin`` of each other."""
+        return len(ranked) > 1 and ranked[0].rank_score - ranked[1].rank_score < self.margin
+
+
+@dataclass(frozen=True)
+class EarlyStopPolicy:
+    """When one analyzed candidate is decisive enough to stop analyzing a page.
+
+    A result is decisive when its confidence is at least ``min_confidence`` and,
+    if required, it sits in the header/navigation and its description names the
+    brand (the domain without TLD, as in ``LocalRanker``).
+    """
+    min_confidence: float = 0.9
+    require_header: bool = True
+    require_brand_name: bool = True
+
+    def is_decisive(self, logo: "LogoResult") -> bool:
+        if logo.confidence < self.min_confidence:
+            return False
+        if self.require_header and not logo.is_header:
+            return False
+        if self.require_brand_name and brand_name(logo.page_url) not in logo_text_words(logo.description):
+            return False
+        return True
@@ -0,0 +1,203 @@
+import argparse
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+from aiohttp import web
+
+from .crawler import LogoCrawler, LogoResult
+from .events import configure_logging
+from .llm import LLMEndpoint
+from .profiling import DomainProfiler
+from .standins import StandinConfig, create_standin_app
+
+
+def normalize_domain(value: str) -> str:
+    """Cache and coalescing key of a domain or URL: ``https://WWW.Acme.com/about`` -> ``acme.com``."""
+    value = value.strip().lower()
+    if '://' not in value:
+        value = 'http://' + value
+    host = urlparse(value).netloc.rsplit('@', 1)[-1].rstrip('.')
+    if host.startswith('www.'):
+        host = host[4:]
+    if not host or ' ' in host:
+        raise ValueError(f"Not a domain: {value!r}")
+    return host
+
+
+@dataclass
+class Resolution:
+    domain: str
+    logos: List[LogoResult]
+    resolved_at: float
+
+    def to_json(self) -> Dict[str, Any]:
+        return {'domain': self.domain, 'logos': [logo.model_dump(mode='json') for logo in self.logos]}
+
+
+class LogoService:
+    """Resolves domains to logos with one long-lived LogoCrawler.
+
+    The crawler's LLM client, content store and image cache stay warm between
+    requests. Concurrent requests for the same normalized domain share a single
+    crawl (single-flight), and results are served from an LRU cache for
+    ``cache_ttl`` seconds (``negative_cache_ttl`` when no logo was found).
+    """
+
+    def __init__(self, crawler: LogoCrawler, url_template: str = "https://{domain}", cache_ttl: float = 3600,
+                 negative_cache_ttl: float = 300, max_cache_entries: int = 10000,
+                 crawl_options: Optional[Dict[str, Any]] = None, clock: Callable[[], float] = time.monotonic):
+        self.crawler = crawler
+        self.url_template = url_template
+        self.cache_ttl = cache_ttl
+        self.negative_cache_ttl = negative_cache_ttl
+        self.max_cache_entries = max_cache_entries
+        self.crawl_options = crawl_options or {}
+        self.clock = clock
+        self._cache: "OrderedDict[str, Resolution]" = OrderedDict()
+        self._in_flight: Dict[str, "asyncio.Task[Resolution]"] = {}
+        self.requests = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.crawls = 0
+
+    def cached(self, domain: str) -> Optional[Resolution]:
+        resolution = self._cache.get(domain)
+        if resolution is None:
+            return None
+        ttl = self.cache_ttl if resolution.logos else self.negative_cache_ttl
+        if self.clock() - resolution.resolved_at > ttl:
+            del self._cache[domain]
+            return None
+        self._cache.move_to_end(domain)
+        return resolution
+
+    def _remember(self, resolution: Resolution):
+        self._cache[resolution.domain] = resolution
+        self._cache.move_to_end(resolution.domain)
+        while len(self._cache) > self.max_cache_entries:
+            self._cache.popitem(last=False)
+
+    async def resolve(self, domain: str) -> Tuple[Resolution, str]:
+        """Logos of ``domain`` and where they came from: "cache", "coalesced" or "crawl"."""
+        key = normalize_domain(domain)
+        self.requests += 1
+        resolution = self.cached(key)
+        if resolution is not None:
+            self.cache_hits += 1
+            self.crawler.metrics.inc('openlogo_service_requests_total', source='cache')
+            return resolution, 'cache'
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            source = 'coalesced'
+        else:
+            task = asyncio.ensure_future(self._crawl(key))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+            source = 'crawl'
+        self.crawler.metrics.inc('openlogo_service_requests_total', source=source)
+        # A requester that disconnects must not cancel the crawl the others wait for
+        return await asyncio.shield(task), source
+
+    async def _crawl(self, domain: str) -> Resolution:
+        self.crawls += 1
+        logos = await self.crawler.crawl_website(self.url_template.format(domain=domain), **self.crawl_options)
+        resolution = Resolution(domain=domain, logos=logos, resolved_at=self.clock())
+        self._remember(resolution)
+        return resolution
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'requests': self.requests,
+            'cache_hits': self.cache_hits,
+            'coalesced': self.coalesced,
+            'crawls': self.crawls,
+            'in_flight': len(self._in_flight),
+            'cached_domains': len(self._cache),
+        }
+
+    def create_app(self) -> web.Application:
+        """aiohttp app serving ``GET /logo?domain=...``, ``GET /stats``, ``GET /metrics`` (Prometheus) and ``GET /health``."""
+        async def logo(request: web.Request) -> web.Response:
+            try:
+                resolution, source = await self.resolve(request.query.get('domain', ''))
+            except ValueError as e:
+                raise web.HTTPBadRequest(text=str(e))
+            return web.json_response({**resolution.to_json(), 'source': source})
+
+        async def stats(request: web.Request) -> web.Response:
+            return web.json_response(self.stats())
+
+        async def metrics(request: web.Request) -> web.Response:
+            return web.Response(body=self.crawler.metrics.to_prometheus().encode(),
+                                headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'})
+
+        async def health(request: web.Request) -> web.Response:
+            return web.json_response({'status': 'ok'})
+
+        async def close_crawler(app: web.Application):
+            await self.crawler.close()
+
+        app = web.Application()
+        app.router.add_get('/logo', logo)
+        app.router.add_get('/stats', stats)
+        app.router.add_get('/metrics', metrics)
+        app.router.add_get('/health', health)
+        app.on_cleanup.append(close_crawler)
+        return app
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    """Run the logo resolution service: python -m openlogo.service --port 8080."""
+    parser = argparse.ArgumentParser(description="Serve domain to logo resolution over HTTP.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--cache-ttl', type=float, default=3600, help="Seconds a resolved domain is served from cache")
+    parser.add_argument('--azure', action='store_true', help="Use Azure OpenAI")
+    parser.add_argument('--content-store', default=None, help="Directory of the downloaded-image store")
+    parser.add_argument('--deadline', type=float, default=None,
+                        help="Seconds per crawl; the best logos found by then are returned, marked partial")
+    parser.add_argument('--standins', action='store_true',
+                        help="Serve local stand-ins for every upstream under /standins/ and use them (offline load tests)")
+    parser.add_argument('--log-level', default='WARNING', help="Level of the crawler events logged to stderr (e.g. INFO, DEBUG)")
+    parser.add_argument('--log-json', action='store_true', help="Log events as JSON lines")
+    parser.add_argument('--profile-slower-than', type=float, default=None, metavar='SECONDS',
+                        help="Profile every crawl and keep the profiles of those taking at least SECONDS")
+    parser.add_argument('--profile-dir', default='profiles', help="Directory of the kept profiles")
+    args = parser.parse_args(argv)
+    configure_logging(args.log_level.upper(), json_format=args.log_json)
+
+    crawler_kwargs: Dict[str, Any] = {'content_store_dir': args.content_store}
+    url_template = "https://{domain}"
+    if args.standins:
+        upstream = f"http://{args.host}:{args.port}/standins"
+        crawler_kwargs.update(llm_endpoints=[LLMEndpoint.openai('standin', base_url=f"{upstream}/v1")],
+                              clearbit_url=f"{upstream}/clearbit", google_favicon_url=f"{upstream}/favicons")
+        url_template = f"{upstream}/sites/{{domain}}/"
+    else:
+        api_key = os.environ.get('OPENAI_API_KEY')
+        if not api_key:
+            parser.error("Set OPENAI_API_KEY (or use --standins)")
+        crawler_kwargs.update(api_key=api_key, use_azure=args.azure)
+
+    crawl_options: Dict[str, Any] = {}
+    if args.deadline:
+        crawl_options['deadline'] = args.deadline
+    if args.profile_slower_than is not None:
+        crawl_options['profiler'] = DomainProfiler(args.profile_dir, threshold=args.profile_slower_than)
+    service = LogoService(LogoCrawler(**crawler_kwargs), url_template=url_template, cache_ttl=args.cache_ttl,
+                          crawl_options=crawl_options or None)
+    app = service.create_app()
+    if args.standins:
+        app.add_subapp('/standins/', create_standin_app(StandinConfig(latency=0.05, llm_latency=0.5)))
+    web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
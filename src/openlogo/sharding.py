@@ -0,0 +1,231 @@
+import argparse
+import asyncio
+import dataclasses
+import hashlib
+import json
+import multiprocessing
+import os
+import signal
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from .crawler import LogoCrawler, detect_url_column_name, iter_csv_urls
+from .metrics import merge_snapshots
+from .output import CHECKPOINT_FILE, RESULTS_FILE, ResultWriter, bind_source
+
+SHARDS_DIR = 'shards'
+RATE_LIMIT_KEYS = ('requests_per_minute', 'tokens_per_minute')
+
+
+def shard_index(url: str, workers: int) -> int:
+    """Worker that owns ``url``; stable across runs, so a restart resumes every shard."""
+    digest = hashlib.md5(url.encode()).digest()
+    return int.from_bytes(digest[:8], 'big') % workers
+
+
+def shard_dir(output_dir: Union[str, Path], index: int) -> Path:
+    return Path(output_dir) / SHARDS_DIR / f"shard-{index:03d}"
+
+
+def split_rate_limits(crawler_kwargs: Dict[str, Any], workers: int) -> Dict[str, Any]:
+    """Divide the LLM rate limits between ``workers`` processes, each of which runs its own limiter."""
+    kwargs = dict(crawler_kwargs)
+    for key in RATE_LIMIT_KEYS:
+        if kwargs.get(key):
+            kwargs[key] = kwargs[key] / workers
+    if kwargs.get('llm_endpoints'):
+        kwargs['llm_endpoints'] = [
+            dataclasses.replace(endpoint, **{key: getattr(endpoint, key) / workers
+                                             for key in RATE_LIMIT_KEYS if getattr(endpoint, key)})
+            for endpoint in kwargs['llm_endpoints']
+        ]
+    return kwargs
+
+
+async def run_shard(index: int, workers: int, csv_file_path: str, url_column: str, output_dir: str,
+                    crawler_kwargs: Dict[str, Any], concurrency: int = 4,
+                    crawl_options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Crawl the URLs of shard ``index`` until done or until SIGTERM/SIGINT.
+
+    Per-website JSON files and images go to ``output_dir`` as in a single-process
+    run; the JSONL records and checkpoint go to the shard's own directory.
+    """
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # No signal handlers outside the main thread or on Windows
+
+    crawler = LogoCrawler(**crawler_kwargs)
+    urls = (url for url in iter_csv_urls(csv_file_path, url_column) if shard_index(url, workers) == index)
+    total_urls = sum(1 for url in iter_csv_urls(csv_file_path, url_column) if shard_index(url, workers) == index)
+    with ResultWriter(shard_dir(output_dir, index)) as writer:
+        try:
+            await crawler.process_urls(urls, Path(output_dir), writer=writer, concurrency=concurrency, stop=stop,
+                                       crawl_options=crawl_options, return_results=False)
+        finally:
+            await crawler.close()
+        return crawler.write_batch_summary(writer, csv_file_path, url_column, total_urls)
+
+
+def _worker_main(index: int, workers: int, csv_file_path: str, url_column: str, output_dir: str,
+                 crawler_kwargs: Dict[str, Any], concurrency: int, crawl_options: Optional[Dict[str, Any]]):
+    asyncio.run(run_shard(index, workers, csv_file_path, url_column, output_dir,
+                          crawler_kwargs, concurrency, crawl_options))
+
+
+def merge_shards(output_dir: Union[str, Path], workers: int, header: Dict[str, Any]) -> Dict[str, Any]:
+    """Concatenate the shard records into ``output_dir`` and write batch_summary.json.
+
+    Failed uploads and metrics are collected from the shard summaries. The merged
+    ``results.jsonl`` and ``checkpoint.txt`` are rewritten from the shards on
+    every call, so merging again after a resumed run is safe.
+    """
+    output_path = Path(output_dir)
+    failed_uploads: List[str] = []
+    shard_metrics: List[Dict[str, Any]] = []
+    with open(output_path / RESULTS_FILE, 'w') as results, open(output_path / CHECKPOINT_FILE, 'w') as checkpoint:
+        for index in range(workers):
+            directory = shard_dir(output_path, index)
+            # Open (and close) a writer so records not checkpointed by a killed worker are dropped
+            ResultWriter(directory, durable=False).close()
+            for name, target in ((RESULTS_FILE, results), (CHECKPOINT_FILE, checkpoint)):
+                with open(directory / name) as f:
+                    shutil.copyfileobj(f, target)
+            summary_file = directory / 'batch_summary.json'
+            if summary_file.exists():
+                with open(summary_file) as f:
+                    shard_summary = json.load(f)
+                failed_uploads.extend(shard_summary.get('failed_uploads', []))
+                if shard_summary.get('metrics'):
+                    shard_metrics.append(shard_summary['metrics'])
+
+    summary_file = output_path / 'batch_summary.json'
+    with ResultWriter(output_path, durable=False) as writer:
+        summary = {**header, 'failed_uploads': failed_uploads, 'metrics': merge_snapshots(shard_metrics)}
+        writer.write_summary(summary_file, summary)
+        return {**summary, 'processed_urls': writer.summary.processed,
+                'successful_crawls': writer.summary.successful_crawls,
+                'total_logos_found': writer.summary.total_logos_found}
+
+
+def run_sharded_batch(csv_file_path: str, output_dir: str = "results", workers: Optional[int] = None,
+                      concurrency: int = 4, crawler_kwargs: Optional[Dict[str, Any]] = None,
+                      crawl_options: Optional[Dict[str, Any]] = None, resume: bool = True) -> Dict[str, Any]:
+    """
+    Process a CSV file like ``LogoCrawler.process_csv_batch`` on several cores.
+
+    URLs are split between ``workers`` processes by a stable hash. Each process
+    runs its own event loop and LogoCrawler and crawls ``concurrency`` websites
+    at a time. All workers write the per-website files to ``output_dir`` and share
+    the on-disk content and blob stores when ``content_store_dir`` /
+    ``blob_store_dir`` are set in ``crawler_kwargs``. The LLM rate limits in
+    ``crawler_kwargs`` are the limits of the whole run and are divided between
+    the workers.
+
+    SIGTERM (or Ctrl+C) stops every worker gracefully: websites in progress
+    finish and are checkpointed, and a later run with the same number of workers
+    resumes where each shard stopped.
+
+    Args:
+        csv_file_path: Path to the CSV file containing URLs
+        output_dir: Directory to save results
+        workers: Number of worker processes (default: number of CPUs)
+        concurrency: Number of websites crawled at the same time by each worker
+        crawler_kwargs: Keyword arguments for each worker's LogoCrawler
+        crawl_options: Extra keyword arguments for ``crawl_website``
+        resume: Skip websites recorded in the shard checkpoints, which must belong
+                to the same CSV (same path or same content)
+
+    Returns:
+        The merged batch summary, without the per-website results
+    """
+    workers = workers or os.cpu_count() or 1
+    url_column = detect_url_column_name(csv_file_path)
+    total_urls = sum(1 for _ in iter_csv_urls(csv_file_path, url_column))
+    print(f"Processing {total_urls} URLs from {csv_file_path} with {workers} workers")
+
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    bind_source(output_path, csv_file_path, resume=resume)
+    if not resume:
+        shutil.rmtree(output_path / SHARDS_DIR, ignore_errors=True)
+    kwargs = split_rate_limits(crawler_kwargs or {}, workers)
+
+    # Spawn, not fork: each worker starts with a clean interpreter and event loop
+    context = multiprocessing.get_context('spawn')
+    processes = [
+        context.Process(target=_worker_main, name=f"openlogo-shard-{index}",
+                        args=(index, workers, csv_file_path, url_column, str(output_path),
+                              kwargs, concurrency, crawl_options))
+        for index in range(workers)
+    ]
+
+    def forward(signum, frame):
+        print("🛑 Stopping workers, websites in progress will finish")
+        for process in processes:
+            if process.is_alive():
+                os.kill(process.pid, signal.SIGTERM)
+
+    previous = {}
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        try:
+            previous[signum] = signal.signal(signum, forward)
+        except ValueError:
+            pass  # Not the main thread
+    try:
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+    finally:
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
+
+    failed = [process.name for process in processes if process.exitcode != 0]
+    if failed:
+        print(f"⚠️  Workers exited with errors: {', '.join(failed)}")
+
+    summary = merge_shards(output_path, workers, {
+        "processed_at": datetime.now().isoformat(),
+        "csv_file": csv_file_path,
+        "url_column": url_column,
+        "total_urls": total_urls,
+        "workers": workers,
+    })
+    print(f"\n🎉 Sharded batch complete: {summary['successful_crawls']}/{total_urls} websites processed successfully")
+    print(f"📋 Summary report: {output_path / 'batch_summary.json'}")
+    return summary
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    """Run a batch on every core: python -m openlogo.sharding CSV -o OUTPUT_DIR."""
+    parser = argparse.ArgumentParser(description="Crawl the websites of a CSV file with several worker processes.")
+    parser.add_argument('csv_file', help="CSV file with a URL column")
+    parser.add_argument('-o', '--output', default='results', help="Output directory")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: number of CPUs)")
+    parser.add_argument('--concurrency', type=int, default=4, help="Websites crawled at once by each worker")
+    parser.add_argument('--azure', action='store_true', help="Use Azure OpenAI")
+    parser.add_argument('--requests-per-minute', type=float, default=None, help="LLM request limit of the whole run")
+    parser.add_argument('--tokens-per-minute', type=float, default=None, help="LLM token limit of the whole run")
+    parser.add_argument('--content-store', default=None, help="Directory of the shared downloaded-image store")
+    parser.add_argument('--no-resume', action='store_true', help="Start over instead of resuming")
+    args = parser.parse_args(argv)
+
+    api_key = os.environ.get('OPENAI_API_KEY')
+    if not api_key:
+        parser.error("Set OPENAI_API_KEY")
+    run_sharded_batch(args.csv_file, args.output, workers=args.workers, concurrency=args.concurrency,
+                      crawler_kwargs={'api_key': api_key, 'use_azure': args.azure,
+                                      'requests_per_minute': args.requests_per_minute,
+                                      'tokens_per_minute': args.tokens_per_minute,
+                                      'content_store_dir': args.content_store},
+                      resume=not args.no_resume)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+import argparse
+import asyncio
+import hashlib
+import io
+import random
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Optional, Sequence, Set, Tuple
+
+from aiohttp import web
+from PIL import Image
+
+
+@dataclass
+class StandinConfig:
+    """Behavior of the stand-in upstreams.
+
+    Domains in ``clearbit_domains`` / ``favicon_domains`` get a logo from the
+    Clearbit and favicon stand-ins; every other domain gets a 404 and a generic
+    (too small) favicon, so the crawler falls through to the website and the LLM.
+
+    Every website has a header logo plus ``images_per_page`` PNG and
+    ``svg_images`` SVG content images on each of its ``pages_per_site`` pages.
+    With ``redirect`` the homepage is a meta refresh stub; a ``slow_fraction``
+    of the domains (chosen by hash) answer every request ``slow_latency`` late.
+    """
+    latency: float = 0.0
+    llm_latency: float = 0.0
+    clearbit_domains: Set[str] = field(default_factory=set)
+    favicon_domains: Set[str] = field(default_factory=set)
+    confidence: float = 0.9
+    images_per_page: int = 0
+    image_size: Tuple[int, int] = (300, 200)
+    svg_images: int = 0
+    pages_per_site: int = 1
+    redirect: bool = False
+    slow_fraction: float = 0.0
+    slow_latency: float = 2.0
+
+    def is_slow(self, domain: str) -> bool:
+        bucket = int.from_bytes(hashlib.md5(domain.encode()).digest()[:4], 'big') / 2 ** 32
+        return bucket < self.slow_fraction
+
+
+@dataclass
+class StandinStats:
+    """Requests served per route, for load tests to check how much upstream work was done."""
+    requests: Counter = field(default_factory=Counter)
+
+
+def standin_image(seed: str, size=(120, 40)) -> bytes:
+    """Deterministic noisy PNG for ``seed``; noise keeps it above the generic-favicon size."""
+    rng = random.Random(seed)
+    image = Image.frombytes('RGB', size, rng.randbytes(size[0] * size[1] * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def standin_svg(seed: str) -> bytes:
+    rng = random.Random(seed)
+    color = '#%06x' % rng.getrandbits(24)
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="160" height="48" viewBox="0 0 160 48">'
+            f'<rect width="160" height="48" rx="8" fill="{color}"/>'
+            f'<text x="16" y="32" font-size="20" fill="#fff">{seed[:12]}</text></svg>').encode()
+
+
+def create_standin_app(config: Optional[StandinConfig] = None, stats: Optional[StandinStats] = None) -> web.Application:
+    """aiohttp app standing in for Clearbit, the Google favicon service, the OpenAI
+    chat completions API and the websites themselves.
+
+    Routes (point the crawler at them with ``clearbit_url``, ``google_favicon_url``
+    and ``LLMEndpoint.openai(base_url=...)``):
+
+    - ``/clearbit/{domain}``: Clearbit logo API
+    - ``/favicons?domain=...&sz=...``: Google favicon service
+    - ``/v1/chat/completions``: answers every vision request as a logo
+    - ``/sites/{domain}/``: homepage with one header logo at ``/sites/{domain}/logo.png``
+      and the content images and pages of ``config``
+    - ``/stats``: requests served so far per route (not counted itself)
+
+    Requests are counted in ``stats`` when given.
+    """
+    config = config or StandinConfig()
+    stats = stats if stats is not None else StandinStats()
+    app = web.Application()
+
+    async def served(route: str, delay: float):
+        stats.requests[route] += 1
+        if delay:
+            await asyncio.sleep(delay)
+
+    async def clearbit(request: web.Request) -> web.Response:
+        await served('clearbit', config.latency)
+        domain = request.match_info['domain']
+        if domain not in config.clearbit_domains:
+            raise web.HTTPNotFound()
+        return web.Response(body=standin_image(f"clearbit:{domain}", (128, 128)), content_type='image/png')
+
+    async def favicon(request: web.Request) -> web.Response:
+        await served('favicon', config.latency)
+        domain = request.query.get('domain', '')
+        size = int(request.query.get('sz', 128))
+        if domain not in config.favicon_domains:
+            return web.Response(body=b'\x89PNG' + b'\0' * 700, content_type='image/png')
+        return web.Response(body=standin_image(f"favicon:{domain}", (size, size)), content_type='image/png')
+
+    async def chat_completions(request: web.Request) -> web.Response:
+        await served('chat', config.llm_latency)
+        body = await request.json()
+        content = f"Confidence Score: {config.confidence}\nDescription: Company logo"
+        return web.json_response({
+            'id': f"chatcmpl-standin-{stats.requests['chat']}",
+            'object': 'chat.completion',
+            'model': body.get('model', 'standin'),
+            'choices': [{'index': 0, 'finish_reason': 'stop',
+                         'message': {'role': 'assistant', 'content': content}}],
+            'usage': {'prompt_tokens': 850, 'completion_tokens': 12, 'total_tokens': 862},
+        })
+
+    def site_latency(domain: str) -> float:
+        return config.latency + (config.slow_latency if config.is_slow(domain) else 0.0)
+
+    async def page(request: web.Request) -> web.Response:
+        domain = request.match_info['domain']
+        name = request.match_info.get('page', '')
+        await served('site', site_latency(domain))
+        if config.redirect and not name:
+            return web.Response(text='<html><head><meta http-equiv="refresh" content="0; url=home"></head></html>',
+                                content_type='text/html')
+        images = ''.join(f'<img src="img{i}.png" alt="Photo {i}">' for i in range(config.images_per_page))
+        images += ''.join(f'<img src="art{i}.svg" alt="Illustration {i}">' for i in range(config.svg_images))
+        links = ''.join(f'<a href="page{i}">Page {i}</a>' for i in range(1, config.pages_per_site))
+        return web.Response(text=f'<html><head><title>{domain}</title></head><body>'
+                                 f'<header><a href="/"><img src="logo.png" alt="{domain} logo"></a></header>'
+                                 f'<main><p>Welcome to {domain}</p>{images}</main><footer>{links}</footer>'
+                                 f'</body></html>',
+                            content_type='text/html')
+
+    async def site_logo(request: web.Request) -> web.Response:
+        domain = request.match_info['domain']
+        await served('site_image', site_latency(domain))
+        return web.Response(body=standin_image(f"site:{domain}"), content_type='image/png')
+
+    async def site_image(request: web.Request) -> web.Response:
+        domain, name = request.match_info['domain'], request.match_info['name']
+        await served('site_image', site_latency(domain))
+        return web.Response(body=standin_image(f"{domain}:{name}", config.image_size), content_type='image/png')
+
+    async def site_svg(request: web.Request) -> web.Response:
+        domain, name = request.match_info['domain'], request.match_info['name']
+        await served('site_image', site_latency(domain))
+        return web.Response(body=standin_svg(f"{domain}:{name}"), content_type='image/svg+xml')
+
+    async def stats_route(request: web.Request) -> web.Response:
+        return web.json_response(dict(stats.requests))
+
+    app.router.add_get('/clearbit/{domain}', clearbit)
+    app.router.add_get('/favicons', favicon)
+    app.router.add_post('/v1/chat/completions', chat_completions)
+    app.router.add_get('/sites/{domain}/', page)
+    app.router.add_get('/sites/{domain}/logo.png', site_logo)
+    app.router.add_get('/sites/{domain}/{name:img[0-9]+}.png', site_image)
+    app.router.add_get('/sites/{domain}/{name:art[0-9]+}.svg', site_svg)
+    app.router.add_get('/sites/{domain}/{page:home|page[0-9]+}', page)
+    app.router.add_get('/stats', stats_route)
+    return app
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    """Serve the stand-ins: python -m openlogo.standins --port 8081."""
+    parser = argparse.ArgumentParser(description="Serve local stand-ins for the services the crawler calls.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency', type=float, default=0.05, help="Seconds added to every upstream response")
+    parser.add_argument('--llm-latency', type=float, default=0.5, help="Seconds added to every chat completion")
+    parser.add_argument('--images', type=int, default=3, help="PNG content images per page")
+    parser.add_argument('--svgs', type=int, default=0, help="SVG content images per page")
+    parser.add_argument('--pages', type=int, default=1, help="Pages per website")
+    parser.add_argument('--redirect', action='store_true', help="Serve homepages as meta refresh stubs")
+    parser.add_argument('--slow-fraction', type=float, default=0.0, help="Share of websites that respond slowly")
+    args = parser.parse_args(argv)
+    config = StandinConfig(latency=args.latency, llm_latency=args.llm_latency, images_per_page=args.images,
+                           svg_images=args.svgs, pages_per_site=args.pages, redirect=args.redirect,
+                           slow_fraction=args.slow_fraction)
+    web.run_app(create_standin_app(config), host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+import asyncio
+import hashlib
+import logging
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Union
+
+from .events import emit
+
+logger = logging.getLogger(__name__)
+
+
+def blob_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def blob_path(digest: str, extension: str = "png") -> str:
+    """Hash-sharded relative path of a blob: ``ab/cd/abcd....png``."""
+    return f"{digest[:2]}/{digest[2:4]}/{digest}.{extension}"
+
+
+class BlobStore:
+    """Content-addressed local store for processed logo images.
+
+    Each blob lives at ``root/blob_path(sha256)``, so identical outputs from any
+    website or run are written once and results can reference them by hash.
+    """
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root)
+
+    def path(self, digest: str, extension: str = "png") -> Path:
+        return self.root / blob_path(digest, extension)
+
+    def exists(self, digest: str, extension: str = "png") -> bool:
+        return self.path(digest, extension).exists()
+
+    def put(self, data: bytes, extension: str = "png") -> str:
+        """Store ``data`` unless an identical blob exists; return its hash."""
+        digest = blob_hash(data)
+        path = self.path(digest, extension)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        return digest
+
+
+class StorageBackend(ABC):
+    """Remote location for processed logo blobs, addressed by relative path."""
+
+    @abstractmethod
+    def exists(self, path: str) -> bool:
+        """Whether a blob is stored at ``path``."""
+
+    @abstractmethod
+    def upload(self, path: str, data: bytes, content_type: str = "image/png"):
+        """Store ``data`` at ``path``, replacing any existing blob."""
+
+    @abstractmethod
+    def public_url(self, path: str) -> str:
+        """URL at which the blob at ``path`` can be fetched."""
+
+
+class SupabaseBackend(StorageBackend):
+    """Supabase Storage bucket; blobs go under ``prefix`` in ``bucket``."""
+
+    def __init__(self, client: Any, bucket: str = "logo-images", prefix: str = "background-removed"):
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+
+    def _key(self, path: str) -> str:
+        return f"{self.prefix}/{path}" if self.prefix else path
+
+    def exists(self, path: str) -> bool:
+        folder, _, name = self._key(path).rpartition("/")
+        entries = self.client.storage.from_(self.bucket).list(folder, {"search": name})
+        return any(entry.get("name") == name for entry in entries or [])
+
+    def upload(self, path: str, data: bytes, content_type: str = "image/png"):
+        # Content-addressed, so overwriting after a lost race writes identical bytes
+        self.client.storage.from_(self.bucket).upload(
+            path=self._key(path),
+            file=data,
+            file_options={"content-type": content_type, "upsert": "true"},
+        )
+
+    def public_url(self, path: str) -> str:
+        return self.client.storage.from_(self.bucket).get_public_url(self._key(path))
+
+
+class LocalBackend(StorageBackend):
+    """Directory standing in for a remote bucket, for tests and offline runs."""
+
+    def __init__(self, root: Union[str, Path], base_url: Optional[str] = None):
+        self.root = Path(root)
+        self.base_url = base_url.rstrip("/") if base_url else None
+        self.uploads = 0
+
+    def exists(self, path: str) -> bool:
+        return (self.root / path).exists()
+
+    def upload(self, path: str, data: bytes, content_type: str = "image/png"):
+        target = self.root / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+        self.uploads += 1
+
+    def public_url(self, path: str) -> str:
+        if self.base_url:
+            return f"{self.base_url}/{path}"
+        return (self.root / path).absolute().as_uri()
+
+
+class UploadQueue:
+    """Uploads blobs to a StorageBackend from a bounded thread pool.
+
+    Backends are synchronous clients, so every call runs on ``max_workers``
+    threads off the event loop and uploads overlap with crawling. At most
+    ``max_pending`` uploads are held in memory; ``submit`` waits for a slot
+    beyond that. Failed uploads are retried with exponential backoff and, once
+    exhausted, listed in ``failed``. Call ``flush`` (or ``close``) before exiting
+    so queued uploads are not lost.
+    """
+
+    def __init__(self, backend: StorageBackend, max_workers: int = 4, max_pending: int = 64,
+                 max_retries: int = 3, base_delay: float = 0.5):
+        self.backend = backend
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.uploaded = 0
+        self.skipped = 0
+        self.failed: List[str] = []
+        self._done: Set[str] = set()
+        self._tasks: Dict[str, "asyncio.Task[bool]"] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Per event loop: a crawler reused across asyncio.run calls gets a fresh semaphore
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="openlogo-upload")
+        return self._executor
+
+    async def submit(self, path: str, data: bytes, content_type: str = "image/png"):
+        """Queue an upload of ``data`` to ``path``; repeated paths are uploaded once."""
+        if path in self._done or path in self._tasks:
+            return
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.max_pending)
+            self._slots_loop = loop
+        slots = self._slots
+        await slots.acquire()
+        if path in self._done or path in self._tasks:
+            slots.release()
+            return
+        self._tasks[path] = asyncio.ensure_future(self._upload(path, data, content_type, slots))
+
+    async def wait(self, path: str) -> bool:
+        """Wait for the upload of ``path``; True if the blob is stored remotely."""
+        task = self._tasks.get(path)
+        if task is not None:
+            await asyncio.shield(task)
+        return path in self._done
+
+    async def _upload(self, path: str, data: bytes, content_type: str, slots: asyncio.Semaphore) -> bool:
+        loop = asyncio.get_running_loop()
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    if await loop.run_in_executor(self.executor, self.backend.exists, path):
+                        self.skipped += 1
+                    else:
+                        await loop.run_in_executor(self.executor, self.backend.upload, path, data, content_type)
+                        self.uploaded += 1
+                    self._done.add(path)
+                    return True
+                except Exception as e:
+                    if attempt == self.max_retries:
+                        emit(logger, logging.WARNING, 'upload_failed', "Failed to upload {path} after {attempts} attempts: {error}",
+                             path=path, attempts=attempt + 1, error=e)
+                        self.failed.append(path)
+                        return False
+                    await asyncio.sleep(self.base_delay * 2 ** attempt)
+            return False
+        finally:
+            self._tasks.pop(path, None)
+            slots.release()
+
+    @property
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    async def flush(self):
+        """Wait until every queued upload has finished or failed."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks.values()))
+
+    async def close(self):
+        await self.flush()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._slots = None
+        self._slots_loop = None
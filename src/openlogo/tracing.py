@@ -0,0 +1,223 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, List, Optional, Sequence, Union
+
+
+@dataclass
+class Span:
+    """One timed step of the pipeline.
+
+    Spans nest through the task context: a span started while another is open
+    (in the same task or a task created inside it) becomes its child, giving the
+    domain -> tier -> candidate -> stage hierarchy of a crawl.
+    """
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_time: float
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    duration: Optional[float] = None
+    error: Optional[str] = None
+
+    def set(self, **attributes: Any):
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class _NoopSpan:
+    """Stands in for both the context manager and the span while tracing is off."""
+
+    def __enter__(self) -> '_NoopSpan':
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        return False
+
+    def set(self, **attributes: Any):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Optional[Span]] = ContextVar('openlogo_current_span', default=None)
+
+
+class SpanExporter:
+    """Receives spans from a Tracer. ``on_start`` is optional; ``export`` gets every finished span."""
+
+    def on_start(self, span: Span):
+        pass
+
+    def export(self, span: Span):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class InMemoryExporter(SpanExporter):
+    """Keeps finished spans in a list (tests, benchmarks, ad-hoc profiling)."""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def export(self, span: Span):
+        self.spans.append(span)
+
+    def named(self, name: str) -> List[Span]:
+        return [span for span in self.spans if span.name == name]
+
+    def children(self, parent: Span) -> List[Span]:
+        return [span for span in self.spans if span.parent_id == parent.span_id]
+
+
+class JSONLogExporter(SpanExporter):
+    """Writes every finished span as one JSON line to a file or stream."""
+
+    def __init__(self, target: Union[str, Path, IO[str]]):
+        if isinstance(target, (str, Path)):
+            self.stream = open(target, 'a', encoding='utf-8')
+            self._owns_stream = True
+        else:
+            self.stream = target
+            self._owns_stream = False
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self.stream.write(line + '\n')
+            self.stream.flush()
+
+    def close(self):
+        if self._owns_stream:
+            self.stream.close()
+
+
+class OpenTelemetryExporter(SpanExporter):
+    """Mirrors spans into OpenTelemetry (requires the ``opentelemetry-api`` package).
+
+    Spans are started and ended on the OpenTelemetry tracer with the same
+    parent/child structure, so whatever SDK and exporter the application
+    configured receives them.
+    """
+
+    def __init__(self, tracer_name: str = 'openlogo'):
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            raise ImportError("OpenTelemetryExporter needs the opentelemetry-api package "
+                              "(pip install opentelemetry-api opentelemetry-sdk)")
+        self._trace = trace
+        self._tracer = trace.get_tracer(tracer_name)
+        self._open: Dict[str, Any] = {}
+
+    def on_start(self, span: Span):
+        parent = self._open.get(span.parent_id) if span.parent_id else None
+        context = self._trace.set_span_in_context(parent) if parent is not None else None
+        self._open[span.span_id] = self._tracer.start_span(
+            span.name, context=context, attributes=_otel_attributes(span.attributes),
+            start_time=int(span.start_time * 1e9))
+
+    def export(self, span: Span):
+        otel_span = self._open.pop(span.span_id, None)
+        if otel_span is None:
+            return
+        otel_span.set_attributes(_otel_attributes(span.attributes))
+        if span.error:
+            from opentelemetry.trace import Status, StatusCode
+            otel_span.set_status(Status(StatusCode.ERROR, span.error))
+        otel_span.end(end_time=int((span.start_time + (span.duration or 0.0)) * 1e9))
+
+
+def _otel_attributes(attributes: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value if isinstance(value, (str, bool, int, float)) else str(value)
+            for key, value in attributes.items() if value is not None}
+
+
+class Tracer:
+    """Times spans and hands them to ``exporters``. Install one with ``set_tracer``."""
+
+    def __init__(self, exporters: Sequence[SpanExporter] = ()):
+        self.exporters = list(exporters)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        parent = _current_span.get()
+        span = Span(name=name, trace_id=parent.trace_id if parent else os.urandom(16).hex(),
+                    span_id=os.urandom(8).hex(), parent_id=parent.span_id if parent else None,
+                    start_time=time.time(), attributes=attributes)
+        for exporter in self.exporters:
+            exporter.on_start(span)
+        token = _current_span.set(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        except asyncio.CancelledError:
+            span.error = 'cancelled'
+            raise
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.duration = time.perf_counter() - started
+            _current_span.reset(token)
+            for exporter in self.exporters:
+                exporter.export(span)
+
+    def close(self):
+        for exporter in self.exporters:
+            exporter.close()
+
+
+_tracer: Optional[Tracer] = None
+
+
+def set_tracer(tracer: Optional[Tracer]) -> Optional[Tracer]:
+    """Install ``tracer`` process-wide (None turns tracing off); returns the previous one."""
+    global _tracer
+    previous, _tracer = _tracer, tracer
+    return previous
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _tracer
+
+
+def add_exporter(exporter: SpanExporter) -> Tracer:
+    """Send spans to ``exporter`` too, installing a tracer if tracing is off."""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    _tracer.exporters.append(exporter)
+    return _tracer
+
+
+def remove_exporter(exporter: SpanExporter):
+    """Undo ``add_exporter``; tracing turns off again once no exporter is left."""
+    global _tracer
+    if _tracer is not None and exporter in _tracer.exporters:
+        _tracer.exporters.remove(exporter)
+        if not _tracer.exporters:
+            _tracer = None
+
+
+def span(name: str, **attributes: Any):
+    """Context manager timing ``name`` under the current span; a shared no-op while tracing is off."""
+    if _tracer is None:
+        return NOOP_SPAN
+    return _tracer.span(name, **attributes)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
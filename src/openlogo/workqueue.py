@@ -0,0 +1,264 @@
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import closing, contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Sequence, Tuple, Union
+
+from .output import ResultWriter
+
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+
+@dataclass
+class Lease:
+    """A claimed URL. ``token`` identifies this claim; a reclaimed URL gets a new one."""
+    url: str
+    worker_id: str
+    token: str
+    expires_at: float
+    attempt: int
+
+
+@dataclass
+class QueueProgress:
+    pending: int = 0
+    leased: int = 0
+    done: int = 0
+    failed: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.pending + self.leased + self.done + self.failed
+
+    @property
+    def finished(self) -> bool:
+        return not self.pending and not self.leased
+
+    def __str__(self) -> str:
+        return (f"{self.done + self.failed}/{self.total} finished "
+                f"({self.done} done, {self.failed} failed, {self.leased} in progress, {self.pending} pending)")
+
+
+class WorkQueue(ABC):
+    """Queue of website URLs shared by crawl workers on any number of machines.
+
+    A worker ``claim``s a URL for ``lease_seconds`` and must ``heartbeat`` before
+    the lease expires; an expired lease goes back to the queue (or is marked
+    failed after ``max_attempts`` claims). ``complete`` and ``fail`` only succeed
+    for the current holder of the lease. A networked backend implements these
+    methods; ``SQLiteWorkQueue`` serves the workers of a single machine.
+    """
+
+    @abstractmethod
+    def enqueue(self, urls: Iterable[str]) -> int:
+        """Add ``urls``; URLs already queued are ignored. Returns the number added."""
+
+    @abstractmethod
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[Lease]:
+        """Lease the next pending URL to ``worker_id``, or None if there is none."""
+
+    @abstractmethod
+    def heartbeat(self, lease: Lease, lease_seconds: float) -> bool:
+        """Extend ``lease``; False if it was lost (expired and reclaimed)."""
+
+    @abstractmethod
+    def complete(self, lease: Lease, record: Dict[str, Any]) -> bool:
+        """Record the result of a leased URL; False if the lease was lost."""
+
+    @abstractmethod
+    def fail(self, lease: Lease, error: str) -> bool:
+        """Give up a leased URL after an error so it is retried or marked failed."""
+
+    @abstractmethod
+    def progress(self) -> QueueProgress:
+        """Number of URLs in each state."""
+
+    @abstractmethod
+    def iter_results(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """(url, record) of every completed URL, in the order they were queued."""
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """WorkQueue in a SQLite file, safe for several processes on one machine.
+
+    Every call opens its own connection and claims run in an immediate
+    transaction, so two workers never hold the same URL. Network filesystems
+    rarely implement the locking SQLite needs; use a networked backend across
+    machines that do not share a local disk.
+    """
+
+    def __init__(self, path: Union[str, Path], max_attempts: int = 3, clock: Callable[[], float] = time.time):
+        self.path = Path(path)
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(sqlite3.connect(self.path, timeout=30)) as db:
+            # Readers (progress, exports) do not block claims
+            db.execute("PRAGMA journal_mode=WAL")
+        with self._transaction() as db:
+            db.execute("""CREATE TABLE IF NOT EXISTS tasks (
+                url TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                worker_id TEXT,
+                token TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                record TEXT,
+                error TEXT,
+                updated_at REAL
+            )""")
+            db.execute("CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, lease_expires)")
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with closing(sqlite3.connect(self.path, timeout=30, isolation_level=None)) as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+
+    def enqueue(self, urls: Iterable[str]) -> int:
+        now = self.clock()
+        with self._transaction() as db:
+            before = db.total_changes
+            db.executemany("INSERT OR IGNORE INTO tasks (url, status, updated_at) VALUES (?, ?, ?)",
+                           ((url, PENDING, now) for url in urls))
+            return db.total_changes - before
+
+    def _expire_leases(self, db: sqlite3.Connection, now: float):
+        db.execute("UPDATE tasks SET status = ?, error = 'lease expired', updated_at = ? "
+                   "WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                   (FAILED, now, LEASED, now, self.max_attempts))
+        db.execute("UPDATE tasks SET status = ?, worker_id = NULL, token = NULL, updated_at = ? "
+                   "WHERE status = ? AND lease_expires < ?", (PENDING, now, LEASED, now))
+
+    def requeue_expired(self) -> int:
+        """Return URLs with expired leases to the queue now rather than at the next claim."""
+        with self._transaction() as db:
+            before = db.total_changes
+            self._expire_leases(db, self.clock())
+            return db.total_changes - before
+
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[Lease]:
+        now = self.clock()
+        with self._transaction() as db:
+            self._expire_leases(db, now)
+            row = db.execute("SELECT url, attempts FROM tasks WHERE status = ? ORDER BY rowid LIMIT 1",
+                             (PENDING,)).fetchone()
+            if row is None:
+                return None
+            lease = Lease(url=row[0], worker_id=worker_id, token=uuid.uuid4().hex,
+                          expires_at=now + lease_seconds, attempt=row[1] + 1)
+            db.execute("UPDATE tasks SET status = ?, worker_id = ?, token = ?, lease_expires = ?, "
+                       "attempts = ?, updated_at = ? WHERE url = ?",
+                       (LEASED, worker_id, lease.token, lease.expires_at, lease.attempt, now, lease.url))
+            return lease
+
+    def _update_leased(self, lease: Lease, assignments: str, values: tuple) -> bool:
+        with self._transaction() as db:
+            cursor = db.execute(f"UPDATE tasks SET {assignments}, updated_at = ? "
+                                "WHERE url = ? AND token = ? AND status = ?",
+                                (*values, self.clock(), lease.url, lease.token, LEASED))
+            return cursor.rowcount == 1
+
+    def heartbeat(self, lease: Lease, lease_seconds: float) -> bool:
+        expires_at = self.clock() + lease_seconds
+        if not self._update_leased(lease, "lease_expires = ?", (expires_at,)):
+            return False
+        lease.expires_at = expires_at
+        return True
+
+    def complete(self, lease: Lease, record: Dict[str, Any]) -> bool:
+        return self._update_leased(lease, "status = ?, record = ?, error = NULL", (DONE, json.dumps(record)))
+
+    def fail(self, lease: Lease, error: str) -> bool:
+        status = FAILED if lease.attempt >= self.max_attempts else PENDING
+        return self._update_leased(lease, "status = ?, error = ?", (status, error))
+
+    def progress(self) -> QueueProgress:
+        progress = QueueProgress()
+        with self._transaction() as db:
+            self._expire_leases(db, self.clock())
+            for status, count in db.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status"):
+                setattr(progress, status, count)
+        return progress
+
+    def iter_results(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        with closing(sqlite3.connect(self.path, timeout=30)) as db:
+            for url, record in db.execute("SELECT url, record FROM tasks WHERE status = ? ORDER BY rowid", (DONE,)):
+                yield url, json.loads(record)
+
+
+def export_results(queue: WorkQueue, output_dir: Union[str, Path], header: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Write the completed URLs of ``queue`` to results.jsonl and batch_summary.json in ``output_dir``."""
+    progress = queue.progress()
+    with ResultWriter(output_dir, durable=False) as writer:
+        for url, record in queue.iter_results():
+            if not writer.is_done(url):
+                writer.write(url, record)
+        summary = {'processed_at': datetime.now().isoformat(), **(header or {}),
+                   'total_urls': progress.total, 'failed_urls': progress.failed}
+        writer.write_summary(writer.output_dir / 'batch_summary.json', summary)
+        return {**summary, 'processed_urls': writer.summary.processed,
+                'successful_crawls': writer.summary.successful_crawls,
+                'total_logos_found': writer.summary.total_logos_found}
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    """Queue-backed runs: python -m openlogo.workqueue {enqueue,work,status,export} QUEUE ..."""
+    parser = argparse.ArgumentParser(description="Crawl websites from a work queue shared by several workers.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    enqueue = commands.add_parser('enqueue', help="Add the URLs of a CSV file to the queue")
+    enqueue.add_argument('queue', help="SQLite queue file")
+    enqueue.add_argument('csv_file', help="CSV file with a URL column")
+    work = commands.add_parser('work', help="Claim and crawl websites until the queue is finished")
+    work.add_argument('queue', help="SQLite queue file")
+    work.add_argument('-o', '--output', default='results', help="Output directory")
+    work.add_argument('--concurrency', type=int, default=4, help="Websites crawled at once")
+    work.add_argument('--lease-seconds', type=float, default=300)
+    work.add_argument('--azure', action='store_true', help="Use Azure OpenAI")
+    status = commands.add_parser('status', help="Show queue progress")
+    status.add_argument('queue', help="SQLite queue file")
+    export = commands.add_parser('export', help="Write the recorded results and a summary")
+    export.add_argument('queue', help="SQLite queue file")
+    export.add_argument('-o', '--output', default='results', help="Output directory")
+    args = parser.parse_args(argv)
+
+    queue = SQLiteWorkQueue(args.queue)
+    if args.command == 'enqueue':
+        from .crawler import detect_url_column_name, iter_csv_urls
+        added = queue.enqueue(iter_csv_urls(args.csv_file, detect_url_column_name(args.csv_file)))
+        print(f"Queued {added} new URLs")
+    elif args.command == 'work':
+        from .crawler import LogoCrawler
+        api_key = os.environ.get('OPENAI_API_KEY')
+        if not api_key:
+            parser.error("Set OPENAI_API_KEY")
+        crawler = LogoCrawler(api_key=api_key, use_azure=args.azure)
+        asyncio.run(crawler.process_queue(queue, args.output, lease_seconds=args.lease_seconds,
+                                          concurrency=args.concurrency))
+    elif args.command == 'status':
+        print(queue.progress())
+        return
+    else:
+        summary = export_results(queue, args.output)
+        print(f"Exported {summary['processed_urls']} results to {args.output}")
+    print(queue.progress())
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,47 @@
 """Pytest configuration for openlogo tests."""
 
+import io
+
 import pytest
 
 
+class FakeClock:
+    """Clock for code taking a ``clock`` callable; tests move it by setting ``now``."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
 @pytest.fixture
 def mock_api_key():
     """Return a mock API key for testing."""
     return "test-api-key-for-testing"
 
 
+@pytest.fixture
+def make_png():
+    """Return a function building the PNG bytes of a solid ``width`` x ``height`` image."""
+    def make(width, height, color=(10, 20, 30, 255)):
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.new("RGBA", (width, height), color).save(buffer, format="PNG")
+        return buffer.getvalue()
+    return make
+
+
+@pytest.fixture
+def fake_clock():
+    """A FakeClock starting at 0."""
+    return FakeClock()
+
+
+@pytest.fixture
+def write_csv():
+    """Return a function writing ``urls`` to a Company,Website CSV at ``path``."""
+    def write(path, urls):
+        path.write_text("Company,Website\n" + "".join(f"Co {i},{url}\n" for i, url in enumerate(urls)))
+    return write
@@ -0,0 +1,180 @@
+"""
+Unit tests for the deferred batch mode.
+
+Run with: pytest tests/
+"""
+
+import json
+
+import pytest
+
+MESSAGES = [{"role": "user", "content": "Is this a logo?"}]
+
+
+def _response(custom_id, content, status_code=200):
+    return {
+        "id": f"batch_req_{custom_id}",
+        "custom_id": custom_id,
+        "response": {"status_code": status_code, "request_id": "r",
+                     "body": {"choices": [{"message": {"role": "assistant", "content": content}}]}},
+        "error": None,
+    }
+
+
+def _write_jsonl(path, records):
+    with open(path, "w") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+def _lines(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+class TestBatchSpool:
+    """Test writing batch input files."""
+
+    def test_writes_batch_format(self, tmp_path):
+        """Each request line should follow the OpenAI batch input format."""
+        from openlogo.batch import BatchSpool
+
+        with BatchSpool(tmp_path, model="gpt-4o-mini") as spool:
+            custom_id = spool.site("https://a.com").add_request(
+                "https://a.com", "https://a.com/logo.png", "raw1", "b64-1", MESSAGES)
+
+        [line] = _lines(spool.request_files[0])
+        assert line == {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {"model": "gpt-4o-mini", "messages": MESSAGES, "max_tokens": 300},
+        }
+
+    def test_identical_images_requested_once(self, tmp_path):
+        """An image shared by two websites should produce one request."""
+        from openlogo.batch import BatchSpool, load_spool
+
+        with BatchSpool(tmp_path, model="m") as spool:
+            first = spool.site("https://a.com").add_request("https://a.com", "https://cdn.com/x.png", "same", "h", MESSAGES)
+            second = spool.site("https://b.com").add_request("https://b.com", "https://cdn.com/x.png", "same", "h", MESSAGES)
+
+        assert first == second
+        assert spool.request_count == 1
+        assert [len(site.requests) for site in load_spool(tmp_path).sites] == [1, 1]
+
+    def test_rotates_files_at_limit(self, tmp_path):
+        from openlogo.batch import BatchSpool
+
+        with BatchSpool(tmp_path, model="m", max_requests_per_file=2) as spool:
+            site = spool.site("https://a.com")
+            for i in range(5):
+                site.add_request("https://a.com", f"https://a.com/{i}.png", f"k{i}", f"h{i}", MESSAGES)
+
+        assert [len(_lines(path)) for path in spool.request_files] == [2, 2, 1]
+
+    def test_refuses_existing_spool(self, tmp_path):
+        from openlogo.batch import BatchSpool
+
+        BatchSpool(tmp_path, model="m").close()
+        with pytest.raises(ValueError):
+            BatchSpool(tmp_path, model="m")
+
+
+class TestReadBatchResponses:
+    """Test reading batch output files."""
+
+    def test_skips_failed_requests(self, tmp_path):
+        from openlogo.batch import read_batch_responses
+
+        _write_jsonl(tmp_path / "out.jsonl", [_response("a", "Confidence Score: 0.9"), _response("b", "", 500)])
+        _write_jsonl(tmp_path / "err.jsonl", [{"custom_id": "c", "response": None,
+                                               "error": {"code": "invalid_request", "message": "bad"}}])
+
+        responses = read_batch_responses([tmp_path / "out.jsonl", tmp_path / "err.jsonl"])
+
+        assert list(responses) == ["a"]
+
+
+class TestDeferredCrawl:
+    """Test both phases of a deferred run against local files and servers."""
+
+    @pytest.mark.asyncio
+    async def test_crawl_website_spools_instead_of_calling_llm(self, make_png, tmp_path):
+        """Page images should become spooled requests with their header flag."""
+        from aiohttp import web
+        from aiohttp.test_utils import TestServer
+        from openlogo import LogoCrawler
+        from openlogo.batch import BatchSpool, load_spool
+
+        async def homepage(request):
+            return web.Response(text='<html><body><header><img src="/logo.png"></header>'
+                                     '<img src="/photo.png"></body></html>', content_type="text/html")
+
+        async def logo(request):
+            return web.Response(body=make_png(120, 40), content_type="image/png")
+
+        async def photo(request):
+            return web.Response(body=make_png(300, 200), content_type="image/png")
+
+        app = web.Application()
+        app.router.add_get("/", homepage)
+        app.router.add_get("/logo.png", logo)
+        app.router.add_get("/photo.png", photo)
+
+        crawler = LogoCrawler(api_key="k")
+
+        async def no_llm(*args, **kwargs):
+            raise AssertionError("the LLM must not be called in deferred mode")
+
+        crawler.llm.chat = no_llm
+        async with TestServer(app) as server:
+            url = str(server.make_url("/"))
+            with BatchSpool(tmp_path, model="gpt-4o-mini") as spool:
+                site = spool.site(url)
+                results = await crawler.crawl_website(url, skip_clearbit=True, skip_google_favicon=True,
+                                                      skip_declared_icons=True, spool=site)
+                site.finish(results)
+
+        [spooled] = load_spool(tmp_path).sites
+        assert results == []
+        assert {(r.image_url.rsplit("/", 1)[-1], r.is_header) for r in spooled.requests} == {
+            ("logo.png", True), ("photo.png", False)}
+        assert spool.request_count == 2
+
+    @pytest.mark.asyncio
+    async def test_finish_batch_from_local_responses(self, tmp_path):
+        """finish_batch should rank and save results from locally produced output files."""
+        from datetime import datetime
+        from openlogo import LogoCrawler
+        from openlogo.batch import BatchSpool
+        from openlogo.crawler import LogoResult
+
+        settled = LogoResult(url="http://127.0.0.1:9/clearbit.png", confidence=0.95, description="Beta wordmark",
+                             page_url="https://beta.com", image_hash="x", timestamp=datetime.now())
+        with BatchSpool(tmp_path / "spool", model="m", metadata={"csv_file": "sites.csv", "url_column": "url",
+                                                                  "total_urls": 2}) as spool:
+            site = spool.site("https://acme.com")
+            site.header_images.add("http://127.0.0.1:9/acme-logo.png")
+            logo_id = site.add_request("https://acme.com", "http://127.0.0.1:9/acme-logo.png", "k1", "h1", MESSAGES)
+            photo_id = site.add_request("https://acme.com", "http://127.0.0.1:9/team.png", "k2", "h2", MESSAGES)
+            site.finish([])
+            spool.site("https://beta.com").finish([settled])
+
+        _write_jsonl(tmp_path / "output.jsonl", [
+            _response(photo_id, "null"),
+            _response(logo_id, "Confidence Score: 0.92\nDescription: Acme wordmark"),
+        ])
+
+        crawler = LogoCrawler(api_key="k")
+        results = await crawler.finish_batch(str(tmp_path / "spool"), [str(tmp_path / "output.jsonl")],
+                                             output_dir=str(tmp_path / "results"))
+
+        [acme] = results["https://acme.com"]
+        assert acme.url.endswith("acme-logo.png")
+        assert acme.confidence == 0.92
+        assert acme.is_header
+        assert results["https://beta.com"][0].description == "Beta wordmark"
+        summary = json.loads((tmp_path / "results" / "batch_summary.json").read_text())
+        assert summary["total_urls"] == 2
+        assert summary["successful_crawls"] == 2
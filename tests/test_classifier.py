@@ -0,0 +1,272 @@
+"""
+Unit tests for the local logo classifier.
+
+Run with: pytest tests/
+"""
+
+import json
+
+import pytest
+
+
+def _scores(is_logo: bool):
+    value = 1.0 if is_logo else 0.0
+    return {
+        "html_context": {"class_score": value, "alt_text_score": value},
+        "url_semantics": {"path_score": value, "cdn_score": 0.0},
+        "technical": {"format_score": 1.0, "filename_score": value},
+    }
+
+
+def _training_set(n: int = 20):
+    samples = [_scores(i % 2 == 0) for i in range(n)]
+    labels = [int(i % 2 == 0) for i in range(n)]
+    return samples, labels
+
+
+class TestFeatureVector:
+    """Test the fixed feature schema."""
+
+    def test_missing_analyses_are_zero(self):
+        """Analyses that did not run should contribute zeros."""
+        from openlogo.features import FEATURE_NAMES, FeatureMatrix
+
+        vector = FeatureMatrix.from_detection_scores([{"url_semantics": {"path_score": True}}]).values[0]
+
+        assert len(vector) == len(FEATURE_NAMES)
+        assert vector[FEATURE_NAMES.index("url_semantics.path_score")] == 1.0
+        assert sum(vector) == 1.0
+
+
+class TestFeatureMatrix:
+    """Test the array-backed feature matrix."""
+
+    def test_round_trips_detection_scores(self):
+        """Converting back should reproduce exactly the analyses that ran."""
+        from openlogo.features import FeatureMatrix
+
+        samples = [_scores(True), {"url_semantics": {"path_score": 0.25}}]
+        matrix = FeatureMatrix.from_detection_scores(samples)
+
+        assert matrix.values.shape[0] == 2
+        assert set(matrix.to_detection_scores(0)) == {"html_context", "url_semantics", "technical"}
+        assert matrix.to_detection_scores(1) == {
+            "url_semantics": {"path_score": 0.25, "cdn_score": 0.0, "versioning_score": 0.0}
+        }
+
+    def test_weighted_scores_and_rank(self):
+        """Scores should be the weighted mean of the features and rank best-first."""
+        from openlogo.features import FeatureMatrix
+
+        matrix = FeatureMatrix.from_detection_scores([_scores(False), _scores(True), {}])
+        weights = {"html_context.class_score": 1.0, "technical.format_score": 1.0}
+
+        assert list(matrix.weighted_scores(weights)) == pytest.approx([0.5, 1.0, 0.0])
+        assert list(matrix.rank(weights)) == [1, 0, 2]
+
+    def test_rejects_unknown_weights(self):
+        """Weights for features outside the schema should raise ValueError."""
+        from openlogo.features import FeatureMatrix
+
+        with pytest.raises(ValueError, match="Unknown features"):
+            FeatureMatrix.allocate(1).weighted_scores({"nope": 1.0})
+
+
+class TestLogoClassifier:
+    """Test LogoClassifier training, decisions and persistence."""
+
+    def test_fit_and_decide(self):
+        """A trained model should be confident on clearly separable examples."""
+        from openlogo.classifier import LogoClassifier
+
+        classifier = LogoClassifier().fit(*_training_set())
+        logo, not_logo = classifier.predict_proba([_scores(True), _scores(False)])
+
+        assert classifier.decide(logo) is True
+        assert classifier.decide(not_logo) is False
+        assert classifier.decide(0.5) is None
+
+    def test_requires_both_classes(self):
+        """Training on a single class should raise ValueError."""
+        from openlogo.classifier import LogoClassifier
+
+        with pytest.raises(ValueError, match="both logo and non-logo"):
+            LogoClassifier().fit([_scores(True)] * 3, [1, 1, 1])
+
+    def test_save_and_load_round_trip(self, tmp_path):
+        """A saved model should load with identical predictions and thresholds."""
+        from openlogo.classifier import LogoClassifier
+
+        classifier = LogoClassifier(accept_threshold=0.8, reject_threshold=0.2).fit(*_training_set())
+        path = tmp_path / "model.pkl"
+        classifier.save(path)
+        loaded = LogoClassifier.load(path)
+
+        assert loaded.accept_threshold == 0.8
+        assert loaded.predict_proba([_scores(True)]) == classifier.predict_proba([_scores(True)])
+
+    def test_train_from_results_dir(self, tmp_path):
+        """Training logs should be labeled by the LLM's answer and confidence."""
+        from openlogo.classifier import LogoClassifier, TrainingLog, load_labeled_results
+
+        log = TrainingLog(tmp_path / "shard-0" / "training.jsonl")
+        for i in range(20):
+            # Logo answers below the label threshold and "null" answers are both negatives
+            log.record(f"https://x.com/{i}.png", "https://x.com/", _scores(i % 2 == 0),
+                       logo=i % 4 != 1, confidence=0.95 if i % 2 == 0 else 0.3 if i % 4 == 3 else 0.0)
+        log.record("https://x.com/none.png", "https://x.com/", {}, logo=True, confidence=0.95)
+        log.close()
+        with open(tmp_path / "shard-0" / "training.jsonl", "a") as f:
+            f.write('{"image_url": "https://x.com/cut')
+        (tmp_path / "results.jsonl").write_text(json.dumps({"url": "https://x.com", "logo_count": 1}) + "\n")
+
+        samples, labels = load_labeled_results(tmp_path)
+        classifier = LogoClassifier.train_from_results(tmp_path)
+
+        assert len(samples) == 20
+        assert sum(labels) == 10
+        assert classifier.decide(classifier.predict_proba([_scores(True)])[0]) is True
+
+    def test_cli_trains_and_saves(self, tmp_path):
+        """The CLI should write a loadable model."""
+        from openlogo.classifier import LogoClassifier, main
+
+        samples, labels = _training_set()
+        records = [{"logo": bool(label), "confidence": 0.9 if label else 0.0, "detection_scores": sample}
+                   for sample, label in zip(samples, labels)]
+        (tmp_path / "training.jsonl").write_text("".join(json.dumps(record) + "\n" for record in records))
+        output = tmp_path / "models" / "clf.pkl"
+
+        main([str(tmp_path), "-o", str(output)])
+
+        assert LogoClassifier.load(output).is_trained
+
+
+class TestCrawlerWithClassifier:
+    """Test that confident candidates skip the LLM."""
+
+    @pytest.mark.asyncio
+    async def test_only_uncertain_candidates_reach_llm(self):
+        """Confident logos are accepted locally, confident non-logos dropped, the rest sent to the LLM."""
+        from datetime import datetime
+        from openlogo.classifier import LogoClassifier
+        from openlogo.crawler import LogoCrawler, LogoResult, PreparedImage
+        from openlogo.features import FEATURE_NAMES
+
+        crawler = LogoCrawler(api_key="test-key")
+        crawler.classifier = LogoClassifier()
+        probabilities = {"https://x.com/logo.png": 0.97, "https://x.com/hero.png": 0.02, "https://x.com/maybe.png": 0.5}
+        path_column = FEATURE_NAMES.index("url_semantics.path_score")
+        crawler.classifier.predict_proba = lambda features: list(features.values[:, path_column])
+
+        async def prepare_image(image_url):
+            return PreparedImage(image_url=image_url, image_hash=image_url, png_data=b"png")
+
+        async def run_analyses(image_url, **kwargs):
+            return {"url_semantics": {"path_score": probabilities[image_url]}}
+
+        llm_calls = []
+
+        async def analyze_image_with_openai(image_base64, image_url, page_url, *args, **kwargs):
+            llm_calls.append(image_url)
+            return LogoResult(url=image_url, confidence=0.85, description="maybe", page_url=page_url,
+                              image_hash="h", timestamp=datetime.now())
+
+        crawler.prepare_image = prepare_image
+        crawler.detection_strategies.run_analyses = run_analyses
+        crawler.analyze_image_with_openai = analyze_image_with_openai
+
+        results = await crawler.analyze_page_images("https://x.com/", "<html></html>",
+                                                    {url: None for url in probabilities})
+
+        assert llm_calls == ["https://x.com/maybe.png"]
+        assert {r.url for r in results} == {"https://x.com/logo.png", "https://x.com/maybe.png"}
+        assert results[0].detection_scores["url_semantics"]["path_score"] == 0.97
+
+    @pytest.mark.asyncio
+    async def test_classifier_settled_candidates_are_not_training_data(self, tmp_path):
+        """Only the candidate the LLM judged is written to the training log."""
+        from openlogo.classifier import LogoClassifier, load_labeled_results
+        from openlogo.crawler import LogoCrawler, PreparedImage
+        from openlogo.features import FEATURE_NAMES
+
+        crawler = LogoCrawler(api_key="test-key", training_log=str(tmp_path / "training.jsonl"))
+        crawler.classifier = LogoClassifier()
+        probabilities = {"https://x.com/logo.png": 0.97, "https://x.com/hero.png": 0.02, "https://x.com/maybe.png": 0.5}
+        path_column = FEATURE_NAMES.index("url_semantics.path_score")
+        crawler.classifier.predict_proba = lambda features: list(features.values[:, path_column])
+
+        async def prepare_image(image_url):
+            return PreparedImage(image_url=image_url, image_hash=image_url, png_data=b"png")
+
+        async def run_analyses(image_url, **kwargs):
+            return {"url_semantics": {"path_score": probabilities[image_url]}}
+
+        async def chat(messages, max_tokens=None):
+            return {"choices": [{"message": {"content": "null"}}]}
+
+        crawler.prepare_image = prepare_image
+        crawler.detection_strategies.run_analyses = run_analyses
+        crawler.llm.chat = chat
+
+        await crawler.analyze_page_images("https://x.com/", "<html></html>", {url: None for url in probabilities})
+        crawler.training_log.close()
+
+        samples, labels = load_labeled_results(tmp_path / "training.jsonl")
+        assert samples == [{"url_semantics": {"path_score": 0.5, "cdn_score": 0.0, "versioning_score": 0.0}}]
+        assert labels == [0]
+
+
+class TestTrainingLog:
+    """Test that the default crawl path records labeled training samples."""
+
+    @pytest.mark.asyncio
+    async def test_batch_writes_training_samples(self, tmp_path):
+        """Every LLM-judged image is written with its detection scores, low-confidence answers included."""
+        from aiohttp.test_utils import TestServer
+        from openlogo import LLMEndpoint, LogoCrawler
+        from openlogo.classifier import load_labeled_results
+        from openlogo.standins import StandinConfig, create_standin_app
+
+        config = StandinConfig(images_per_page=2, confidence=0.5)
+        async with TestServer(create_standin_app(config)) as server:
+            base = str(server.make_url("")).rstrip("/")
+            crawler = LogoCrawler(llm_endpoints=[LLMEndpoint.openai("k", base_url=f"{base}/v1")],
+                                  clearbit_url=f"{base}/clearbit", google_favicon_url=f"{base}/favicons",
+                                  detection_analyses=["url_semantics", "html_context"], early_stop=None)
+            csv_file = tmp_path / "sites.csv"
+            csv_file.write_text(f"Website\n{base}/sites/acme.com/\n")
+            await crawler.process_csv_batch(str(csv_file), str(tmp_path / "out"), confirm_header=False)
+            await crawler.cloud_storage.close()
+
+        assert crawler.training_log is None
+        lines = (tmp_path / "out" / "training.jsonl").read_text().splitlines()
+        records = [json.loads(line) for line in lines]
+        # The header logo and both content images
+        assert len(records) == 3
+        assert all(record["logo"] and record["confidence"] == 0.5 for record in records)
+        assert all(set(record["detection_scores"]) == {"url_semantics", "html_context"} for record in records)
+        samples, labels = load_labeled_results(tmp_path / "out")
+        assert len(samples) == len(records) and not any(labels)
+
+    @pytest.mark.asyncio
+    async def test_malformed_answers_are_not_recorded(self, tmp_path):
+        """Only answers (a logo or "null") are labels; malformed responses and errors are not."""
+        from openlogo.crawler import LogoCrawler
+
+        crawler = LogoCrawler(api_key="test-key", training_log=str(tmp_path / "training.jsonl"))
+        responses = [{"choices": []}, {"choices": [{"message": {"content": "null"}}]}]
+
+        async def chat(messages, max_tokens=None):
+            return responses.pop(0)
+
+        crawler.llm.chat = chat
+        scores = {"url_semantics": {"path_score": 1.0}}
+        assert await crawler.analyze_image_with_openai("cG5n", "https://x.com/a.png", "https://x.com/",
+                                                       detection_scores=scores) is None
+        assert await crawler.analyze_image_with_openai("cG5n", "https://x.com/b.png", "https://x.com/",
+                                                       detection_scores=scores) is None
+        crawler.training_log.close()
+
+        records = [json.loads(line) for line in (tmp_path / "training.jsonl").read_text().splitlines()]
+        assert [(record["image_url"], record["logo"]) for record in records] == [("https://x.com/b.png", False)]
@@ -0,0 +1,118 @@
+"""
+Unit tests for the raw-bytes content store.
+
+Run with: pytest tests/
+"""
+
+import pytest
+
+
+def _image_server(body=b"logo-bytes", etag='"v1"'):
+    """Local server counting full downloads and honoring If-None-Match."""
+    from aiohttp import web
+    from aiohttp.test_utils import TestServer
+
+    counts = {"full": 0, "not_modified": 0}
+
+    async def image(request):
+        if request.headers.get("If-None-Match") == etag:
+            counts["not_modified"] += 1
+            return web.Response(status=304, headers={"ETag": etag})
+        counts["full"] += 1
+        return web.Response(body=body, content_type="image/png", headers={"ETag": etag})
+
+    async def missing(request):
+        return web.Response(status=404)
+
+    app = web.Application()
+    app.router.add_get("/logo.png", image)
+    app.router.add_get("/missing.png", missing)
+    return TestServer(app), counts
+
+
+class TestContentStore:
+    """Test reuse and revalidation of downloaded bytes."""
+
+    @pytest.mark.asyncio
+    async def test_reuses_bytes_within_a_run(self):
+        """A second fetch of the same URL should not hit the network."""
+        import aiohttp
+        from openlogo.content import ContentStore
+
+        server, counts = _image_server()
+        store = ContentStore()
+        async with server, aiohttp.ClientSession() as session:
+            url = str(server.make_url("/logo.png"))
+            first = await store.fetch(session, url)
+            second = await store.fetch(session, url)
+            missing = await store.fetch(session, str(server.make_url("/missing.png")))
+
+        assert first == second == b"logo-bytes"
+        assert missing is None
+        assert counts["full"] == 1
+        assert store.hits == 1
+
+    @pytest.mark.asyncio
+    async def test_revalidates_disk_entries_from_earlier_run(self, tmp_path):
+        """A new store over the same directory should revalidate with the ETag and reuse on 304."""
+        import aiohttp
+        from openlogo.content import ContentStore
+
+        server, counts = _image_server()
+        async with server, aiohttp.ClientSession() as session:
+            url = str(server.make_url("/logo.png"))
+            await ContentStore(tmp_path).fetch(session, url)
+            later_run = ContentStore(tmp_path)
+            data = await later_run.fetch(session, url)
+
+        assert data == b"logo-bytes"
+        assert counts == {"full": 1, "not_modified": 1}
+        assert later_run.revalidated == 1
+
+    def test_memory_limit_evicts_least_recently_used(self):
+        from openlogo.content import ContentStore
+
+        store = ContentStore(max_memory_bytes=10)
+        store.put("a", b"12345")
+        store.put("b", b"12345")
+        store.get("a")
+        store.put("c", b"12345")
+
+        assert store.get("a") is not None
+        assert store.get("b") is None
+
+
+class TestCrawlerContentReuse:
+    """Test that analysis and saving share one download."""
+
+    @pytest.mark.asyncio
+    async def test_save_reuses_analysis_download(self, tmp_path):
+        """save_url_results should not download an image that prepare_image already fetched."""
+        import io
+        from datetime import datetime
+        from aiohttp import web
+        from aiohttp.test_utils import TestServer
+        from PIL import Image
+        from openlogo import LogoCrawler
+        from openlogo.crawler import LogoResult
+
+        buffer = io.BytesIO()
+        Image.new("RGBA", (120, 40), (10, 20, 30, 255)).save(buffer, format="PNG")
+        downloads = []
+
+        async def image(request):
+            downloads.append(request.path)
+            return web.Response(body=buffer.getvalue(), content_type="image/png")
+
+        app = web.Application()
+        app.router.add_get("/logo.png", image)
+        crawler = LogoCrawler(api_key="k")
+        async with TestServer(app) as server:
+            url = str(server.make_url("/logo.png"))
+            assert await crawler.prepare_image(url) is not None
+            result = LogoResult(url=url, confidence=0.95, description="Acme wordmark", page_url="https://acme.com",
+                                image_hash="h", timestamp=datetime.now())
+            await crawler.save_url_results("https://acme.com", [result], tmp_path)
+
+        assert downloads == ["/logo.png"]
+        assert list((tmp_path / "blobs").rglob("*.png"))
@@ -0,0 +1,126 @@
+"""
+Unit tests for deadline-aware crawling.
+
+Run with: pytest tests/
+"""
+
+import pytest
+
+COMPLETION = {"choices": [{"message": {"role": "assistant",
+                                       "content": "Confidence Score: 0.9\nDescription: Acme wordmark"}}]}
+
+
+def _slow_site(make_png, homepage_delay=0.0, image_delay=5.0):
+    """Homepage with a fast header logo followed by a slow image."""
+    import asyncio
+    from aiohttp import web
+
+    async def homepage(request):
+        await asyncio.sleep(homepage_delay)
+        return web.Response(text='<html><body><header><img src="/logo.png"></header>'
+                                 '<img src="/slow.png"></body></html>', content_type="text/html")
+
+    async def logo(request):
+        return web.Response(body=make_png(120, 40), content_type="image/png")
+
+    async def slow(request):
+        await asyncio.sleep(image_delay)
+        return web.Response(body=make_png(300, 200), content_type="image/png")
+
+    app = web.Application()
+    app.router.add_get("/", homepage)
+    app.router.add_get("/logo.png", logo)
+    app.router.add_get("/slow.png", slow)
+    return app
+
+
+class TestDeadline:
+    """Test how the budget is split between stages."""
+
+    def test_slices_are_shares_capped_by_remaining(self):
+        from openlogo.deadline import Deadline
+
+        now = [0.0]
+        deadline = Deadline(10, shares={"homepage": 0.3}, clock=lambda: now[0])
+
+        assert deadline.slice("homepage", 30) == 3
+        assert deadline.slice("analysis") == 10
+        now[0] = 9
+        assert deadline.slice("homepage", 30) == 1
+        now[0] = 11
+        assert deadline.expired and deadline.slice("analysis") == 0
+
+    def test_no_budget_keeps_stage_defaults(self):
+        from openlogo.deadline import Deadline
+
+        deadline = Deadline()
+
+        assert deadline.slice("homepage", 30) == 30
+        assert deadline.slice("analysis") is None
+        assert not deadline.expired
+
+
+class TestDeadlineCrawl:
+    """Test crawl_website against slow local websites."""
+
+    @pytest.mark.asyncio
+    async def test_returns_partial_results_at_deadline(self, make_png):
+        """A slow image should not hold up the logo already found."""
+        import time
+        from aiohttp.test_utils import TestServer
+        from openlogo import LogoCrawler
+
+        crawler = LogoCrawler(api_key="k")
+
+        async def chat(*args, **kwargs):
+            return COMPLETION
+
+        crawler.llm.chat = chat
+        async with TestServer(_slow_site(make_png)) as server:
+            started = time.monotonic()
+            results = await crawler.crawl_website(str(server.make_url("/")), skip_clearbit=True,
+                                                  skip_google_favicon=True, skip_declared_icons=True, deadline=1.0)
+            elapsed = time.monotonic() - started
+
+        assert elapsed < 2
+        [result] = results
+        assert result.url.endswith("/logo.png")
+        assert result.partial and result.is_header
+
+    @pytest.mark.asyncio
+    async def test_cache_hits_do_not_share_results(self, make_png):
+        """A later partial crawl hitting the image cache must not mark results already returned as partial."""
+        from aiohttp.test_utils import TestServer
+        from openlogo import LogoCrawler
+
+        crawler = LogoCrawler(api_key="k", early_stop=None)
+
+        async def chat(*args, **kwargs):
+            return COMPLETION
+
+        crawler.llm.chat = chat
+        async with TestServer(_slow_site(make_png, image_delay=0.0)) as fast, TestServer(_slow_site(make_png)) as slow:
+            complete = await crawler.crawl_website(str(fast.make_url("/")), skip_clearbit=True,
+                                                   skip_google_favicon=True, skip_declared_icons=True)
+            partial = await crawler.crawl_website(str(slow.make_url("/")), skip_clearbit=True,
+                                                  skip_google_favicon=True, skip_declared_icons=True, deadline=1.0)
+
+        [cached] = [result for result in partial if result.url.endswith("/logo.png")]
+        assert cached.partial
+        assert not any(result.partial for result in complete)
+        assert not any(result.partial for result in crawler.image_cache.cache.values())
+
+    @pytest.mark.asyncio
+    async def test_slow_homepage_returns_empty_in_time(self, make_png):
+        import time
+        from aiohttp.test_utils import TestServer
+        from openlogo import LogoCrawler
+
+        crawler = LogoCrawler(api_key="k")
+        async with TestServer(_slow_site(make_png, homepage_delay=5)) as server:
+            started = time.monotonic()
+            results = await crawler.crawl_website(str(server.make_url("/")), skip_clearbit=True,
+                                                  skip_google_favicon=True, deadline=1.0)
+
+        assert results == []
+        assert time.monotonic() - started < 2
@@ -0,0 +1,155 @@
+"""
+Unit tests for openlogo.detection.
+
+Run with: pytest tests/
+"""
+
+import pytest
+from bs4 import BeautifulSoup
+
+PAGE_HTML = """
+<html><body>
+  <header><a href="/"><img id="logo" src="/logo.png"></a></header>
+  <div><img src="/a.png"></div>
+  <div><img src="/b.png"><img src="/c.png"></div>
+</body></html>
+"""
+
+
+class TestDetectionIndex:
+    """Test the per-crawl DetectionIndex lookups."""
+
+    def test_element_path_matches_uncached_path(self):
+        """Indexed paths should equal the paths computed without an index."""
+        from openlogo.detection import DetectionIndex, LogoDetectionStrategies
+
+        soup = BeautifulSoup(PAGE_HTML, "html.parser")
+        strategies = LogoDetectionStrategies()
+        index = DetectionIndex()
+
+        for img in soup.find_all("img"):
+            assert index.element_path(img) == strategies._get_element_path(img)
+
+    def test_element_path_distinguishes_same_named_siblings(self):
+        """Sibling position should be part of the path."""
+        from openlogo.detection import DetectionIndex
+
+        soup = BeautifulSoup(PAGE_HTML, "html.parser")
+        first_div, second_div = soup.find_all("div")
+        index = DetectionIndex()
+
+        assert index.element_path(first_div.img) != index.element_path(second_div.img)
+        assert index.element_path(first_div.img).endswith("div[0]")
+        assert index.element_path(second_div.img).endswith("div[1]")
+
+    @pytest.mark.asyncio
+    async def test_structural_consistency_uses_index(self):
+        """Consistency score should be the share of elements sharing the candidate's path."""
+        from openlogo.detection import DetectionIndex, LogoDetectionStrategies
+
+        pages = [BeautifulSoup(PAGE_HTML, "html.parser") for _ in range(3)]
+        elements = [img for page in pages for img in page.find_all("img")]
+        index = DetectionIndex(all_pages_elements=elements)
+        strategies = LogoDetectionStrategies()
+        logo = pages[0].find(id="logo")
+
+        indexed = await strategies.analyze_structural_position(logo, elements, index)
+        unindexed = await strategies.analyze_structural_position(logo, elements)
+
+        assert indexed["consistency_score"] == pytest.approx(3 / 12)
+        assert indexed == unindexed
+
+    @pytest.mark.asyncio
+    async def test_multi_page_consistency_uses_index(self):
+        """Image occurrences should be aggregated per URL."""
+        from openlogo.detection import DetectionIndex, LogoDetectionStrategies
+
+        images = [
+            {"url": "https://x.com/logo.png", "position": "header", "size": (100, 40), "in_template": True},
+            {"url": "https://x.com/logo.png", "position": "header", "size": (100, 40), "in_template": True},
+            {"url": "https://x.com/hero.jpg", "position": "main", "size": (800, 400), "in_template": False},
+            {"url": "https://x.com/hero.jpg", "position": "main", "size": (600, 300), "in_template": False},
+        ]
+        index = DetectionIndex(all_pages_images=images)
+        strategies = LogoDetectionStrategies()
+
+        logo = await strategies.analyze_multi_page_consistency("https://x.com/logo.png", images, index)
+        hero = await strategies.analyze_multi_page_consistency("https://x.com/hero.jpg", images, index)
+
+        assert logo["appearance_score"] == pytest.approx(0.5)
+        assert logo["position_consistency_score"] and logo["size_consistency_score"] and logo["template_score"]
+        assert not hero["size_consistency_score"]
+        assert not hero["template_score"]
+        assert logo == await strategies.analyze_multi_page_consistency("https://x.com/logo.png", images)
+
+
+class TestRunAnalyses:
+    """Test the concurrent analysis orchestrator."""
+
+    @pytest.mark.asyncio
+    async def test_runs_only_selected_analyses(self):
+        """Only the requested analyses should be reported."""
+        from openlogo.detection import LogoDetectionStrategies
+
+        strategies = LogoDetectionStrategies()
+        scores = await strategies.run_analyses(
+            image_url="https://x.com/static/logo.png",
+            page_url="https://x.com/",
+            analyses=["url_semantics"],
+        )
+
+        assert list(scores) == ["url_semantics"]
+        assert scores["url_semantics"]["path_score"]
+        strategies.close()
+
+    @pytest.mark.asyncio
+    async def test_rejects_unknown_analysis(self):
+        """Unknown analysis names should raise ValueError."""
+        from openlogo.detection import LogoDetectionStrategies
+
+        strategies = LogoDetectionStrategies()
+        with pytest.raises(ValueError, match="Unknown detection analyses"):
+            await strategies.run_analyses("https://x.com/logo.png", "https://x.com/", analyses=["nope"])
+
+    @pytest.mark.asyncio
+    async def test_skips_analyses_without_inputs(self):
+        """Analyses needing an element or image bytes should be skipped when those are missing."""
+        from openlogo.detection import LogoDetectionStrategies
+
+        strategies = LogoDetectionStrategies()
+        scores = await strategies.run_analyses(
+            image_url="https://x.com/logo.png",
+            page_url="https://x.com/",
+            page_html="<html><head><link rel='icon' href='/favicon.ico'></head></html>",
+        )
+
+        assert set(scores) == {"url_semantics", "social_media", "schema_markup"}
+        assert scores["social_media"]["favicon_score"] == 1.0
+        strategies.close()
+
+    @pytest.mark.asyncio
+    async def test_slow_analysis_times_out_without_blocking_others(self):
+        """A timed-out analysis should be dropped while the others still report."""
+        import time
+        from openlogo.detection import LogoDetectionStrategies
+
+        strategies = LogoDetectionStrategies()
+
+        def slow_metadata(image_data):
+            time.sleep(0.5)
+            return {"copyright_score": 1.0}
+
+        strategies._metadata_scores = slow_metadata
+        started = time.perf_counter()
+        scores = await strategies.run_analyses(
+            image_url="https://x.com/logo.png",
+            page_url="https://x.com/",
+            image_data=b"not an image",
+            analyses=["metadata", "technical", "url_semantics"],
+            timeouts={"metadata": 0.05},
+        )
+
+        assert time.perf_counter() - started < 0.4
+        assert "metadata" not in scores
+        assert {"technical", "url_semantics"} <= set(scores)
+        strategies.close()
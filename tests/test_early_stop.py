@@ -0,0 +1,106 @@
+"""
+Unit tests for priority-ordered image analysis with early stopping.
+
+Run with: pytest tests/
+"""
+
+import pytest
+
+
+def _result(url, confidence, description):
+    from datetime import datetime
+    from openlogo.crawler import LogoResult
+
+    return LogoResult(url=url, confidence=confidence, description=description, page_url="https://acme.com",
+                      image_hash=url, timestamp=datetime.now())
+
+
+class TestAnalyzeInPriorityOrder:
+    """Test the scheduling of page image analyses."""
+
+    @pytest.mark.asyncio
+    async def test_decisive_result_cancels_lower_priority(self):
+        """Once the header logo is decisive, slower lower-priority analyses are cancelled."""
+        import asyncio
+        from openlogo import LogoCrawler
+
+        started, cancelled = [], []
+
+        async def fake_analyze(image_url, page_url, spool=None, **kwargs):
+            started.append(image_url)
+            if image_url.endswith("logo.png"):
+                return _result(image_url, 0.95, "Acme wordmark")
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(image_url)
+                raise
+            return _result(image_url, 0.5, "Photo")
+
+        crawler = LogoCrawler(api_key="k", analysis_concurrency=2)
+        crawler.analyze_image = fake_analyze
+        urls = ["https://acme.com/logo.png"] + [f"https://acme.com/photo{i}.png" for i in range(5)]
+        results = []
+
+        stopped = await asyncio.wait_for(crawler.analyze_in_priority_order(
+            "https://acme.com", urls, {"https://acme.com/logo.png"}, results), 2)
+
+        assert stopped
+        assert [r.url for r in results] == ["https://acme.com/logo.png"]
+        assert started == urls[:2]
+        assert cancelled == urls[1:2]
+
+    @pytest.mark.asyncio
+    async def test_without_policy_analyzes_everything(self):
+        from openlogo import LogoCrawler
+
+        async def fake_analyze(image_url, page_url, spool=None, **kwargs):
+            return _result(image_url, 0.95, "Acme wordmark")
+
+        crawler = LogoCrawler(api_key="k", early_stop=None)
+        crawler.analyze_image = fake_analyze
+        urls = [f"https://acme.com/{i}.png" for i in range(6)]
+        results = []
+
+        assert not await crawler.analyze_in_priority_order("https://acme.com", urls, set(urls), results)
+        assert sorted(r.url for r in results) == sorted(urls)
+
+
+class TestEarlyStopCrawl:
+    """Test crawl_website against a local website."""
+
+    @pytest.mark.asyncio
+    async def test_header_logo_analyzed_first_and_settles_page(self, make_png):
+        """The header logo comes last in the DOM but is analyzed first and stops the crawl."""
+        from aiohttp import web
+        from aiohttp.test_utils import TestServer
+        from openlogo import LogoCrawler
+        from openlogo.ranking import EarlyStopPolicy
+
+        async def homepage(request):
+            images = "".join(f'<img src="/photo{i}.png">' for i in range(4))
+            return web.Response(text=f'<html><body><main>{images}</main>'
+                                     '<header><img src="/logo.png"></header></body></html>', content_type="text/html")
+
+        async def image(request):
+            return web.Response(body=make_png(120, 40 + len(request.path)), content_type="image/png")
+
+        app = web.Application()
+        app.router.add_get("/", homepage)
+        app.router.add_get("/{name}.png", image)
+        calls = []
+
+        async def chat(messages, **kwargs):
+            calls.append(messages)
+            return {"choices": [{"message": {"content": "Confidence Score: 0.95\nDescription: Brand wordmark"}}]}
+
+        crawler = LogoCrawler(api_key="k", analysis_concurrency=1,
+                              early_stop=EarlyStopPolicy(require_brand_name=False))
+        crawler.llm.chat = chat
+        async with TestServer(app) as server:
+            results = await crawler.crawl_website(str(server.make_url("/")), skip_clearbit=True,
+                                                  skip_google_favicon=True, skip_declared_icons=True)
+
+        [result] = results
+        assert result.url.endswith("/logo.png") and result.is_header
+        assert len(calls) == 1
@@ -0,0 +1,67 @@
+"""
+Unit tests for the structured event logging.
+
+Run with: pytest tests/
+"""
+
+import pytest
+
+
+class TestEmit:
+    """Test lazy formatting and the JSON formatter."""
+
+    def test_disabled_level_formats_nothing(self):
+        import logging
+        from openlogo.events import emit
+
+        class Exploding:
+            def __format__(self, spec):
+                raise AssertionError("formatted while disabled")
+
+        logger = logging.getLogger("openlogo.test_disabled")
+        logger.setLevel(logging.INFO)
+        emit(logger, logging.DEBUG, "noisy", "value {value}", value=Exploding())
+
+    def test_json_lines(self):
+        import io
+        import json
+        import logging
+        from openlogo.events import configure_logging, emit
+
+        stream = io.StringIO()
+        handler = configure_logging(logging.DEBUG, json_format=True, stream=stream)
+        try:
+            emit(logging.getLogger("openlogo.test_json"), logging.INFO, "tier_resolved",
+                 "Using Clearbit logo for {domain}", domain="acme.com", tier="clearbit")
+        finally:
+            package_logger = logging.getLogger("openlogo")
+            package_logger.removeHandler(handler)
+            package_logger.setLevel(logging.NOTSET)
+
+        record = json.loads(stream.getvalue())
+        assert record["event"] == "tier_resolved"
+        assert record["message"] == "Using Clearbit logo for acme.com"
+        assert record["domain"] == "acme.com" and record["tier"] == "clearbit"
+        assert record["level"] == "INFO" and record["logger"] == "openlogo.test_json"
+
+
+class TestQuietByDefault:
+    """Test that a crawl writes nothing unless logging is configured."""
+
+    @pytest.mark.asyncio
+    async def test_crawl_website_is_silent(self, capfd):
+        from aiohttp.test_utils import TestServer
+        from openlogo import LLMEndpoint, LogoCrawler
+        from openlogo.standins import StandinConfig, create_standin_app
+
+        async with TestServer(create_standin_app(StandinConfig(images_per_page=2))) as server:
+            base = str(server.make_url("")).rstrip("/")
+            crawler = LogoCrawler(llm_endpoints=[LLMEndpoint.openai("k", base_url=f"{base}/v1")],
+                                  clearbit_url=f"{base}/clearbit", google_favicon_url=f"{base}/favicons",
+                                  detection_analyses=["url_semantics"])
+            capfd.readouterr()
+            logos = await crawler.crawl_website(f"{base}/sites/acme.com/")
+            await crawler.cloud_storage.close()
+
+        assert logos
+        assert capfd.readouterr() == ("", "")
@@ -0,0 +1,137 @@
+"""
+Unit tests for the HTML-declared icon tier.
+
+Run with: pytest tests/
+"""
+
+import json
+
+import pytest
+from bs4 import BeautifulSoup
+
+HOMEPAGE = """
+<html><head>
+  <link rel="icon" href="/favicon-32.png" sizes="32x32">
+  <link rel="icon" href="/favicon-192.png" sizes="192x192">
+  <link rel="apple-touch-icon" href="/apple-touch-icon.png">
+  <link rel="manifest" href="/site.webmanifest">
+  <meta property="og:image" content="https://cdn.example.com/share.png">
+  <script type="application/ld+json">
+    {"@context": "https://schema.org", "@graph": [
+      {"@type": "WebSite", "name": "Example"},
+      {"@type": "Organization", "name": "Example", "logo": {"@type": "ImageObject", "url": "/brand/logo.png"}}
+    ]}
+  </script>
+</head><body></body></html>
+"""
+
+
+class TestExtractDeclaredIcons:
+    """Test extraction and ranking of declared icons."""
+
+    def test_extracts_all_sources(self):
+        """JSON-LD, link icons, manifest and og:image should all be found."""
+        from openlogo.icons import extract_declared_icons
+
+        icons, manifest_url = extract_declared_icons(BeautifulSoup(HOMEPAGE, "html.parser"), "https://example.com/")
+
+        assert manifest_url == "https://example.com/site.webmanifest"
+        assert {(i.source, i.url) for i in icons} == {
+            ("json_ld", "https://example.com/brand/logo.png"),
+            ("apple-touch-icon", "https://example.com/apple-touch-icon.png"),
+            ("icon", "https://example.com/favicon-32.png"),
+            ("icon", "https://example.com/favicon-192.png"),
+            ("og:image", "https://cdn.example.com/share.png"),
+        }
+
+    def test_ranks_by_source_then_size(self):
+        """Better sources come first, larger icons first within a source."""
+        from openlogo.icons import extract_declared_icons, parse_manifest_icons, rank_declared_icons
+
+        icons, manifest_url = extract_declared_icons(BeautifulSoup(HOMEPAGE, "html.parser"), "https://example.com/")
+        icons += parse_manifest_icons({"icons": [{"src": "icons/512.png", "sizes": "512x512"}]}, manifest_url)
+
+        ranked = [icon.url.rsplit("/", 1)[-1] for icon in rank_declared_icons(icons)]
+
+        assert ranked == ["logo.png", "apple-touch-icon.png", "512.png", "favicon-192.png",
+                          "favicon-32.png", "share.png"]
+
+    def test_parse_sizes(self):
+        """The largest declared side should be used; "any" means scalable."""
+        from openlogo.icons import parse_sizes
+
+        assert parse_sizes("16x16 32x32") == 32
+        assert parse_sizes("any") == 512
+        assert parse_sizes(None) == 0
+
+
+class TestTryDeclaredIcons:
+    """Test the declared-icon tier against a local server."""
+
+    @pytest.mark.asyncio
+    async def test_returns_first_icon_meeting_quality_bar(self, make_png):
+        """A too-small JSON-LD logo should be skipped in favour of the apple-touch-icon."""
+        from aiohttp import web
+        from aiohttp.test_utils import TestServer
+        from openlogo.crawler import try_declared_icons
+
+        images = {"/brand/logo.png": make_png(40, 20), "/apple-touch-icon.png": make_png(180, 180)}
+
+        async def image(request):
+            if request.path not in images:
+                raise web.HTTPNotFound()
+            return web.Response(body=images[request.path], content_type="image/png")
+
+        async def manifest(request):
+            return web.json_response({"icons": []})
+
+        app = web.Application()
+        app.router.add_get("/site.webmanifest", manifest)
+        app.router.add_get("/{path:.*}", image)
+        async with TestServer(app) as server:
+            base = str(server.make_url("/"))
+            result = await try_declared_icons(HOMEPAGE, base)
+
+        assert result is not None
+        assert result.url == base + "apple-touch-icon.png"
+        assert result.confidence == 0.85
+        assert "apple-touch-icon" in result.description
+
+    @pytest.mark.asyncio
+    async def test_returns_none_without_declared_assets(self):
+        """Pages without declared assets should fall through to the crawler."""
+        from openlogo.crawler import try_declared_icons
+
+        assert await try_declared_icons("<html><head></head></html>", "https://example.com/") is None
+
+    @pytest.mark.asyncio
+    async def test_batch_saves_og_image_answer(self, make_png, tmp_path):
+        """A site whose only declared asset is an og:image should still get a saved logo."""
+        from aiohttp import web
+        from aiohttp.test_utils import TestServer
+        from openlogo import LogoCrawler
+
+        homepage = '<html><head><meta property="og:image" content="/share.png"></head><body></body></html>'
+
+        async def page(request):
+            return web.Response(text=homepage, content_type="text/html")
+
+        async def share(request):
+            return web.Response(body=make_png(200, 200), content_type="image/png")
+
+        app = web.Application()
+        app.router.add_get("/", page)
+        app.router.add_get("/share.png", share)
+        async with TestServer(app) as server:
+            base = str(server.make_url("/"))
+            crawler = LogoCrawler(api_key="k", clearbit_url=f"{base}clearbit", google_favicon_url=f"{base}favicons")
+            csv_file = tmp_path / "sites.csv"
+            csv_file.write_text(f"Website\n{base}\n")
+            results = await crawler.process_csv_batch(str(csv_file), str(tmp_path / "out"), confirm_header=False)
+            await crawler.close()
+
+        assert [result.tier for result in results[base]] == ["declared_icons"]
+        assert results[base][0].confidence < 0.8
+        record = json.loads((tmp_path / "out" / "results.jsonl").read_text())
+        assert [logo["url"] for logo in record["saved_logos"]] == [f"{base}share.png"]
+        assert record["saved_logos"][0]["background_removed_image_hash"]
@@ -0,0 +1,49 @@
+"""
+Import-time benchmark: ``import openlogo`` must stay fast and light.
+
+Run with: pytest tests/
+Set OPENLOGO_IMPORT_BUDGET (seconds) to adjust the budget on slow machines.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+HEAVY_MODULES = ["cv2", "sklearn", "tweepy", "pytesseract", "magic", "extcolors", "imagehash",
+                 "jsonschema", "cairosvg", "rich", "rembg", "supabase"]
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import openlogo
+elapsed = time.perf_counter() - started
+# The compatibility flags must answer without importing rembg or supabase
+from openlogo.crawler import REMBG_AVAILABLE, SUPABASE_AVAILABLE
+print(json.dumps({"seconds": elapsed, "modules": sorted(sys.modules)}))
+"""
+
+
+def _import_openlogo():
+    """Import openlogo in a fresh interpreter; returns (seconds, loaded module names)."""
+    output = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, check=True,
+                            env=os.environ.copy()).stdout
+    probe = json.loads(output.strip().splitlines()[-1])
+    return probe["seconds"], set(probe["modules"])
+
+
+class TestImportTime:
+    """Test that heavy dependencies are loaded on first use only."""
+
+    def test_heavy_dependencies_not_imported(self):
+        _, modules = _import_openlogo()
+
+        assert [name for name in HEAVY_MODULES if name in modules] == []
+
+    def test_import_within_budget(self):
+        """Best of three fresh imports, to keep disk cache effects out of the measurement."""
+        budget = float(os.environ.get("OPENLOGO_IMPORT_BUDGET", "1.0"))
+
+        best = min(_import_openlogo()[0] for _ in range(3))
+
+        assert best < budget, f"import openlogo took {best:.2f}s (budget {budget:.2f}s)"
@@ -0,0 +1,345 @@
+"""
+Unit tests for the shared LLM client layer.
+
+Run with: pytest tests/
+"""
+
+import asyncio
+
+import pytest
+
+
+class TestTokenBucket:
+    """Test token bucket reservations."""
+
+    def test_reserve_waits_once_empty(self, fake_clock):
+        """Reservations beyond the balance should report the refill wait."""
+        from openlogo.llm import TokenBucket
+
+        bucket = TokenBucket(60, clock=fake_clock)  # one token per second
+
+        assert bucket.reserve(60) == 0.0
+        assert bucket.reserve(2) == pytest.approx(2.0)
+        fake_clock.now = 2.0
+        assert bucket.reserve(1) == pytest.approx(1.0)
+
+    def test_refund_restores_tokens(self, fake_clock):
+        """Refunding over-estimated tokens should shorten later waits."""
+        from openlogo.llm import TokenBucket
+
+        bucket = TokenBucket(600, clock=fake_clock)
+        bucket.reserve(700)
+        bucket.refund(200)
+
+        assert bucket.reserve(0) == 0.0
+
+
+class TestRetryAfter:
+    """Test Retry-After parsing."""
+
+    def test_seconds_and_milliseconds(self):
+        from openlogo.llm import parse_retry_after
+
+        assert parse_retry_after({"Retry-After": "7"}) == 7.0
+        assert parse_retry_after({"retry-after-ms": "1500", "Retry-After": "7"}) == 1.5
+        assert parse_retry_after({}) is None
+
+    def test_http_date(self):
+        from datetime import datetime, timezone
+        from openlogo.llm import parse_retry_after
+
+        now = datetime(2025, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+        assert parse_retry_after({"Retry-After": "Wed, 01 Jan 2025 12:00:30 GMT"}, now) == 30.0
+
+
+class TestAdaptiveConcurrency:
+    """Test the AIMD concurrency limit."""
+
+    def test_additive_increase_after_healthy_window(self):
+        from openlogo.llm import AdaptiveConcurrency
+
+        concurrency = AdaptiveConcurrency(initial=2, maximum=4)
+        concurrency.on_success(0.1)
+        concurrency.on_success(0.1)
+
+        assert concurrency.limit == 3
+
+    def test_multiplicative_decrease_once_per_window(self):
+        """A burst of 429s should only halve the limit once."""
+        from openlogo.llm import AdaptiveConcurrency
+
+        concurrency = AdaptiveConcurrency(initial=8)
+        for _ in range(3):
+            concurrency.on_overload()
+
+        assert concurrency.limit == 4
+
+    def test_latency_spike_counts_as_overload(self):
+        from openlogo.llm import AdaptiveConcurrency
+
+        concurrency = AdaptiveConcurrency(initial=8, maximum=8)
+        for _ in range(10):
+            concurrency.on_success(0.1)
+        concurrency.on_success(5.0)
+
+        assert concurrency.limit == 4
+
+    @pytest.mark.asyncio
+    async def test_limits_in_flight_requests(self):
+        from openlogo.llm import AdaptiveConcurrency
+
+        concurrency = AdaptiveConcurrency(initial=2)
+        peak = 0
+
+        async def work():
+            nonlocal peak
+            await concurrency.acquire()
+            peak = max(peak, concurrency.in_flight)
+            await asyncio.sleep(0.01)
+            concurrency.release()
+
+        await asyncio.gather(*(work() for _ in range(6)))
+
+        assert peak == 2
+        assert concurrency.in_flight == 0
+
+
+class TestLLMClient:
+    """Test retries against a local OpenAI-compatible stub."""
+
+    @staticmethod
+    def _server(responses):
+        from aiohttp import web
+        from aiohttp.test_utils import TestServer
+
+        calls = []
+
+        async def chat(request):
+            calls.append(await request.json())
+            status, headers, body = responses[min(len(calls), len(responses)) - 1]
+            return web.json_response(body, status=status, headers=headers)
+
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", chat)
+        return TestServer(app), calls
+
+    @pytest.mark.asyncio
+    async def test_retries_429_then_succeeds(self):
+        """A 429 honoring Retry-After should be retried and the limit reduced."""
+        from openlogo.llm import AdaptiveConcurrency, LLMClient, LLMEndpoint
+
+        ok = {"choices": [{"message": {"content": "Confidence Score: 0.9"}}], "usage": {"total_tokens": 50}}
+        server, calls = self._server([(429, {"Retry-After": "0"}, {"error": "rate"}), (200, {}, ok)])
+        async with server:
+            endpoint = LLMEndpoint.openai("k", base_url=str(server.make_url("/v1")))
+            client = LLMClient(endpoint, tokens_per_minute=100000, base_delay=0.01,
+                               concurrency=AdaptiveConcurrency(initial=4))
+            result = await client.chat([{"role": "user", "content": "hi"}])
+
+        assert result == ok
+        assert len(calls) == 2
+        assert calls[0]["model"] == "gpt-4o-mini"
+        assert client.concurrency.limit == 2
+
+    @pytest.mark.asyncio
+    async def test_timeout_reduces_limit(self):
+        """A request timing out should be retried and count as overload."""
+        import asyncio
+        from aiohttp import web
+        from aiohttp.test_utils import TestServer
+        from openlogo.llm import AdaptiveConcurrency, LLMClient, LLMEndpoint
+
+        ok = {"choices": [{"message": {"content": "Confidence Score: 0.9"}}]}
+        calls = []
+
+        async def chat(request):
+            calls.append(await request.json())
+            if len(calls) == 1:
+                await asyncio.sleep(1)
+            return web.json_response(ok)
+
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", chat)
+        async with TestServer(app) as server:
+            client = LLMClient(LLMEndpoint.openai("k", base_url=str(server.make_url("/v1"))), base_delay=0.01,
+                               request_timeout=0.1, concurrency=AdaptiveConcurrency(initial=4))
+            result = await client.chat([{"role": "user", "content": "hi"}])
+
+        assert result == ok
+        assert len(calls) == 2
+        assert client.concurrency.limit == 2
+
+    @pytest.mark.asyncio
+    async def test_non_retryable_error_raises(self):
+        """Client errors other than 408/409/429 should fail immediately."""
+        from openlogo.llm import LLMClient, LLMEndpoint, LLMError
+
+        server, calls = self._server([(400, {}, {"error": "bad request"})])
+        async with server:
+            client = LLMClient(LLMEndpoint.openai("k", base_url=str(server.make_url("/v1"))), base_delay=0.01)
+            with pytest.raises(LLMError) as excinfo:
+                await client.chat([{"role": "user", "content": "hi"}])
+
+        assert excinfo.value.status == 400
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_bad_requests_leave_endpoint_healthy(self):
+        """400s caused by the payload should not bench the endpoint."""
+        from openlogo.llm import EndpointPool, LLMClient, LLMEndpoint, LLMError
+
+        server, calls = self._server([(400, {}, {"error": "bad image"})])
+        async with server:
+            pool = EndpointPool([LLMEndpoint.openai("k", base_url=str(server.make_url("/v1")))], failure_threshold=2)
+            client = LLMClient(pool, base_delay=0.01)
+            for _ in range(5):
+                with pytest.raises(LLMError):
+                    await client.chat([{"role": "user", "content": "hi"}])
+
+        assert len(calls) == 5
+        assert pool.states[0].healthy
+        assert pool.states[0].consecutive_failures == 0
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_retries(self):
+        from openlogo.llm import LLMClient, LLMEndpoint, LLMError
+
+        server, calls = self._server([(503, {}, {"error": "unavailable"})])
+        async with server:
+            client = LLMClient(LLMEndpoint.openai("k", base_url=str(server.make_url("/v1"))),
+                               max_retries=2, base_delay=0.01)
+            with pytest.raises(LLMError, match="after 3 attempts"):
+                await client.chat([{"role": "user", "content": "hi"}])
+
+        assert len(calls) == 3
+
+
+class TestEndpointPool:
+    """Test endpoint selection, health and failover."""
+
+    def test_least_loaded_respects_weights(self):
+        """A weight-2 endpoint should take twice the in-flight requests."""
+        from openlogo.llm import EndpointPool, LLMEndpoint
+
+        pool = EndpointPool([LLMEndpoint.openai("a", weight=2.0), LLMEndpoint.openai("b")])
+        picks = []
+        for _ in range(6):
+            state = pool.select()
+            state.in_flight += 1
+            picks.append(state.endpoint.api_key)
+
+        assert picks.count("a") == 4
+        assert picks.count("b") == 2
+
+    def test_prefers_endpoint_with_quota_headroom(self, fake_clock):
+        """An endpoint whose quota is used up should lose to one that can send now."""
+        from openlogo.llm import EndpointPool, LLMEndpoint
+
+        pool = EndpointPool([LLMEndpoint.openai("a", weight=10.0, requests_per_minute=1),
+                             LLMEndpoint.openai("b")], clock=fake_clock)
+        assert pool.select().endpoint.api_key == "a"
+        pool.states[0].rate_limiter.requests.reserve(1)
+
+        assert pool.select().endpoint.api_key == "b"
+        fake_clock.now = 60.0
+        assert pool.select().endpoint.api_key == "a"
+
+    @pytest.mark.asyncio
+    async def test_throttled_endpoint_sheds_concurrent_requests(self):
+        """Requests waiting on one endpoint's quota should send newcomers to the other."""
+        from aiohttp import web
+        from aiohttp.test_utils import TestServer
+        from openlogo.llm import AdaptiveConcurrency, LLMClient, LLMEndpoint
+
+        calls = {"a": 0, "b": 0}
+
+        def handler(name):
+            async def chat(request):
+                calls[name] += 1
+                return web.json_response({"choices": []})
+            return chat
+
+        app = web.Application()
+        app.router.add_post("/a/chat/completions", handler("a"))
+        app.router.add_post("/b/chat/completions", handler("b"))
+        async with TestServer(app) as server:
+            client = LLMClient([LLMEndpoint.openai("a", base_url=str(server.make_url("/a")), requests_per_minute=2),
+                                LLMEndpoint.openai("b", base_url=str(server.make_url("/b")), requests_per_minute=6000)],
+                               concurrency=AdaptiveConcurrency(initial=32, maximum=32))
+            chats = [client.chat([{"role": "user", "content": "hi"}]) for _ in range(20)]
+            await asyncio.wait_for(asyncio.gather(*chats), 5.0)
+
+        assert calls["a"] <= 2
+        assert calls["b"] >= 18
+        assert all(state.in_flight == 0 for state in client.pool.states)
+
+    def test_unhealthy_endpoint_skipped_until_cooldown(self, fake_clock):
+        from openlogo.llm import EndpointPool, LLMEndpoint
+
+        pool = EndpointPool([LLMEndpoint.openai("a"), LLMEndpoint.openai("b")],
+                            failure_threshold=2, cooldown=10.0, clock=fake_clock)
+        first = pool.states[0]
+        pool.record_failure(first, 503)
+        assert pool.select() is first  # below the threshold
+        pool.record_failure(first, 503)
+
+        assert pool.select().endpoint.api_key == "b"
+        fake_clock.now = 10.0
+        assert first.healthy
+
+    def test_all_unhealthy_uses_first_to_recover(self, fake_clock):
+        from openlogo.llm import EndpointPool, LLMEndpoint
+
+        pool = EndpointPool([LLMEndpoint.openai("a"), LLMEndpoint.openai("b")], clock=fake_clock)
+        pool.record_failure(pool.states[0], 429, retry_after=20.0)
+        pool.record_failure(pool.states[1], 429, retry_after=5.0)
+
+        assert pool.select().endpoint.api_key == "b"
+
+    @pytest.mark.asyncio
+    async def test_client_fails_over_without_backoff(self):
+        """A 429 on one deployment should be retried on the other straight away."""
+        from aiohttp import web
+        from aiohttp.test_utils import TestServer
+        from openlogo.llm import LLMClient, LLMEndpoint
+
+        ok = {"choices": [{"message": {"content": "ok"}}]}
+
+        async def limited(request):
+            return web.json_response({"error": "rate"}, status=429, headers={"Retry-After": "60"})
+
+        async def healthy(request):
+            return web.json_response(ok)
+
+        app = web.Application()
+        app.router.add_post("/a/chat/completions", limited)
+        app.router.add_post("/b/chat/completions", healthy)
+        async with TestServer(app) as server:
+            client = LLMClient([LLMEndpoint.openai("a", base_url=str(server.make_url("/a")), weight=10.0),
+                                LLMEndpoint.openai("b", base_url=str(server.make_url("/b")))],
+                               base_delay=5.0)
+            result = await asyncio.wait_for(client.chat([{"role": "user", "content": "hi"}]), 2.0)
+
+        assert result == ok
+        assert not client.pool.states[0].healthy
+
+    @pytest.mark.asyncio
+    async def test_bad_key_fails_over(self):
+        """A 401 from one endpoint should not fail the request while others are healthy."""
+        from aiohttp import web
+        from aiohttp.test_utils import TestServer
+        from openlogo.llm import LLMClient, LLMEndpoint
+
+        async def unauthorized(request):
+            return web.json_response({"error": "bad key"}, status=401)
+
+        async def healthy(request):
+            return web.json_response({"choices": []})
+
+        app = web.Application()
+        app.router.add_post("/a/chat/completions", unauthorized)
+        app.router.add_post("/b/chat/completions", healthy)
+        async with TestServer(app) as server:
+            client = LLMClient([LLMEndpoint.openai("a", base_url=str(server.make_url("/a")), weight=10.0),
+                                LLMEndpoint.openai("b", base_url=str(server.make_url("/b")))])
+            assert await client.chat([{"role": "user", "content": "hi"}]) == {"choices": []}
@@ -0,0 +1,110 @@
+"""
+Unit tests for the metrics registry and the crawler's metrics.
+
+Run with: pytest tests/
+"""
+
+import pytest
+
+
+class TestMetricsRegistry:
+    """Test counters, histograms and their exports."""
+
+    def test_prometheus_exposition(self):
+        from openlogo.metrics import MetricsRegistry
+
+        registry = MetricsRegistry(buckets=(0.1, 1.0))
+        registry.inc("openlogo_tier_results_total", tier="clearbit", outcome="hit")
+        registry.inc("openlogo_tier_results_total", 2, tier="clearbit", outcome="miss")
+        registry.observe("openlogo_stage_seconds", 0.05, stage="llm")
+        registry.observe("openlogo_stage_seconds", 3.0, stage="llm")
+
+        text = registry.to_prometheus()
+        assert "# TYPE openlogo_tier_results_total counter" in text
+        assert 'openlogo_tier_results_total{outcome="miss",tier="clearbit"} 2' in text
+        assert 'openlogo_stage_seconds_bucket{stage="llm",le="0.1"} 1' in text
+        assert 'openlogo_stage_seconds_bucket{stage="llm",le="1"} 1' in text
+        assert 'openlogo_stage_seconds_bucket{stage="llm",le="+Inf"} 2' in text
+        assert 'openlogo_stage_seconds_count{stage="llm"} 2' in text
+        assert registry.value("openlogo_tier_results_total", tier="clearbit", outcome="hit") == 1
+
+    def test_diff_and_merge_snapshots(self):
+        from openlogo.metrics import MetricsRegistry, diff_snapshots, merge_snapshots
+
+        registry = MetricsRegistry()
+        registry.inc("openlogo_image_cache_total", result="hit")
+        before = registry.snapshot()
+        registry.inc("openlogo_image_cache_total", 3, result="hit")
+        registry.inc("openlogo_image_cache_total", result="miss")
+        registry.observe("openlogo_stage_seconds", 0.2, stage="download")
+
+        batch = diff_snapshots(registry.snapshot(), before)
+        assert batch["counters"] == {"openlogo_image_cache_total": {"result=hit": 3, "result=miss": 1}}
+        assert batch["histograms"]["openlogo_stage_seconds"]["stage=download"]["count"] == 1
+
+        merged = merge_snapshots([batch, batch])
+        assert merged["counters"]["openlogo_image_cache_total"]["result=hit"] == 6
+        assert merged["histograms"]["openlogo_stage_seconds"]["stage=download"]["count"] == 2
+
+
+class TestCrawlerMetrics:
+    """Test the metrics a crawl records against the local stand-ins."""
+
+    @pytest.mark.asyncio
+    async def test_batch_summary_metrics(self, tmp_path):
+        import json
+        from aiohttp.test_utils import TestServer
+        from openlogo import LLMEndpoint, LogoCrawler
+        from openlogo.standins import StandinConfig, create_standin_app
+
+        config = StandinConfig(clearbit_domains={"known.com"}, images_per_page=1)
+        async with TestServer(create_standin_app(config)) as server:
+            base = str(server.make_url("")).rstrip("/")
+            crawler = LogoCrawler(llm_endpoints=[LLMEndpoint.openai("k", base_url=f"{base}/v1")],
+                                  clearbit_url=f"{base}/clearbit", google_favicon_url=f"{base}/favicons",
+                                  detection_analyses=["url_semantics"], early_stop=None)
+            # Recorded before the batch, so not part of its summary
+            crawler.metrics.inc("openlogo_image_cache_total", 5, result="hit")
+            csv_file = tmp_path / "sites.csv"
+            csv_file.write_text("Website\nhttps://known.com\n" + f"{base}/sites/acme.com/\n")
+            await crawler.process_csv_batch(str(csv_file), str(tmp_path / "out"), confirm_header=False)
+            await crawler.cloud_storage.close()
+
+        metrics = json.loads((tmp_path / "out" / "batch_summary.json").read_text())["metrics"]
+        counters = metrics["counters"]
+        assert counters["openlogo_tier_results_total"] == {
+            "outcome=hit,tier=clearbit": 1,
+            "outcome=miss,tier=clearbit": 1,
+            "outcome=miss,tier=google_favicon": 1,
+            "outcome=miss,tier=declared_icons": 1,
+            "outcome=hit,tier=crawler": 1,
+        }
+        assert counters["openlogo_image_cache_total"] == {"result=miss": 2}
+        assert counters["openlogo_llm_requests_total"] == {"status=200": 2}
+        assert counters["openlogo_llm_tokens_total"] == {"kind=prompt": 1700, "kind=completion": 24}
+        assert counters["openlogo_downloaded_bytes_total"]["kind=page"] > 0
+        assert metrics["histograms"]["openlogo_stage_seconds"]["stage=domain"]["count"] == 2
+
+    @pytest.mark.asyncio
+    async def test_service_metrics_endpoint(self):
+        from aiohttp.test_utils import TestClient, TestServer
+        from openlogo import LLMEndpoint, LogoCrawler
+        from openlogo.service import LogoService
+        from openlogo.standins import create_standin_app
+
+        async with TestServer(create_standin_app()) as upstream:
+            base = str(upstream.make_url("")).rstrip("/")
+            crawler = LogoCrawler(llm_endpoints=[LLMEndpoint.openai("k", base_url=f"{base}/v1")],
+                                  clearbit_url=f"{base}/clearbit", google_favicon_url=f"{base}/favicons",
+                                  detection_analyses=["url_semantics"])
+            service = LogoService(crawler, url_template=f"{base}/sites/{{domain}}/")
+            async with TestClient(TestServer(service.create_app())) as client:
+                await client.get("/logo", params={"domain": "acme.com"})
+                await client.get("/logo", params={"domain": "acme.com"})
+                response = await client.get("/metrics")
+                text = await response.text()
+
+        assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+        assert 'openlogo_service_requests_total{source="cache"} 1' in text
+        assert 'openlogo_service_requests_total{source="crawl"} 1' in text
+        assert 'openlogo_tier_results_total{outcome="hit",tier="crawler"} 1' in text
@@ -0,0 +1,165 @@
+"""
+Unit tests for streaming, resumable batch output.
+
+Run with: pytest tests/
+"""
+
+import asyncio
+import json
+
+import pytest
+
+
+class Crash(BaseException):
+    """Simulates the process dying mid-run (not caught per URL)."""
+
+
+class TestResultWriter:
+    """Test the JSONL writer and its checkpoint."""
+
+    def test_reopen_resumes_and_keeps_totals(self, tmp_path):
+        from openlogo.output import ResultWriter
+
+        with ResultWriter(tmp_path) as writer:
+            writer.write("https://a.com", {"logo_count": 2})
+            writer.write("https://b.com", {"logo_count": 0})
+
+        reopened = ResultWriter(tmp_path)
+        reopened.close()
+
+        assert reopened.is_done("https://a.com") and reopened.is_done("https://b.com")
+        assert (reopened.summary.processed, reopened.summary.successful_crawls,
+                reopened.summary.total_logos_found) == (2, 1, 2)
+
+    def test_record_without_checkpoint_is_dropped(self, tmp_path):
+        """A record written just before a crash, but not checkpointed, should be redone."""
+        from openlogo.output import ResultWriter
+
+        with ResultWriter(tmp_path, durable=False) as writer:
+            writer.write("https://a.com", {"logo_count": 1})
+        with open(tmp_path / "results.jsonl", "a") as f:
+            f.write(json.dumps({"url": "https://b.com", "logo_count": 1}) + "\n")
+            f.write('{"url": "https://c.com", "logo')
+
+        with ResultWriter(tmp_path) as writer:
+            assert not writer.is_done("https://b.com")
+            assert [r["url"] for r in writer.iter_records()] == ["https://a.com"]
+
+    def test_summary_is_valid_json(self, tmp_path):
+        from openlogo.output import ResultWriter
+
+        with ResultWriter(tmp_path, durable=False) as writer:
+            writer.write("https://a.com", {"logo_count": 1, "all_logos": [{"url": "https://a.com/logo.png"}]})
+            writer.write("https://b.com", {"logo_count": 0, "all_logos": []})
+            writer.write_summary(tmp_path / "summary.json", {"csv_file": "sites.csv"})
+
+        summary = json.loads((tmp_path / "summary.json").read_text())
+        assert summary["csv_file"] == "sites.csv"
+        assert summary["successful_crawls"] == 1
+        assert list(summary["results"]) == ["https://a.com", "https://b.com"]
+        assert summary["results"]["https://a.com"]["all_logos"][0]["url"] == "https://a.com/logo.png"
+
+
+class TestStreamingCsv:
+    """Test streaming input and resumable process_csv_batch."""
+
+    def test_iter_csv_urls_streams_and_normalizes(self, tmp_path, write_csv):
+        from openlogo import LogoCrawler
+
+        write_csv(tmp_path / "sites.csv", ["acme.com", "https://beta.com", "null"])
+        crawler = LogoCrawler(api_key="k")
+        column = crawler.detect_url_column_name(str(tmp_path / "sites.csv"))
+
+        assert column == "Website"
+        assert list(crawler.iter_csv_urls(str(tmp_path / "sites.csv"), column)) == [
+            "https://acme.com", "https://beta.com"]
+        assert crawler.detect_url_column(str(tmp_path / "sites.csv")) == (
+            "Website", ["https://acme.com", "https://beta.com"])
+
+    @pytest.mark.asyncio
+    async def test_restart_resumes_after_crash(self, tmp_path, write_csv):
+        """A crashed run should leave completed domains in the JSONL and the rerun should skip them."""
+        from datetime import datetime
+        from openlogo import LogoCrawler
+        from openlogo.crawler import LogoResult
+
+        urls = [f"https://site{i}.com" for i in range(5)]
+        write_csv(tmp_path / "sites.csv", urls)
+        crawled = []
+        crash_at = [urls[3]]
+
+        async def fake_crawl(url, spool=None):
+            if url in crash_at:
+                crash_at.clear()
+                raise Crash()
+            crawled.append(url)
+            return [LogoResult(url=f"{url}/logo.svg", confidence=0.5, description="Logo", page_url=url,
+                               image_hash="h", timestamp=datetime.now())]
+
+        crawler = LogoCrawler(api_key="k")
+        crawler.crawl_website = fake_crawl
+        output_dir = str(tmp_path / "out")
+
+        with pytest.raises(Crash):
+            await crawler.process_csv_batch(str(tmp_path / "sites.csv"), output_dir)
+        assert not (tmp_path / "out" / "batch_summary.json").exists()
+
+        results = await crawler.process_csv_batch(str(tmp_path / "sites.csv"), output_dir, return_results=True)
+
+        assert crawled == urls
+        assert list(results) == urls[3:]
+        summary = json.loads((tmp_path / "out" / "batch_summary.json").read_text())
+        assert summary["total_urls"] == 5
+        assert summary["processed_urls"] == 5
+        assert list(summary["results"]) == urls
+
+    @pytest.mark.asyncio
+    async def test_resume_refuses_checkpoint_of_another_csv(self, tmp_path, write_csv):
+        from datetime import datetime
+        from openlogo import LogoCrawler
+        from openlogo.crawler import LogoResult
+
+        async def fake_crawl(url, spool=None):
+            return [LogoResult(url=f"{url}/logo.svg", confidence=0.5, description="Logo", page_url=url,
+                               image_hash="h", timestamp=datetime.now())]
+
+        crawler = LogoCrawler(api_key="k")
+        crawler.crawl_website = fake_crawl
+        output_dir = str(tmp_path / "out")
+        write_csv(tmp_path / "first.csv", ["https://a.com", "https://b.com"])
+        write_csv(tmp_path / "second.csv", ["https://b.com", "https://c.com"])
+        await crawler.process_csv_batch(str(tmp_path / "first.csv"), output_dir, confirm_header=False)
+
+        with pytest.raises(ValueError, match="first.csv"):
+            await crawler.process_csv_batch(str(tmp_path / "second.csv"), output_dir, confirm_header=False)
+
+        # The same content under another path resumes; resume=False starts over for the new CSV
+        (tmp_path / "copy.csv").write_bytes((tmp_path / "first.csv").read_bytes())
+        assert await crawler.process_csv_batch(str(tmp_path / "copy.csv"), output_dir, confirm_header=False) == {}
+        results = await crawler.process_csv_batch(str(tmp_path / "second.csv"), output_dir,
+                                                  confirm_header=False, resume=False)
+        assert list(results) == ["https://b.com", "https://c.com"]
+
+    @pytest.mark.asyncio
+    async def test_batch_releases_detection_pool(self, tmp_path, write_csv):
+        """The detection thread pool should not outlive the batch, and should start again on reuse."""
+        from openlogo import LogoCrawler
+
+        crawler = LogoCrawler(api_key="k")
+        pools = []
+
+        async def fake_crawl(url, spool=None):
+            pools.append(crawler.detection_strategies.executor)
+            await asyncio.get_running_loop().run_in_executor(pools[-1], len, url)
+            return []
+
+        crawler.crawl_website = fake_crawl
+        write_csv(tmp_path / "sites.csv", ["https://a.com"])
+        await crawler.process_csv_batch(str(tmp_path / "sites.csv"), str(tmp_path / "out"), confirm_header=False)
+
+        assert crawler.detection_strategies._executor is None
+        with pytest.raises(RuntimeError):
+            pools[0].submit(len, "")
+        assert crawler.detection_strategies.executor is not pools[0]
+        await crawler.close()
+        assert crawler.detection_strategies._executor is None
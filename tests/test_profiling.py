@@ -0,0 +1,70 @@
+"""
+Unit tests for the slow-domain profiler.
+
+Run with: pytest tests/
+"""
+
+import pytest
+
+
+class TestDomainProfiler:
+    """Test which crawls keep their profiles and what is written."""
+
+    @pytest.mark.asyncio
+    async def test_keeps_only_slow_domains(self, tmp_path):
+        import json
+        from aiohttp.test_utils import TestServer
+        from openlogo import LLMEndpoint, LogoCrawler
+        from openlogo.standins import StandinConfig, create_standin_app
+        from openlogo.tracing import get_tracer
+
+        config = StandinConfig(images_per_page=1, slow_fraction=0.5, slow_latency=0.3)
+        domains = [f"site{i}.com" for i in range(20)]
+        slow = next(domain for domain in domains if config.is_slow(domain))
+        fast = next(domain for domain in domains if not config.is_slow(domain))
+        async with TestServer(create_standin_app(config)) as server:
+            base = str(server.make_url("")).rstrip("/")
+            crawler = LogoCrawler(llm_endpoints=[LLMEndpoint.openai("k", base_url=f"{base}/v1")],
+                                  clearbit_url=f"{base}/clearbit", google_favicon_url=f"{base}/favicons",
+                                  detection_analyses=["url_semantics"])
+            csv_file = tmp_path / "sites.csv"
+            csv_file.write_text(f"Website\n{base}/sites/{fast}/\n{base}/sites/{slow}/\n")
+            await crawler.process_csv_batch(str(csv_file), str(tmp_path / "out"), confirm_header=False,
+                                            profile_threshold=0.6)
+            await crawler.cloud_storage.close()
+
+        profiles = tmp_path / "out" / "profiles"
+        index = [json.loads(line) for line in (profiles / "index.jsonl").read_text().splitlines()]
+        assert [entry["url"] for entry in index] == [f"{base}/sites/{slow}/"]
+        report = json.loads((profiles / index[0]["report"]).read_text())
+        assert report["seconds"] >= 0.6
+        assert report["backend"] in ("cprofile", "pyinstrument")
+        assert (profiles / report["profile"]).exists()
+        stages = [stage["name"] for stage in report["stages"]]
+        assert {"clearbit", "homepage", "download"} <= set(stages)
+        assert all(stage["offset"] >= 0 for stage in report["stages"])
+        if report["backend"] == "cprofile":
+            assert report["hotspots"]
+        # The profiler detached from tracing when the batch ended
+        assert get_tracer() is None
+
+    def test_cprofile_profiles_one_crawl_at_a_time(self, tmp_path):
+        from openlogo.profiling import DomainProfiler
+        from openlogo.tracing import InMemoryExporter, Tracer, get_tracer, set_tracer
+
+        exporter = InMemoryExporter()
+        previous = set_tracer(Tracer([exporter]))
+        try:
+            profiler = DomainProfiler(tmp_path, threshold=0.0, backend="cprofile")
+            assert get_tracer().exporters == [exporter, profiler]
+            with profiler.profile("https://a.com"):
+                with profiler.profile("https://b.com"):
+                    pass
+            profiler.close()
+            assert get_tracer().exporters == [exporter]
+        finally:
+            set_tracer(previous)
+
+        assert (profiler.profiled, profiler.unprofiled) == (1, 1)
+        assert [profile.url for profile in profiler.kept] == ["https://a.com"]
+        assert profiler.kept[0].path.suffix == ".prof"
@@ -0,0 +1,109 @@
+"""
+Unit tests for local logo ranking.
+
+Run with: pytest tests/
+"""
+
+from datetime import datetime
+
+import pytest
+
+
+def _logo(url, confidence, description="A logo", is_header=False):
+    from openlogo.crawler import LogoResult
+
+    return LogoResult(url=url, confidence=confidence, description=description,
+                      page_url="https://www.stripe.com/", image_hash=url,
+                      timestamp=datetime.now(), is_header=is_header)
+
+
+class TestLocalRanker:
+    """Test LocalRanker scoring and ambiguity detection."""
+
+    def test_header_domain_match_ranks_first(self):
+        """A header logo naming the domain should beat a more confident generic one."""
+        from openlogo.ranking import LocalRanker
+
+        generic = _logo("https://stripe.com/partner.png", 0.95)
+        brand = _logo("https://stripe.com/img/stripe-logo.svg", 0.8, is_header=True)
+
+        ranked = LocalRanker().rank([generic, brand])
+
+        assert ranked[0] is brand
+        assert brand.rank_score == pytest.approx(2.01 + 0.8)
+
+    def test_description_counts_as_domain_match(self):
+        """The LLM description naming the brand should count as a domain match."""
+        from openlogo.ranking import LocalRanker
+
+        logo = _logo("https://cdn.example.com/a.png", 0.9, description="Purple Stripe wordmark")
+
+        assert LocalRanker().score(logo) == pytest.approx(0.9 + 0.9)
+
+    def test_ambiguity_uses_margin(self):
+        """Only near-ties should be reported as ambiguous."""
+        from openlogo.ranking import LocalRanker
+
+        close = [_logo("https://x.com/a.png", 0.90), _logo("https://x.com/b.png", 0.85)]
+        clear = [_logo("https://x.com/a.png", 0.90), _logo("https://x.com/b.png", 0.50)]
+        ranker = LocalRanker(margin=0.1)
+
+        assert ranker.is_ambiguous(ranker.rank(close))
+        assert not ranker.is_ambiguous(ranker.rank(clear))
+        assert not ranker.is_ambiguous(ranker.rank(close[:1]))
+        assert not LocalRanker(margin=0).is_ambiguous(ranker.rank(close))
+
+
+class TestEarlyStopPolicy:
+    """Test which results settle a page early."""
+
+    def test_header_brand_logo_is_decisive(self):
+        from openlogo.ranking import EarlyStopPolicy
+
+        policy = EarlyStopPolicy(min_confidence=0.9)
+
+        assert policy.is_decisive(_logo("https://stripe.com/a.png", 0.95, "Stripe wordmark", is_header=True))
+        assert not policy.is_decisive(_logo("https://stripe.com/a.png", 0.95, "Stripe wordmark"))
+        assert not policy.is_decisive(_logo("https://stripe.com/a.png", 0.95, "Partner badge", is_header=True))
+        assert not policy.is_decisive(_logo("https://stripe.com/a.png", 0.85, "Stripe wordmark", is_header=True))
+
+    def test_criteria_are_configurable(self):
+        from openlogo.ranking import EarlyStopPolicy
+
+        policy = EarlyStopPolicy(min_confidence=0.8, require_header=False, require_brand_name=False)
+
+        assert policy.is_decisive(_logo("https://stripe.com/a.png", 0.85, "Partner badge"))
+
+
+class TestRankLogosEndpoint:
+    """Test that LLM ranking follows the configured API."""
+
+    def test_regular_openai_endpoint(self):
+        """Without use_azure the crawler should target the OpenAI API with a bearer token."""
+        from openlogo import LogoCrawler
+
+        endpoint = LogoCrawler(api_key="k").llm.endpoint
+
+        assert endpoint.url.startswith("https://api.openai.com/")
+        assert endpoint.headers["Authorization"] == "Bearer k"
+        assert endpoint.payload([], 10)["model"] == "gpt-4o-mini"
+
+    def test_azure_endpoint(self):
+        """With use_azure the crawler should use the api-key header."""
+        from openlogo import LogoCrawler
+
+        endpoint = LogoCrawler(api_key="k", use_azure=True).llm.endpoint
+
+        assert "openai.azure.com" in endpoint.url
+        assert endpoint.headers["api-key"] == "k"
+        assert "model" not in endpoint.payload([], 10)
+
+    def test_endpoint_pool(self):
+        """llm_endpoints should replace the api_key endpoint and allow omitting the key."""
+        from openlogo import LLMEndpoint, LogoCrawler
+
+        endpoints = [LLMEndpoint.azure_deployment("k1", resource="eu"),
+                     LLMEndpoint.azure_deployment("k2", resource="us", weight=2.0)]
+        crawler = LogoCrawler(llm_endpoints=endpoints)
+
+        assert crawler.llm.pool.endpoints == endpoints
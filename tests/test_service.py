@@ -0,0 +1,157 @@
+"""
+Unit tests for the logo resolution service and the upstream stand-ins.
+
+Run with: pytest tests/
+"""
+
+import pytest
+
+
+async def _standin_crawler(server, **kwargs):
+    from openlogo import LLMEndpoint, LogoCrawler
+
+    base = str(server.make_url("")).rstrip("/")
+    return LogoCrawler(llm_endpoints=[LLMEndpoint.openai("k", base_url=f"{base}/v1")],
+                       clearbit_url=f"{base}/clearbit", google_favicon_url=f"{base}/favicons", **kwargs), base
+
+
+class TestNormalizeDomain:
+    """Test the cache and coalescing key."""
+
+    def test_urls_and_hosts_share_a_key(self):
+        from openlogo.service import normalize_domain
+
+        assert normalize_domain("https://WWW.Acme.com/about?x=1") == "acme.com"
+        assert normalize_domain("acme.com") == "acme.com"
+        assert normalize_domain("shop.acme.com:8443") == "shop.acme.com:8443"
+
+    def test_rejects_empty(self):
+        from openlogo.service import normalize_domain
+
+        with pytest.raises(ValueError):
+            normalize_domain("  ")
+
+
+class TestStandins:
+    """Test the crawler against the local stand-ins."""
+
+    @pytest.mark.asyncio
+    async def test_clearbit_and_favicon_standins(self):
+        from aiohttp.test_utils import TestServer
+        from openlogo import try_clearbit_logo, try_google_favicon
+        from openlogo.standins import StandinConfig, create_standin_app
+
+        config = StandinConfig(clearbit_domains={"acme.com"}, favicon_domains={"beta.com"})
+        async with TestServer(create_standin_app(config)) as server:
+            base = str(server.make_url("")).rstrip("/")
+            assert await try_clearbit_logo("acme.com", "https://acme.com", base_url=f"{base}/clearbit")
+            assert await try_clearbit_logo("beta.com", "https://beta.com", base_url=f"{base}/clearbit") is None
+            assert await try_google_favicon("beta.com", "https://beta.com", base_url=f"{base}/favicons")
+            assert await try_google_favicon("acme.com", "https://acme.com", base_url=f"{base}/favicons") is None
+
+    @pytest.mark.asyncio
+    async def test_site_shape(self):
+        """Redirect stubs, content images, SVGs, extra pages and the /stats counters."""
+        import aiohttp
+        from aiohttp.test_utils import TestServer
+        from openlogo.standins import StandinConfig, create_standin_app
+
+        config = StandinConfig(images_per_page=2, svg_images=1, pages_per_site=3, redirect=True)
+        async with TestServer(create_standin_app(config)) as server:
+            base = str(server.make_url("")).rstrip("/")
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"{base}/sites/acme.com/") as response:
+                    assert 'url=home' in await response.text()
+                async with session.get(f"{base}/sites/acme.com/home") as response:
+                    html = await response.text()
+                async with session.get(f"{base}/sites/acme.com/art0.svg") as response:
+                    assert response.content_type == 'image/svg+xml'
+                async with session.get(f"{base}/stats") as response:
+                    stats = await response.json()
+
+        assert 'img1.png' in html and 'art0.svg' in html and 'page2' in html
+        assert stats == {'site': 2, 'site_image': 1}
+
+    def test_slow_fraction_picks_domains_by_hash(self):
+        from openlogo.standins import StandinConfig
+
+        config = StandinConfig(slow_fraction=0.25)
+        slow = [d for d in (f"site{i}.com" for i in range(400)) if config.is_slow(d)]
+        assert 60 < len(slow) < 140
+        assert slow == [d for d in (f"site{i}.com" for i in range(400)) if config.is_slow(d)]
+
+
+class TestLogoService:
+    """Test single-flight resolution and the result cache."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_crawl(self):
+        """Twenty simultaneous requests for one domain should crawl it (and call the LLM) once."""
+        import asyncio
+        from aiohttp.test_utils import TestServer
+        from openlogo.service import LogoService
+        from openlogo.standins import StandinConfig, StandinStats, create_standin_app
+
+        stats = StandinStats()
+        async with TestServer(create_standin_app(StandinConfig(latency=0.02), stats)) as server:
+            crawler, base = await _standin_crawler(server)
+            service = LogoService(crawler, url_template=f"{base}/sites/{{domain}}/")
+
+            answers = await asyncio.gather(*(service.resolve(d) for d in ["acme.com", "https://www.acme.com/"] * 10))
+            again, source = await service.resolve("ACME.com")
+
+        assert sorted({source for _, source in answers}) == ["coalesced", "crawl"]
+        assert {id(resolution) for resolution, _ in answers} == {id(again)}
+        assert source == "cache"
+        assert stats.requests["site"] == 1
+        assert stats.requests["chat"] == 1
+        assert again.logos[0].url.endswith("/sites/acme.com/logo.png")
+        assert service.stats()["crawls"] == 1 and service.stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_expired_entry_is_crawled_again(self):
+        from datetime import datetime
+        from openlogo import LogoCrawler
+        from openlogo.crawler import LogoResult
+        from openlogo.service import LogoService
+
+        now = [0.0]
+        crawled = []
+
+        async def fake_crawl(url):
+            crawled.append(url)
+            return [LogoResult(url=f"{url}logo.png", confidence=0.9, description="Logo", page_url=url,
+                               image_hash="h", timestamp=datetime.now())]
+
+        crawler = LogoCrawler(api_key="k")
+        crawler.crawl_website = fake_crawl
+        service = LogoService(crawler, cache_ttl=60, clock=lambda: now[0])
+
+        await service.resolve("acme.com")
+        now[0] = 30
+        await service.resolve("acme.com")
+        now[0] = 100
+        await service.resolve("acme.com")
+
+        assert crawled == ["https://acme.com", "https://acme.com"]
+
+    @pytest.mark.asyncio
+    async def test_http_endpoint(self):
+        from aiohttp.test_utils import TestClient, TestServer
+        from openlogo.service import LogoService
+        from openlogo.standins import create_standin_app
+
+        async with TestServer(create_standin_app()) as upstream:
+            crawler, base = await _standin_crawler(upstream)
+            service = LogoService(crawler, url_template=f"{base}/sites/{{domain}}/")
+            async with TestClient(TestServer(service.create_app())) as client:
+                response = await client.get("/logo", params={"domain": "acme.com"})
+                body = await response.json()
+                bad = await client.get("/logo")
+                stats = await (await client.get("/stats")).json()
+
+        assert response.status == 200
+        assert body["domain"] == "acme.com" and body["source"] == "crawl"
+        assert body["logos"][0]["confidence"] == 0.9
+        assert bad.status == 400
+        assert stats["requests"] == 1
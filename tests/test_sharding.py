@@ -0,0 +1,157 @@
+"""
+Unit tests for multi-process sharding of batch runs.
+
+Run with: pytest tests/
+"""
+
+import json
+
+import pytest
+
+
+class TestSharding:
+    """Test how URLs and rate limits are split between workers."""
+
+    def test_shard_index_is_stable_and_in_range(self):
+        from openlogo.sharding import shard_index
+
+        urls = [f"https://site{i}.com" for i in range(50)]
+        indexes = [shard_index(url, 4) for url in urls]
+
+        assert indexes == [shard_index(url, 4) for url in urls]
+        assert set(indexes) == {0, 1, 2, 3}
+
+    def test_rate_limits_are_divided(self):
+        from openlogo import LLMEndpoint
+        from openlogo.sharding import split_rate_limits
+
+        endpoint = LLMEndpoint.openai("k", requests_per_minute=100)
+        kwargs = split_rate_limits({"api_key": "k", "tokens_per_minute": 8000, "llm_endpoints": [endpoint]}, 4)
+
+        assert kwargs["tokens_per_minute"] == 2000
+        assert kwargs["llm_endpoints"][0].requests_per_minute == 25
+        assert kwargs["llm_endpoints"][0].tokens_per_minute is None
+        assert endpoint.requests_per_minute == 100
+
+
+class TestMergeShards:
+    """Test merging shard outputs into one summary."""
+
+    def test_merges_records_and_failed_uploads(self, tmp_path):
+        from openlogo.output import ResultWriter
+        from openlogo.sharding import merge_shards, shard_dir
+
+        for index, url in enumerate(["https://a.com", "https://b.com"]):
+            with ResultWriter(shard_dir(tmp_path, index), durable=False) as writer:
+                writer.write(url, {"logo_count": index + 1})
+        (shard_dir(tmp_path, 1) / "batch_summary.json").write_text(json.dumps({"failed_uploads": ["ab/cd/x.png"]}))
+
+        summary = merge_shards(tmp_path, 2, {"total_urls": 2})
+
+        assert (summary["processed_urls"], summary["total_logos_found"]) == (2, 3)
+        assert summary["failed_uploads"] == ["ab/cd/x.png"]
+        written = json.loads((tmp_path / "batch_summary.json").read_text())
+        assert list(written["results"]) == ["https://a.com", "https://b.com"]
+        assert (tmp_path / "checkpoint.txt").read_text() == "https://a.com\nhttps://b.com\n"
+
+
+class TestProcessUrls:
+    """Test the crawl loop each worker runs."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_crawl_records_every_url(self, tmp_path):
+        import asyncio
+        from openlogo import LogoCrawler
+        from openlogo.output import ResultWriter
+
+        urls = [f"https://site{i}.com" for i in range(6)]
+        running = []
+        peak = []
+
+        async def fake_crawl(url, spool=None):
+            running.append(url)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.remove(url)
+            return []
+
+        crawler = LogoCrawler(api_key="k")
+        crawler.crawl_website = fake_crawl
+        with ResultWriter(tmp_path, durable=False) as writer:
+            await crawler.process_urls(iter(urls), tmp_path, writer=writer, concurrency=3)
+
+        assert writer.completed == set(urls)
+        assert max(peak) == 3
+
+    @pytest.mark.asyncio
+    async def test_stop_lets_started_websites_finish(self, tmp_path):
+        """Once stop is set no further website starts, but the one in progress is recorded."""
+        import asyncio
+        from openlogo import LogoCrawler
+        from openlogo.output import ResultWriter
+
+        urls = [f"https://site{i}.com" for i in range(5)]
+        stop = asyncio.Event()
+
+        async def fake_crawl(url, spool=None):
+            stop.set()
+            return []
+
+        crawler = LogoCrawler(api_key="k")
+        crawler.crawl_website = fake_crawl
+        with ResultWriter(tmp_path, durable=False) as writer:
+            await crawler.process_urls(iter(urls), tmp_path, writer=writer, stop=stop)
+
+        assert writer.completed == {urls[0]}
+
+
+class TestRunShardedBatch:
+    """Test a full run with worker processes."""
+
+    def test_workers_cover_every_url_and_resume(self, tmp_path, write_csv):
+        """Unreachable websites are still recorded, once, by the worker that owns them."""
+        from openlogo.sharding import run_sharded_batch, shard_dir
+
+        urls = [f"http://127.0.0.1:9/site{i}" for i in range(4)]
+        write_csv(tmp_path / "sites.csv", urls)
+        options = dict(crawl_options={"skip_clearbit": True, "skip_google_favicon": True},
+                       crawler_kwargs={"api_key": "k"}, workers=2, concurrency=2)
+
+        summary = run_sharded_batch(str(tmp_path / "sites.csv"), str(tmp_path / "out"), **options)
+        rerun = run_sharded_batch(str(tmp_path / "sites.csv"), str(tmp_path / "out"), **options)
+
+        assert summary["processed_urls"] == rerun["processed_urls"] == 4
+        written = json.loads((tmp_path / "out" / "batch_summary.json").read_text())
+        assert sorted(written["results"]) == sorted(urls)
+        shard_lines = sum(len((shard_dir(tmp_path / "out", i) / "checkpoint.txt").read_text().splitlines())
+                          for i in range(2))
+        assert shard_lines == 4
+
+    @pytest.mark.asyncio
+    async def test_workers_record_training_samples(self, tmp_path):
+        """Each worker writes its training samples to its own shard directory."""
+        import asyncio
+        from aiohttp.test_utils import TestServer
+        from openlogo import LLMEndpoint
+        from openlogo.classifier import load_labeled_results
+        from openlogo.sharding import run_sharded_batch, shard_dir
+        from openlogo.standins import StandinConfig, create_standin_app
+
+        async with TestServer(create_standin_app(StandinConfig(images_per_page=1))) as server:
+            base = str(server.make_url("")).rstrip("/")
+            csv_file = tmp_path / "sites.csv"
+            csv_file.write_text("Website\n" + "".join(f"{base}/sites/site{i}.com/\n" for i in range(4)))
+            crawler_kwargs = {"llm_endpoints": [LLMEndpoint.openai("k", base_url=f"{base}/v1")],
+                              "clearbit_url": f"{base}/clearbit", "google_favicon_url": f"{base}/favicons",
+                              "detection_analyses": ["url_semantics"], "early_stop": None}
+            # The workers reach the stand-ins served by this event loop
+            await asyncio.to_thread(run_sharded_batch, str(csv_file), str(tmp_path / "out"), workers=2,
+                                    crawler_kwargs=crawler_kwargs)
+
+        shards = [shard_dir(tmp_path / "out", i) / "training.jsonl" for i in range(2)]
+        assert all(shard.exists() for shard in shards)
+        assert not (tmp_path / "out" / "training.jsonl").exists()
+        samples, labels = load_labeled_results(tmp_path / "out")
+        # The header logo and the content image of each website
+        assert len(samples) == 8
+        assert all(labels)
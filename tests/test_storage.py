@@ -0,0 +1,218 @@
+"""
+Unit tests for content-addressed logo storage.
+
+Run with: pytest tests/
+"""
+
+import json
+
+import pytest
+
+
+class TestBlobStore:
+    """Test the local content-addressed store."""
+
+    def test_identical_data_stored_once(self, tmp_path):
+        """Equal bytes should map to one hash-sharded file."""
+        from openlogo.storage import BlobStore, blob_hash
+
+        store = BlobStore(tmp_path)
+        first = store.put(b"logo")
+        second = store.put(b"logo")
+
+        assert first == second == blob_hash(b"logo")
+        assert store.path(first) == tmp_path / first[:2] / first[2:4] / f"{first}.png"
+        assert len(list(tmp_path.rglob("*.png"))) == 1
+
+
+class TestCloudStorage:
+    """Test uploads through a pluggable backend."""
+
+    @pytest.mark.asyncio
+    async def test_skips_blobs_that_exist_remotely(self, tmp_path):
+        """An image already in the bucket, even from another process, is not uploaded again."""
+        from openlogo.crawler import CloudStorage
+        from openlogo.storage import LocalBackend
+
+        backend = LocalBackend(tmp_path, base_url="https://cdn.example.com/logos")
+        first = await CloudStorage(backend=backend).upload_image(b"logo", "logo_1_0.95.png")
+        second = await CloudStorage(backend=backend).upload_image(b"logo", "logo_1_0.90.png")
+
+        assert first == second
+        assert first.startswith("https://cdn.example.com/logos/")
+        assert backend.uploads == 1
+
+    @pytest.mark.asyncio
+    async def test_unconfigured_storage_returns_none(self):
+        from openlogo.crawler import CloudStorage
+
+        assert await CloudStorage().upload_image(b"logo") is None
+
+
+class TestSaveResults:
+    """Test that saved results reference blobs by hash."""
+
+    @pytest.mark.asyncio
+    async def test_same_logo_on_two_sites_written_and_uploaded_once(self, make_png, tmp_path):
+        from datetime import datetime
+        from openlogo import LogoCrawler
+        from openlogo.crawler import LogoResult
+        from openlogo.storage import LocalBackend
+
+        backend = LocalBackend(tmp_path / "bucket")
+        crawler = LogoCrawler(api_key="k", storage_backend=backend)
+        data = make_png(120, 40)
+        for site in ("https://a.com", "https://b.com"):
+            url = f"{site}/logo.png"
+            crawler.content_store.put(url, data)
+            result = LogoResult(url=url, confidence=0.95, description="Brand wordmark", page_url=site,
+                                image_hash="h", timestamp=datetime.now())
+            await crawler.save_url_results(site, [result], tmp_path / "results")
+        await crawler.cloud_storage.flush()
+
+        saved = [json.loads(path.read_text())[0] for path in sorted((tmp_path / "results").glob("*.json"))]
+        assert len({entry["background_removed_image_hash"] for entry in saved}) == 1
+        assert len(list((tmp_path / "results" / "blobs").rglob("*.png"))) == 1
+        assert backend.uploads == 1
+        assert saved[0]["cloud_storage_url"].startswith("file://")
+
+    @pytest.mark.asyncio
+    async def test_failed_upload_keeps_local_url(self, make_png, tmp_path):
+        """A cloud URL is only recorded once its upload succeeded."""
+        from datetime import datetime
+        from openlogo import LogoCrawler
+        from openlogo.crawler import LogoResult
+
+        crawler = LogoCrawler(api_key="k", storage_backend=FlakyBackend(failures=10))
+        crawler.cloud_storage.uploads.base_delay = 0.01
+        crawler.content_store.put("https://a.com/logo.png", make_png(120, 40))
+        result = LogoResult(url="https://a.com/logo.png", confidence=0.95, description="Brand wordmark",
+                            page_url="https://a.com", image_hash="h", timestamp=datetime.now())
+        saved = await crawler.save_url_results("https://a.com", [result], tmp_path)
+        await crawler.close()
+
+        assert saved[0]["cloud_storage_url"] is None
+        assert saved[0]["background_removed_image_url"].startswith("file://")
+        assert len(crawler.cloud_storage.uploads.failed) == 1
+
+
+class FlakyBackend:
+    """Blocking stand-in backend that fails its first uploads."""
+
+    def __init__(self, failures=0, delay=0.0):
+        self.failures = failures
+        self.delay = delay
+        self.stored = {}
+        self.calls = 0
+
+    def exists(self, path):
+        return path in self.stored
+
+    def upload(self, path, data, content_type="image/png"):
+        import time
+
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("upload failed")
+        self.stored[path] = data
+
+    def public_url(self, path):
+        return f"https://bucket/{path}"
+
+
+class TestUploadQueue:
+    """Test background uploads off the event loop."""
+
+    @pytest.mark.asyncio
+    async def test_uploads_do_not_block_event_loop(self):
+        """The loop should keep running while a slow backend uploads."""
+        import asyncio
+        from openlogo.storage import UploadQueue
+
+        queue = UploadQueue(FlakyBackend(delay=0.2), max_workers=2)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.ensure_future(ticker())
+        await queue.submit("a.png", b"a")
+        await queue.submit("b.png", b"b")
+        await queue.close()
+        task.cancel()
+
+        assert queue.uploaded == 2
+        assert ticks >= 10
+
+    @pytest.mark.asyncio
+    async def test_retries_then_succeeds(self):
+        from openlogo.storage import UploadQueue
+
+        backend = FlakyBackend(failures=2)
+        queue = UploadQueue(backend, base_delay=0.01)
+        await queue.submit("a.png", b"a")
+        await queue.flush()
+
+        assert backend.stored == {"a.png": b"a"}
+        assert backend.calls == 3
+        assert queue.failed == []
+
+    @pytest.mark.asyncio
+    async def test_exhausted_retries_are_reported(self):
+        from openlogo.storage import UploadQueue
+
+        queue = UploadQueue(FlakyBackend(failures=10), max_retries=1, base_delay=0.01)
+        await queue.submit("a.png", b"a")
+        await queue.flush()
+
+        assert queue.failed == ["a.png"]
+
+    @pytest.mark.asyncio
+    async def test_duplicate_paths_uploaded_once(self):
+        from openlogo.storage import UploadQueue
+
+        backend = FlakyBackend(delay=0.05)
+        queue = UploadQueue(backend)
+        for _ in range(3):
+            await queue.submit("a.png", b"a")
+        await queue.flush()
+        await queue.submit("a.png", b"a")
+        await queue.flush()
+
+        assert backend.calls == 1
+
+    def test_reused_across_event_loops(self):
+        """A queue used by one asyncio.run call should keep working in the next."""
+        import asyncio
+        from openlogo.storage import UploadQueue
+
+        queue = UploadQueue(FlakyBackend(delay=0.01), max_pending=1)
+
+        async def upload(paths):
+            for path in paths:
+                await queue.submit(path, path.encode())
+            await queue.flush()
+
+        asyncio.run(upload(["a.png", "b.png"]))
+        asyncio.run(upload(["c.png", "d.png"]))
+        asyncio.run(queue.close())
+
+        assert queue.uploaded == 4
+
+    @pytest.mark.asyncio
+    async def test_queue_image_returns_url_before_upload_finishes(self):
+        """queue_image should hand back the public URL while the upload is still running."""
+        from openlogo.crawler import CloudStorage
+
+        storage = CloudStorage(backend=FlakyBackend(delay=0.1))
+        url = await storage.queue_image(b"logo")
+
+        assert url.startswith("https://bucket/")
+        assert storage.uploads.pending == 1
+        await storage.close()
+        assert storage.uploads.pending == 0
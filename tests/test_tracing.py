@@ -0,0 +1,102 @@
+"""
+Unit tests for the tracing spans.
+
+Run with: pytest tests/
+"""
+
+import pytest
+
+
+@pytest.fixture
+def memory_tracer():
+    from openlogo.tracing import InMemoryExporter, Tracer, set_tracer
+
+    exporter = InMemoryExporter()
+    previous = set_tracer(Tracer([exporter]))
+    yield exporter
+    set_tracer(previous)
+
+
+class TestTracer:
+    """Test span nesting, errors and the exporters."""
+
+    def test_disabled_tracing_is_a_shared_noop(self):
+        from openlogo.tracing import NOOP_SPAN, get_tracer, span
+
+        assert get_tracer() is None
+        with span("anything", url="x") as s:
+            s.set(more=1)
+        assert s is NOOP_SPAN
+
+    @pytest.mark.asyncio
+    async def test_spans_nest_across_tasks(self, memory_tracer):
+        """Tasks created inside a span report to it as their parent."""
+        import asyncio
+        from openlogo.tracing import span
+
+        async def stage(name):
+            with span(name):
+                await asyncio.sleep(0)
+
+        with span("domain", url="https://acme.com") as root:
+            await asyncio.gather(stage("a"), stage("b"))
+
+        children = memory_tracer.children(root)
+        assert sorted(s.name for s in children) == ["a", "b"]
+        assert {s.trace_id for s in children} == {root.trace_id}
+        assert root.parent_id is None and root.duration >= 0
+
+    def test_error_is_recorded_and_raised(self, memory_tracer):
+        from openlogo.tracing import span
+
+        with pytest.raises(ValueError):
+            with span("stage"):
+                raise ValueError("boom")
+        assert memory_tracer.spans[0].error == "ValueError: boom"
+
+    def test_json_log_exporter(self, tmp_path):
+        import json
+        from openlogo.tracing import JSONLogExporter, Tracer
+
+        tracer = Tracer([JSONLogExporter(tmp_path / "spans.jsonl")])
+        with tracer.span("outer"):
+            with tracer.span("inner", image_url="https://acme.com/logo.png"):
+                pass
+        tracer.close()
+
+        inner, outer = [json.loads(line) for line in (tmp_path / "spans.jsonl").read_text().splitlines()]
+        assert inner["parent_id"] == outer["span_id"]
+        assert inner["attributes"] == {"image_url": "https://acme.com/logo.png"}
+
+
+class TestPipelineSpans:
+    """Test the spans of a crawl against the local stand-ins."""
+
+    @pytest.mark.asyncio
+    async def test_crawl_website_hierarchy(self, memory_tracer):
+        """domain -> tier -> candidate -> stage."""
+        from aiohttp.test_utils import TestServer
+        from openlogo import LLMEndpoint, LogoCrawler
+        from openlogo.standins import StandinConfig, create_standin_app
+
+        async with TestServer(create_standin_app(StandinConfig(images_per_page=1))) as server:
+            base = str(server.make_url("")).rstrip("/")
+            crawler = LogoCrawler(llm_endpoints=[LLMEndpoint.openai("k", base_url=f"{base}/v1")],
+                                  clearbit_url=f"{base}/clearbit", google_favicon_url=f"{base}/favicons",
+                                  detection_analyses=["url_semantics"], early_stop=None)
+            logos = await crawler.crawl_website(f"{base}/sites/acme.com/")
+            await crawler.cloud_storage.close()
+
+        (domain,) = memory_tracer.named("domain")
+        assert domain.attributes["logos"] == len(logos) > 0
+        tiers = [s.name for s in memory_tracer.children(domain)]
+        assert tiers[:3] == ["clearbit", "google_favicon", "homepage"]
+        assert "analysis" in tiers
+
+        (analysis,) = memory_tracer.named("analysis")
+        candidates = memory_tracer.children(analysis)
+        assert {s.name for s in candidates} == {"candidate"}
+        assert len(candidates) == 2
+        stages = {s.name for c in candidates for s in memory_tracer.children(c)}
+        assert {"download", "llm"} <= stages
+        assert all(s.attributes["status"] == 200 for s in memory_tracer.named("llm"))
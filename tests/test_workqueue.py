@@ -0,0 +1,112 @@
+"""
+Unit tests for the leased work queue.
+
+Run with: pytest tests/
+"""
+
+import json
+
+import pytest
+
+
+class TestSQLiteWorkQueue:
+    """Test claims, leases and results of the SQLite queue."""
+
+    def test_enqueue_ignores_duplicates(self, tmp_path):
+        from openlogo.workqueue import SQLiteWorkQueue
+
+        queue = SQLiteWorkQueue(tmp_path / "queue.db")
+
+        assert queue.enqueue(["https://a.com", "https://b.com"]) == 2
+        assert queue.enqueue(["https://b.com", "https://c.com"]) == 1
+        assert queue.progress().pending == 3
+
+    def test_base_queue_is_abstract(self):
+        from openlogo.workqueue import WorkQueue
+
+        with pytest.raises(TypeError):
+            WorkQueue()
+
+    def test_claims_are_exclusive_and_in_order(self, tmp_path):
+        from openlogo.workqueue import SQLiteWorkQueue
+
+        queue = SQLiteWorkQueue(tmp_path / "queue.db")
+        queue.enqueue(["https://a.com", "https://b.com"])
+
+        first = queue.claim("w1", 60)
+        second = queue.claim("w2", 60)
+
+        assert (first.url, second.url) == ("https://a.com", "https://b.com")
+        assert queue.claim("w3", 60) is None
+
+    def test_expired_lease_is_requeued_and_old_holder_rejected(self, fake_clock, tmp_path):
+        """A worker that stopped heartbeating loses the URL to the next claim."""
+        from openlogo.workqueue import SQLiteWorkQueue
+
+        queue = SQLiteWorkQueue(tmp_path / "queue.db", clock=fake_clock)
+        queue.enqueue(["https://a.com"])
+        stale = queue.claim("w1", 60)
+
+        fake_clock.now += 30
+        assert queue.heartbeat(stale, 60)
+        fake_clock.now += 61
+        fresh = queue.claim("w2", 60)
+
+        assert fresh.url == "https://a.com" and fresh.attempt == 2
+        assert not queue.heartbeat(stale, 60)
+        assert not queue.complete(stale, {"logo_count": 1})
+        assert queue.complete(fresh, {"logo_count": 2})
+        assert list(queue.iter_results()) == [("https://a.com", {"logo_count": 2})]
+
+    def test_gives_up_after_max_attempts(self, fake_clock, tmp_path):
+        from openlogo.workqueue import SQLiteWorkQueue
+
+        queue = SQLiteWorkQueue(tmp_path / "queue.db", max_attempts=2, clock=fake_clock)
+        queue.enqueue(["https://a.com", "https://b.com"])
+
+        assert queue.fail(queue.claim("w", 60), "boom")
+        assert queue.fail(queue.claim("w", 60), "boom")
+        queue.claim("w", 60)
+        fake_clock.now += 61
+        queue.claim("w", 60)
+        fake_clock.now += 61
+
+        progress = queue.progress()
+        assert (progress.failed, progress.finished) == (2, True)
+
+
+class TestProcessQueue:
+    """Test workers draining a queue."""
+
+    @pytest.mark.asyncio
+    async def test_workers_share_queue_and_export(self, tmp_path):
+        """Two workers should crawl every URL once; the export has every record."""
+        import asyncio
+        from openlogo import LogoCrawler
+        from openlogo.workqueue import SQLiteWorkQueue, export_results
+
+        (tmp_path / "sites.csv").write_text("Website\n" + "".join(f"site{i}.com\n" for i in range(6)))
+        queue = SQLiteWorkQueue(tmp_path / "queue.db")
+        crawled = []
+
+        async def fake_crawl(url):
+            crawled.append(url)
+            await asyncio.sleep(0.01)
+            return []
+
+        enqueuer = LogoCrawler(api_key="k")
+        assert await enqueuer.process_csv_batch(str(tmp_path / "sites.csv"), queue=queue) == {}
+
+        workers = [LogoCrawler(api_key="k") for _ in range(2)]
+        for worker in workers:
+            worker.crawl_website = fake_crawl
+        progress = await asyncio.gather(*(
+            worker.process_queue(queue, str(tmp_path / "out"), worker_id=f"w{i}", concurrency=2, poll_interval=0.01)
+            for i, worker in enumerate(workers)))
+
+        assert sorted(crawled) == sorted(f"https://site{i}.com" for i in range(6))
+        assert progress[0].done == 6
+        summary = export_results(queue, tmp_path / "export")
+        assert summary["processed_urls"] == 6
+        written = json.loads((tmp_path / "export" / "batch_summary.json").read_text())
+        assert len(written["results"]) == 6